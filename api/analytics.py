@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+from flask import request
+from flask_restful import Resource
+from utils.rate_limiter_init import rate_limiter
+from services.analytics_service import AnalyticsService
+
+MAX_TOP_SKILLS = 100
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat() if timestamp is not None else None
+
+def _summary(rollup):
+    return {
+        'name': rollup.name,
+        'user_count': rollup.user_count,
+        'avg_proficiency': round(rollup.avg_proficiency, 2),
+        'min_proficiency': rollup.min_proficiency,
+        'max_proficiency': rollup.max_proficiency,
+        'median_proficiency': rollup.median_proficiency,
+        'p90_proficiency': rollup.p90_proficiency,
+    }
+
+class TopSkillsResource(Resource):
+    """
+    GET /api/analytics/skills/top?limit=10&min_users=5: skills by average proficiency
+    """
+
+    @rate_limiter.limit("analytics_top_skills_get", limit=30, period=60)
+    def get(self):
+        limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_TOP_SKILLS)
+        min_users = max(request.args.get('min_users', 1, type=int), 1)
+        skills = AnalyticsService.get_top_skills(limit=limit, min_users=min_users)
+        return {
+            'skills': [_summary(rollup) for rollup in skills],
+            # None until the first refresh_skill_rollups run
+            'refreshed_at': _iso(max((rollup.refreshed_at for rollup in skills), default=None))
+        }
+
+class SkillDistributionResource(Resource):
+    """
+    GET /api/analytics/skills/<name>/distribution: users per proficiency level
+    """
+
+    @rate_limiter.limit("analytics_skill_distribution_get", limit=30, period=60)
+    def get(self, name):
+        result = AnalyticsService.get_skill_distribution(name)
+        if not result:
+            return {'message': 'Skill not found'}, 404
+        return dict(
+            _summary(result.summary),
+            distribution=[{'proficiency': proficiency, 'user_count': user_count} for proficiency, user_count in result.distribution],
+            refreshed_at=_iso(result.summary.refreshed_at)
+        )
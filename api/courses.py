@@ -1,5 +1,7 @@
-from flask import request
+from flask import request, current_app
 from flask_restful import Resource
+from utils.conditional import etag_for, last_modified_for, not_modified, validator_headers
+from utils.pagination import clamp_id, clamp_page_args, decode_bulk_items, decode_cursor, decode_ids
 from utils.rate_limiter_init import rate_limiter
 from services.course_service import CourseService
 
@@ -8,7 +10,9 @@ class CourseResource(Resource):
     def get(self, course_id):
         course = CourseService.get_course(course_id)
         if course:
-            return {'id': course.id, 'title': course.title, 'description': course.description, 'user_id': course.user_id}
+            # Validated against the cached DTO, so an unchanged course costs no query and no serialization
+            etag, last_modified = etag_for(course), last_modified_for(course)
+            return not_modified(etag, last_modified) or ({'id': course.id, 'title': course.title, 'description': course.description, 'user_id': course.user_id}, 200, validator_headers(etag, last_modified))
         return {'message': 'Course not found'}, 404
 
     @rate_limiter.limit("course_put", limit=5, period=60)
@@ -28,18 +32,81 @@ class CourseResource(Resource):
 class CourseListResource(Resource):
     @rate_limiter.limit("course_list_get", limit=30, period=60)
     def get(self):
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        page, per_page = clamp_page_args(request.args.get('page', 1, type=int), request.args.get('per_page', 20, type=int), current_app.config['LIST_MAX_PER_PAGE'])
+        if 'ids' in request.args:
+            return self._get_many()
+        if 'cursor' in request.args or 'after_id' in request.args:
+            return self._get_keyset_page(per_page)
         courses_paginated = CourseService.get_all_courses(page=page, per_page=per_page)
-        return {
+        etag = etag_for(*courses_paginated.items, extra=(courses_paginated.total, courses_paginated.pages))
+        return not_modified(etag) or ({
             'courses': [{'id': course.id, 'title': course.title, 'description': course.description, 'user_id': course.user_id} for course in courses_paginated.items],
             'total': courses_paginated.total,
             'pages': courses_paginated.pages,
             'current_page': courses_paginated.page
-        }
+        }, 200, validator_headers(etag))
+
+    def _get_many(self):
+        # Multi-get: one MGET over the per-course cache entries and one IN query for the misses
+        try:
+            course_ids = decode_ids(request.args['ids'], current_app.config['MULTI_GET_MAX_IDS'])
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        courses = CourseService.get_courses_by_ids(course_ids)
+        found = {course.id for course in courses}
+        missing = [course_id for course_id in course_ids if course_id not in found]
+        etag = etag_for(*courses, extra=missing)
+        return not_modified(etag) or ({
+            'courses': [{'id': course.id, 'title': course.title, 'description': course.description, 'user_id': course.user_id} for course in courses],
+            'missing': missing
+        }, 200, validator_headers(etag))
+
+    def _get_keyset_page(self, per_page):
+        # Keyset pagination: seeks past the last seen id instead of OFFSET and skips the exact COUNT(*)
+        try:
+            after_id = clamp_id(decode_cursor(request.args['cursor']) if 'cursor' in request.args else request.args.get('after_id', 0, type=int))
+        except ValueError:
+            return {'message': 'Invalid cursor'}, 400
+        courses_page = CourseService.get_courses_after(after_id=after_id, per_page=per_page, approximate_total=request.args.get('total') == 'approximate')
+        etag = etag_for(*courses_page.items, extra=(courses_page.next_cursor, courses_page.total))
+        return not_modified(etag) or ({
+            'courses': [{'id': course.id, 'title': course.title, 'description': course.description, 'user_id': course.user_id} for course in courses_page.items],
+            'next_cursor': courses_page.next_cursor,
+            'total': courses_page.total
+        }, 200, validator_headers(etag))
 
     @rate_limiter.limit("course_list_post", limit=5, period=60)
     def post(self):
         data = request.get_json()
         course = CourseService.create_course(data)
         return {'id': course.id, 'title': course.title, 'description': course.description, 'user_id': course.user_id}, 201
+
+class CourseBulkResource(Resource):
+    """
+    Batch variants of the list/item endpoints: one request, one transaction and one cache invalidation
+    """
+
+    @rate_limiter.limit("course_bulk_post", limit=5, period=60)
+    def post(self):
+        try:
+            items = decode_bulk_items(request.get_json(silent=True), 'courses', ('title', 'description', 'user_id'), current_app.config['BULK_MAX_ITEMS'])
+            courses = CourseService.bulk_create_courses(items)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        return {'courses': [{'id': course.id, 'title': course.title, 'description': course.description, 'user_id': course.user_id} for course in courses]}, 201
+
+    @rate_limiter.limit("course_bulk_put", limit=5, period=60)
+    def put(self):
+        try:
+            items = decode_bulk_items(request.get_json(silent=True), 'courses', ('id',), current_app.config['BULK_MAX_ITEMS'])
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        return {'updated': CourseService.bulk_update_courses(items)}
+
+    @rate_limiter.limit("course_bulk_delete", limit=3, period=60)
+    def delete(self):
+        try:
+            ids = decode_bulk_items(request.get_json(silent=True), 'ids', (), current_app.config['BULK_MAX_ITEMS'])
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        return {'deleted': CourseService.bulk_delete_courses(ids)}
@@ -0,0 +1,46 @@
+from flask import request, current_app
+from flask_restful import Resource
+from utils.pagination import clamp_page_args
+from utils.rate_limiter_init import rate_limiter
+from services.search_service import SearchService, SEARCH_TARGETS
+from services.course_service import CourseService
+from services.skill_service import SkillService
+
+MAX_QUERY_LENGTH = 100
+
+class SearchResource(Resource):
+    """
+    GET /api/search?q=python&type=courses&page=1&per_page=20
+    GET /api/search?q=pyt&prefix=true  (autocomplete)
+    """
+
+    @rate_limiter.limit("search_get", limit=30, period=60)
+    def get(self):
+        q = request.args.get('q', '').strip()
+        if not q:
+            return {'message': "Missing search query 'q'"}, 400
+        if len(q) > MAX_QUERY_LENGTH:
+            return {'message': f"Search query is longer than {MAX_QUERY_LENGTH} characters"}, 400
+        search_type = request.args.get('type')
+        if search_type is not None and search_type not in SEARCH_TARGETS:
+            return {'message': f"type must be one of {', '.join(SEARCH_TARGETS)}"}, 400
+        types = (search_type,) if search_type else tuple(SEARCH_TARGETS)
+        prefix = request.args.get('prefix', 'false').lower() in ('1', 'true', 'yes')
+        page, per_page = clamp_page_args(request.args.get('page', 1, type=int), request.args.get('per_page', 20, type=int), current_app.config['SEARCH_MAX_PER_PAGE'])
+        # Nothing ranks past each table's candidates, so later pages are all empty
+        page = min(page, current_app.config['SEARCH_MAX_CANDIDATES'] * len(types) // per_page + 1)
+
+        results = SearchService.search(q, types=types, prefix=prefix, page=page, per_page=per_page)
+        # Hits hold ids only; the entities come from their multi-get cache entries
+        courses = {course.id: course for course in CourseService.get_courses_by_ids([hit.id for hit in results.items if hit.kind == 'course'])}
+        skills = {skill.id: skill for skill in SkillService.get_skills_by_ids([hit.id for hit in results.items if hit.kind == 'skill'])}
+        items = []
+        for hit in results.items:
+            if hit.kind == 'course' and hit.id in courses:
+                course = courses[hit.id]
+                items.append({'type': 'course', 'id': course.id, 'title': course.title, 'description': course.description, 'user_id': course.user_id, 'score': hit.score})
+            elif hit.kind == 'skill' and hit.id in skills:
+                skill = skills[hit.id]
+                items.append({'type': 'skill', 'id': skill.id, 'name': skill.name, 'proficiency': skill.proficiency, 'user_id': skill.user_id, 'score': hit.score})
+        # truncated: more rows matched than were ranked, so later pages may miss some matches
+        return {'results': items, 'page': results.page, 'has_more': results.has_more, 'truncated': results.truncated}
@@ -1,5 +1,7 @@
-from flask import request
+from flask import request, current_app
 from flask_restful import Resource
+from utils.conditional import etag_for, last_modified_for, not_modified, validator_headers
+from utils.pagination import clamp_id, clamp_page_args, decode_bulk_items, decode_cursor, decode_ids
 from utils.rate_limiter_init import rate_limiter
 from services.skill_service import SkillService
 
@@ -8,7 +10,9 @@ class SkillResource(Resource):
     def get(self, skill_id):
         skill = SkillService.get_skill(skill_id)
         if skill:
-            return {'id': skill.id, 'name': skill.name, 'proficiency': skill.proficiency, 'user_id': skill.user_id}
+            # Validated against the cached DTO, so an unchanged skill costs no query and no serialization
+            etag, last_modified = etag_for(skill), last_modified_for(skill)
+            return not_modified(etag, last_modified) or ({'id': skill.id, 'name': skill.name, 'proficiency': skill.proficiency, 'user_id': skill.user_id}, 200, validator_headers(etag, last_modified))
         return {'message': 'Skill not found'}, 404
 
     @rate_limiter.limit("skill_put", limit=5, period=60)
@@ -28,18 +32,81 @@ class SkillResource(Resource):
 class SkillListResource(Resource):
     @rate_limiter.limit("skill_list_get", limit=30, period=60)
     def get(self):
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        page, per_page = clamp_page_args(request.args.get('page', 1, type=int), request.args.get('per_page', 20, type=int), current_app.config['LIST_MAX_PER_PAGE'])
+        if 'ids' in request.args:
+            return self._get_many()
+        if 'cursor' in request.args or 'after_id' in request.args:
+            return self._get_keyset_page(per_page)
         skills_paginated = SkillService.get_all_skills(page=page, per_page=per_page)
-        return {
+        etag = etag_for(*skills_paginated.items, extra=(skills_paginated.total, skills_paginated.pages))
+        return not_modified(etag) or ({
             'skills': [{'id': skill.id, 'name': skill.name, 'proficiency': skill.proficiency, 'user_id': skill.user_id} for skill in skills_paginated.items],
             'total': skills_paginated.total,
             'pages': skills_paginated.pages,
             'current_page': skills_paginated.page
-        }
+        }, 200, validator_headers(etag))
+
+    def _get_many(self):
+        # Multi-get: one MGET over the per-skill cache entries and one IN query for the misses
+        try:
+            skill_ids = decode_ids(request.args['ids'], current_app.config['MULTI_GET_MAX_IDS'])
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        skills = SkillService.get_skills_by_ids(skill_ids)
+        found = {skill.id for skill in skills}
+        missing = [skill_id for skill_id in skill_ids if skill_id not in found]
+        etag = etag_for(*skills, extra=missing)
+        return not_modified(etag) or ({
+            'skills': [{'id': skill.id, 'name': skill.name, 'proficiency': skill.proficiency, 'user_id': skill.user_id} for skill in skills],
+            'missing': missing
+        }, 200, validator_headers(etag))
+
+    def _get_keyset_page(self, per_page):
+        # Keyset pagination: seeks past the last seen id instead of OFFSET and skips the exact COUNT(*)
+        try:
+            after_id = clamp_id(decode_cursor(request.args['cursor']) if 'cursor' in request.args else request.args.get('after_id', 0, type=int))
+        except ValueError:
+            return {'message': 'Invalid cursor'}, 400
+        skills_page = SkillService.get_skills_after(after_id=after_id, per_page=per_page, approximate_total=request.args.get('total') == 'approximate')
+        etag = etag_for(*skills_page.items, extra=(skills_page.next_cursor, skills_page.total))
+        return not_modified(etag) or ({
+            'skills': [{'id': skill.id, 'name': skill.name, 'proficiency': skill.proficiency, 'user_id': skill.user_id} for skill in skills_page.items],
+            'next_cursor': skills_page.next_cursor,
+            'total': skills_page.total
+        }, 200, validator_headers(etag))
 
     @rate_limiter.limit("skill_list_post", limit=5, period=60)
     def post(self):
         data = request.get_json()
         skill = SkillService.create_skill(data)
         return {'id': skill.id, 'name': skill.name, 'proficiency': skill.proficiency, 'user_id': skill.user_id}, 201
+
+class SkillBulkResource(Resource):
+    """
+    Batch variants of the list/item endpoints: one request, one transaction and one cache invalidation
+    """
+
+    @rate_limiter.limit("skill_bulk_post", limit=5, period=60)
+    def post(self):
+        try:
+            items = decode_bulk_items(request.get_json(silent=True), 'skills', ('name', 'proficiency', 'user_id'), current_app.config['BULK_MAX_ITEMS'])
+            skills = SkillService.bulk_create_skills(items)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        return {'skills': [{'id': skill.id, 'name': skill.name, 'proficiency': skill.proficiency, 'user_id': skill.user_id} for skill in skills]}, 201
+
+    @rate_limiter.limit("skill_bulk_put", limit=5, period=60)
+    def put(self):
+        try:
+            items = decode_bulk_items(request.get_json(silent=True), 'skills', ('id',), current_app.config['BULK_MAX_ITEMS'])
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        return {'updated': SkillService.bulk_update_skills(items)}
+
+    @rate_limiter.limit("skill_bulk_delete", limit=3, period=60)
+    def delete(self):
+        try:
+            ids = decode_bulk_items(request.get_json(silent=True), 'ids', (), current_app.config['BULK_MAX_ITEMS'])
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        return {'deleted': SkillService.bulk_delete_skills(ids)}
@@ -1,88 +1,174 @@
-from flask import request, jsonify
+from flask import request, jsonify, Response, current_app, stream_with_context, url_for
 from flask_restful import Resource
+from utils.conditional import etag_for, not_modified, validator_headers
+from utils.pagination import clamp_id, clamp_page_args, decode_cursor, decode_ids
 from utils.rate_limiter_init import rate_limiter
 from services.user_service import UserService
-from app import cache
-from flask_compress import Compress
-
-compress = Compress()
+from utils.report_storage import report_storage
+from utils.streaming import EXPORT_FORMATS, chunked, gzipped
 
 class UserResource(Resource):
     @rate_limiter.limit("user_get", limit=10, period=60)
-    @cache.cached(timeout=60, key_prefix='user_resource')
-    @compress.compressed()
     def get(self, user_id):
         user = UserService.get_user_with_courses_and_skills(user_id)
         if user:
-            return user
+            # Validated against the cached DTO, so an unchanged user costs no query and no serialization
+            etag = etag_for(user, *user.courses, *user.skills)
+            return not_modified(etag) or ({
+                'id': user.id,
+                'username': user.username,
+                'email': user.email,
+                'courses': [{'id': c.id, 'title': c.title} for c in user.courses],
+                'skills': [{'id': s.id, 'name': s.name, 'proficiency': s.proficiency} for s in user.skills]
+            }, 200, validator_headers(etag))
         return {'message': 'User not found'}, 404
 
     @rate_limiter.limit("user_put", limit=5, period=60)
-    @compress.compressed()
     def put(self, user_id):
         data = request.get_json()
         user = UserService.update_user(user_id, data)
         if user:
-            cache.delete_memoized(UserService.get_user, user_id)
-            cache.delete_memoized(UserService.get_user_with_courses_and_skills, user_id)
             return {'message': 'User updated successfully'}
         return {'message': 'User not found'}, 404
 
     @rate_limiter.limit("user_delete", limit=3, period=60)
     def delete(self, user_id):
         if UserService.delete_user(user_id):
-            cache.delete_memoized(UserService.get_user, user_id)
-            cache.delete_memoized(UserService.get_user_with_courses_and_skills, user_id)
             return {'message': 'User deleted successfully'}
         return {'message': 'User not found'}, 404
 
 class UserListResource(Resource):
     @rate_limiter.limit("user_list_get", limit=20, period=60)
-    @cache.cached(timeout=60, key_prefix='user_list_resource')
-    @compress.compressed()
     def get(self):
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        page, per_page = clamp_page_args(request.args.get('page', 1, type=int), request.args.get('per_page', 20, type=int), current_app.config['LIST_MAX_PER_PAGE'])
+        if 'ids' in request.args:
+            return self._get_many()
+        if 'cursor' in request.args or 'after_id' in request.args:
+            return self._get_keyset_page(per_page)
         users_paginated = UserService.get_all_users(page=page, per_page=per_page)
-        return {
+        etag = etag_for(*users_paginated.items, extra=(users_paginated.total, users_paginated.pages))
+        return not_modified(etag) or ({
             'users': [{'id': user.id, 'username': user.username, 'email': user.email} for user in users_paginated.items],
             'total': users_paginated.total,
             'pages': users_paginated.pages,
             'current_page': users_paginated.page
-        }
+        }, 200, validator_headers(etag))
+
+    def _get_many(self):
+        # Multi-get: one MGET over the per-user cache entries and one IN query for the misses
+        try:
+            user_ids = decode_ids(request.args['ids'], current_app.config['MULTI_GET_MAX_IDS'])
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        users = UserService.get_users_by_ids(user_ids)
+        found = {user.id for user in users}
+        missing = [user_id for user_id in user_ids if user_id not in found]
+        etag = etag_for(*users, extra=missing)
+        return not_modified(etag) or ({
+            'users': [{'id': user.id, 'username': user.username, 'email': user.email} for user in users],
+            'missing': missing
+        }, 200, validator_headers(etag))
+
+    def _get_keyset_page(self, per_page):
+        # Keyset pagination: seeks past the last seen id instead of OFFSET and skips the exact COUNT(*)
+        try:
+            after_id = clamp_id(decode_cursor(request.args['cursor']) if 'cursor' in request.args else request.args.get('after_id', 0, type=int))
+        except ValueError:
+            return {'message': 'Invalid cursor'}, 400
+        users_page = UserService.get_users_after(after_id=after_id, per_page=per_page, approximate_total=request.args.get('total') == 'approximate')
+        etag = etag_for(*users_page.items, extra=(users_page.next_cursor, users_page.total))
+        return not_modified(etag) or ({
+            'users': [{'id': user.id, 'username': user.username, 'email': user.email} for user in users_page.items],
+            'next_cursor': users_page.next_cursor,
+            'total': users_page.total
+        }, 200, validator_headers(etag))
 
     @rate_limiter.limit("user_list_post", limit=5, period=60)
-    @compress.compressed()
     def post(self):
         data = request.get_json()
         user = UserService.create_user(data)
-        cache.delete_memoized(UserService.get_all_users)
         return {'id': user.id, 'username': user.username, 'email': user.email}, 201
 
 class UserCoursesResource(Resource):
     @rate_limiter.limit("user_courses_get", limit=15, period=60)
-    @cache.cached(timeout=60, key_prefix='user_courses_resource')
-    @compress.compressed()
     def get(self, user_id):
         courses = UserService.get_user_courses(user_id)
-        return {
+        etag = etag_for(*courses)
+        return not_modified(etag) or ({
             'courses': [{'id': course.id, 'title': course.title, 'description': course.description} for course in courses]
-        }
+        }, 200, validator_headers(etag))
 
 class UserSkillsResource(Resource):
     @rate_limiter.limit("user_skills_get", limit=15, period=60)
-    @cache.cached(timeout=60, key_prefix='user_skills_resource')
-    @compress.compressed()
     def get(self, user_id):
         skills = UserService.get_user_skills(user_id)
-        return {
+        etag = etag_for(*skills)
+        return not_modified(etag) or ({
             'skills': [{'id': skill.id, 'name': skill.name, 'proficiency': skill.proficiency} for skill in skills]
-        }
+        }, 200, validator_headers(etag))
 
 class UsersWithCourseCountResource(Resource):
     @rate_limiter.limit("users_with_course_count_get", limit=10, period=60)
-    @cache.cached(timeout=300, key_prefix='users_with_course_count')
-    @compress.compressed()
     def get(self):
         users_with_count = UserService.get_users_with_course_count()
-        return {'users': users_with_count}
+        return {'users': [{'id': u.id, 'username': u.username, 'email': u.email, 'course_count': u.course_count} for u in users_with_count]}
+
+class UsersWithCourseCountExportResource(Resource):
+    """
+    Streams every matching user as NDJSON (default) or CSV:
+
+        GET /api/users/course_count/export?format=csv&min_courses=1&username=al&sort=-course_count
+    """
+
+    @rate_limiter.limit("users_with_course_count_export", limit=5, period=60)
+    def get(self):
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return {'message': f"format must be one of {', '.join(EXPORT_FORMATS)}"}, 400
+        sort = request.args.get('sort', 'id')
+        if sort.lstrip('-') not in UserService.EXPORT_SORT_COLUMNS:
+            return {'message': f"sort must be one of {', '.join(UserService.EXPORT_SORT_COLUMNS)}, optionally prefixed with '-'"}, 400
+        mimetype, extension, encode_lines = EXPORT_FORMATS[export_format]
+
+        rows = UserService.iter_users_with_course_count(
+            min_courses=request.args.get('min_courses', type=int),
+            max_courses=request.args.get('max_courses', type=int),
+            username_prefix=request.args.get('username'),
+            sort=sort,
+            yield_per=current_app.config['EXPORT_YIELD_PER']
+        )
+        body = chunked(encode_lines(UserService.EXPORT_FIELDS, rows), current_app.config['EXPORT_CHUNK_SIZE'])
+        headers = {'Content-Disposition': f'attachment; filename="users_course_count.{extension}"', 'Vary': 'Accept-Encoding'}
+        if request.accept_encodings['gzip']:
+            body = gzipped(body)
+            headers['Content-Encoding'] = 'gzip'
+        return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
+
+class UserReportListResource(Resource):
+    @rate_limiter.limit("user_report_post", limit=3, period=60)
+    def post(self, user_id):
+        task = UserService.generate_user_report(user_id)
+        return {
+            'task_id': task.id,
+            'status_url': url_for('userreportresource', user_id=user_id, task_id=task.id)
+        }, 202
+
+class UserReportResource(Resource):
+    @rate_limiter.limit("user_report_get", limit=30, period=60)
+    def get(self, user_id, task_id):
+        state, handle = UserService.get_user_report(user_id, task_id)
+        if state == 'FAILURE':
+            return {'message': 'Report generation failed'}, 500
+        if state == 'NOT_FOUND' or (handle and not report_storage.exists(handle)):
+            return {'message': 'Report not found'}, 404
+        if not handle:
+            return {'status': state.lower()}, 202
+        # Streamed from storage in fixed-size chunks instead of loading the report into memory
+        return Response(
+            stream_with_context(report_storage.iter_chunks(handle)),
+            mimetype='text/plain',
+            headers={
+                'Content-Disposition': f'attachment; filename="{handle}"',
+                'Content-Length': str(report_storage.size(handle)),
+            }
+        )
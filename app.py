@@ -1,5 +1,5 @@
 import os
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, Response, jsonify, request
 from flask_restful import Api
 from flask_migrate import Migrate
 from redis.exceptions import ConnectionError as RedisConnectionError
@@ -7,7 +7,7 @@ import logging
 import threading
 import time
 from datetime import timedelta
-from extensions import db
+from extensions import db, init_replicas, replica_router
 from utils.rate_limiter_init import init_rate_limiter, redis_client
 from flask_talisman import Talisman
 from flask_limiter import Limiter
@@ -16,11 +16,17 @@ from werkzeug.middleware.profiler import ProfilerMiddleware
 from flask_caching import Cache
 from flask_compress import Compress
 from celery_worker import init_celery
+from utils.near_cache import init_near_cache, near_cache
+from utils.metrics import init_metrics, endpoint_metrics, render_pool_samples, scrape_allowed
+from utils.redis_pool import get_connection_pool, connection_pools
+from utils.static_assets import StaticManifest
+from utils.json_output import init_json
 
 migrate = Migrate()
 limiter = Limiter(key_func=get_remote_address)
 cache = Cache()
 compress = Compress()
+talisman = Talisman()
 
 def create_app():
     app = Flask(__name__, static_folder='frontend/build')
@@ -34,19 +40,33 @@ def create_app():
 
     # Initialize extensions
     db.init_app(app)
+    init_replicas(app)
     migrate.init_app(app, db)
     cache.init_app(app)
     compress.init_app(app)
 
+    @app.after_request
+    def compress_response(response):
+        # Frontend assets are already served precompressed by utils.static_assets
+        if request.endpoint == 'serve':
+            return response
+        return compress.after_request(response)
+
     # Initialize Redis and rate limiter
     init_rate_limiter(app)
+    if app.config.get('REDIS_URL'):
+        # Flask-Limiter shares the process-wide Redis pool too
+        app.config.setdefault('RATELIMIT_STORAGE_OPTIONS', {'connection_pool': get_connection_pool(app.config['REDIS_URL'])})
     limiter.init_app(app)
+    init_near_cache(app, redis_client)
+    init_metrics(app)
 
-    # Initialize API
+    # Initialize API; responses are encoded by utils.json_output
     api = Api(app)
+    init_json(app, api)
 
     # Initialize Talisman for security headers
-    Talisman(app, content_security_policy=app.config['CONTENT_SECURITY_POLICY'])
+    talisman.init_app(app, content_security_policy=app.config['CONTENT_SECURITY_POLICY'])
 
     # Enable profiling in debug mode
     if app.debug:
@@ -56,13 +76,13 @@ def create_app():
     # Initialize Celery
     celery = init_celery(app)
 
+    # Frontend build scanned once; see utils.static_assets
+    static_manifest = StaticManifest(app.static_folder).build()
+
     @app.route('/', defaults={'path': ''})
     @app.route('/<path:path>')
     def serve(path):
-        if path != "" and os.path.exists(app.static_folder + '/' + path):
-            return send_from_directory(app.static_folder, path)
-        else:
-            return send_from_directory(app.static_folder, 'index.html')
+        return static_manifest.serve(path)
 
     @app.errorhandler(RedisConnectionError)
     def handle_redis_connection_error(error):
@@ -76,16 +96,24 @@ def create_app():
 
     # Import and register API resources
     with app.app_context():
-        from api import users, courses, skills
+        from api import users, courses, skills, search, analytics
         api.add_resource(users.UserListResource, '/api/users')
         api.add_resource(users.UserResource, '/api/users/<int:user_id>')
         api.add_resource(users.UserCoursesResource, '/api/users/<int:user_id>/courses')
         api.add_resource(users.UserSkillsResource, '/api/users/<int:user_id>/skills')
         api.add_resource(users.UsersWithCourseCountResource, '/api/users/course_count')
+        api.add_resource(users.UsersWithCourseCountExportResource, '/api/users/course_count/export')
+        api.add_resource(users.UserReportListResource, '/api/users/<int:user_id>/reports')
+        api.add_resource(users.UserReportResource, '/api/users/<int:user_id>/reports/<task_id>')
         api.add_resource(courses.CourseListResource, '/api/courses')
+        api.add_resource(courses.CourseBulkResource, '/api/courses/bulk')
         api.add_resource(courses.CourseResource, '/api/courses/<int:course_id>')
         api.add_resource(skills.SkillListResource, '/api/skills')
+        api.add_resource(skills.SkillBulkResource, '/api/skills/bulk')
         api.add_resource(skills.SkillResource, '/api/skills/<int:skill_id>')
+        api.add_resource(search.SearchResource, '/api/search')
+        api.add_resource(analytics.TopSkillsResource, '/api/analytics/skills/top')
+        api.add_resource(analytics.SkillDistributionResource, '/api/analytics/skills/<string:name>/distribution')
 
     # Initialize auth
     from auth import init_auth
@@ -104,6 +132,32 @@ def create_app():
     def health_check():
         return jsonify({"status": "healthy"}), 200
 
+    @app.route('/health/cache')
+    def cache_stats():
+        return jsonify(near_cache.stats()), 200
+
+    # Prometheus scrape endpoint; scraped over plain HTTP inside the cluster, so it only
+    # answers METRICS_ALLOWED_NETWORKS or requests with METRICS_TOKEN
+    @app.route('/metrics')
+    @talisman(force_https=False)
+    def metrics():
+        if not scrape_allowed(request.remote_addr, request.headers.get('Authorization'),
+                              app.config['METRICS_ALLOWED_NETWORKS'], app.config['METRICS_TOKEN']):
+            return jsonify({"error": "Forbidden"}), 403
+        stats = near_cache.stats()
+        cache_samples = [
+            '# HELP upskill_cache_requests_total Cache lookups by tier and result.',
+            '# TYPE upskill_cache_requests_total counter',
+        ]
+        for tier in ('l1', 'l2'):
+            for result in ('hits', 'misses'):
+                cache_samples.append(f'upskill_cache_requests_total{{tier="{tier}",result="{result}"}} {stats[f"{tier}_{result}"]}')
+        pools = {('redis', url.rsplit('@', 1)[-1]): pool for url, pool in connection_pools().items()}
+        for engine in list(db.engines.values()) + replica_router.engines:
+            if hasattr(engine.pool, 'stats'):
+                pools[('sql', engine.url.render_as_string(hide_password=True))] = engine.pool
+        return Response(endpoint_metrics.render(cache_samples + render_pool_samples(pools)), mimetype='text/plain; version=0.0.4')
+
     return app
 
 app = create_app()
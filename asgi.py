@@ -0,0 +1,254 @@
+"""
+Optional ASGI entry point: serves the read-heavy API endpoints on asyncio
+and hands every other request to the Flask app.
+
+    pip install '.[async]'
+    uvicorn asgi:app --host 0.0.0.0 --port 8080
+
+The async endpoints share the cache, tags and rate limits of the Flask
+endpoints they replace (see utils.async_io), so a request costs the event
+loop a few awaited Redis/Postgres round trips instead of a blocked worker.
+"""
+import logging
+import time
+from contextlib import asynccontextmanager
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, RedirectResponse, Response
+from starlette.routing import Mount, Route
+from app import app as flask_app, talisman
+from config import Config
+from services import async_reads
+from services.course_service import CourseService
+from services.skill_service import SkillService
+from services.user_service import UserService
+from utils.async_io import AsyncBackends
+from utils.conditional import etag_for, is_current, last_modified_for, validator_headers
+from utils.json_output import dumps
+from utils.metrics import REQUEST_COUNTERS, async_request_counters, finish_request
+from utils.pagination import clamp_id, clamp_page_args, decode_cursor, decode_ids
+
+logger = logging.getLogger(__name__)
+backends = None
+
+# Flask response headers that describe the body rather than the response
+BODY_HEADERS = ('Content-Type', 'Content-Length', 'Vary')
+
+def _flask_headers(base_url):
+    """
+    Headers the Flask app's after_request hooks (Talisman, add_header) set on
+    an API response; Talisman only sends HSTS over https
+    """
+    with flask_app.test_request_context('/api/users', base_url=base_url):
+        response = flask_app.process_response(flask_app.response_class())
+    return {name: value for name, value in response.headers.items() if name not in BODY_HEADERS}
+
+SECURE_HEADERS = _flask_headers('https://localhost')
+PLAIN_HEADERS = _flask_headers('http://localhost')
+flask_urls = flask_app.url_map.bind('localhost')
+
+class FastJSONResponse(JSONResponse):
+    # Same encoder as the Flask app, see utils.json_output
+    def render(self, content):
+        return dumps(content)
+
+def _int_arg(request, name, default):
+    # Same as Flask's request.args.get(name, default, type=int)
+    try:
+        return int(request.query_params[name])
+    except (KeyError, ValueError):
+        return default
+
+def _is_secure(request):
+    # Same criteria as Talisman: served over https or behind a TLS-terminating proxy
+    return request.url.scheme == 'https' or request.headers.get('X-Forwarded-Proto', 'http') == 'https'
+
+async def _respond(request, handler, key_prefix, limit, period):
+    if not _is_secure(request):
+        # Same as Talisman's force_https on the Flask endpoints
+        if talisman.force_https and not flask_app.debug and request.url.scheme == 'http':
+            return RedirectResponse(str(request.url.replace(scheme='https')), 301 if talisman.force_https_permanent else 302,
+                                    headers=PLAIN_HEADERS)
+        security_headers = PLAIN_HEADERS
+    else:
+        security_headers = SECURE_HEADERS
+    try:
+        allowed, headers = await backends.rate_limit(key_prefix, limit, period, request.client.host)
+        if allowed:
+            body, status, *extra_headers = await handler(request)
+        else:
+            logger.warning(f"Rate limit exceeded for {key_prefix}:{request.client.host}")
+            body, status, extra_headers = {"error": "Rate limit exceeded"}, 429, ()
+    except Exception as e:
+        logger.error(f"Error in async endpoint {key_prefix}: {str(e)}")
+        return FastJSONResponse({"error": "Internal server error"}, 500, headers=security_headers)
+    headers = {**security_headers, **headers, **(extra_headers[0] if extra_headers else {})}
+    if status == 304:
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(body, status, headers=headers)
+
+def read_endpoint(key_prefix, limit, period=60):
+    """
+    Async counterpart of @rate_limiter.limit for handlers returning (body, status)
+    or (body, status, headers); a 304 status sends the headers without a body.
+    Responses get the Flask app's security headers and https redirect, and are
+    recorded in /metrics under the endpoint name of the Flask resource.
+    """
+    def decorator(handler):
+        async def endpoint(request):
+            started = time.perf_counter()
+            counters = dict.fromkeys(REQUEST_COUNTERS, 0)
+            token = async_request_counters.set(counters)
+            try:
+                response = await _respond(request, handler, key_prefix, limit, period)
+            finally:
+                async_request_counters.reset(token)
+            response.headers['Server-Timing'] = finish_request(
+                flask_urls.match(request.url.path, 'GET')[0], request.method, response.status_code, started, counters
+            )
+            return response
+        return endpoint
+    return decorator
+
+def _conditional(request, body, etag, last_modified=None):
+    # Same validators as utils.conditional.not_modified on the Flask endpoints
+    headers = validator_headers(etag, last_modified)
+    if is_current(request.headers, etag, last_modified):
+        return None, 304, headers
+    return body(), 200, headers
+
+async def _get_many(request, key, single, argument, many_loader, to_dict):
+    # Same as the Flask list resources' ?ids= multi-get
+    try:
+        ids = decode_ids(request.query_params['ids'], Config.MULTI_GET_MAX_IDS)
+    except ValueError as e:
+        return {'message': str(e)}, 400
+    found = await backends.cached_many(single, argument, ids, many_loader)
+    items = [found[item_id] for item_id in ids if found[item_id] is not None]
+    missing = [item_id for item_id in ids if found[item_id] is None]
+    return _conditional(
+        request,
+        lambda: {key: [to_dict(item) for item in items], 'missing': missing},
+        etag_for(*items, extra=missing)
+    )
+
+async def _list(request, key, paged, paged_loader, after, after_loader, to_dict, many):
+    if 'ids' in request.query_params:
+        return await _get_many(request, key, *many, to_dict)
+    page, per_page = clamp_page_args(_int_arg(request, 'page', 1), _int_arg(request, 'per_page', 20), Config.LIST_MAX_PER_PAGE)
+    if 'cursor' in request.query_params or 'after_id' in request.query_params:
+        try:
+            after_id = clamp_id(decode_cursor(request.query_params['cursor']) if 'cursor' in request.query_params else _int_arg(request, 'after_id', 0))
+        except ValueError:
+            return {'message': 'Invalid cursor'}, 400
+        result = await backends.cached(after, after_loader, after_id=after_id, per_page=per_page,
+                                       approximate_total=request.query_params.get('total') == 'approximate')
+        return _conditional(
+            request,
+            lambda: {key: [to_dict(item) for item in result.items], 'next_cursor': result.next_cursor, 'total': result.total},
+            etag_for(*result.items, extra=(result.next_cursor, result.total))
+        )
+    result = await backends.cached(paged, paged_loader, page=page, per_page=per_page)
+    return _conditional(
+        request,
+        lambda: {key: [to_dict(item) for item in result.items], 'total': result.total, 'pages': result.pages, 'current_page': result.page},
+        etag_for(*result.items, extra=(result.total, result.pages))
+    )
+
+def _user_dict(user):
+    return {'id': user.id, 'username': user.username, 'email': user.email}
+
+def _course_dict(course):
+    return {'id': course.id, 'title': course.title, 'description': course.description, 'user_id': course.user_id}
+
+def _skill_dict(skill):
+    return {'id': skill.id, 'name': skill.name, 'proficiency': skill.proficiency, 'user_id': skill.user_id}
+
+@read_endpoint("user_list_get", limit=20)
+async def user_list(request):
+    return await _list(request, 'users', UserService.get_all_users, async_reads.get_all_users,
+                       UserService.get_users_after, async_reads.get_users_after, _user_dict,
+                       many=(UserService.get_user, 'user_id', async_reads.load_users))
+
+@read_endpoint("user_get", limit=10)
+async def user_detail(request):
+    user = await backends.cached(UserService.get_user_with_courses_and_skills, async_reads.get_user_with_courses_and_skills,
+                                 user_id=request.path_params['user_id'])
+    if user:
+        return _conditional(request, lambda: {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'courses': [{'id': c.id, 'title': c.title} for c in user.courses],
+            'skills': [{'id': s.id, 'name': s.name, 'proficiency': s.proficiency} for s in user.skills]
+        }, etag_for(user, *user.courses, *user.skills))
+    return {'message': 'User not found'}, 404
+
+@read_endpoint("user_courses_get", limit=15)
+async def user_courses(request):
+    courses = await backends.cached(UserService.get_user_courses, async_reads.get_user_courses, user_id=request.path_params['user_id'])
+    return _conditional(
+        request,
+        lambda: {'courses': [{'id': course.id, 'title': course.title, 'description': course.description} for course in courses]},
+        etag_for(*courses)
+    )
+
+@read_endpoint("user_skills_get", limit=15)
+async def user_skills(request):
+    skills = await backends.cached(UserService.get_user_skills, async_reads.get_user_skills, user_id=request.path_params['user_id'])
+    return _conditional(
+        request,
+        lambda: {'skills': [{'id': skill.id, 'name': skill.name, 'proficiency': skill.proficiency} for skill in skills]},
+        etag_for(*skills)
+    )
+
+@read_endpoint("course_list_get", limit=30)
+async def course_list(request):
+    return await _list(request, 'courses', CourseService.get_all_courses, async_reads.get_all_courses,
+                       CourseService.get_courses_after, async_reads.get_courses_after, _course_dict,
+                       many=(CourseService.get_course, 'course_id', async_reads.load_courses))
+
+@read_endpoint("course_get", limit=15)
+async def course_detail(request):
+    course = await backends.cached(CourseService.get_course, async_reads.get_course, course_id=request.path_params['course_id'])
+    if course:
+        return _conditional(request, lambda: _course_dict(course), etag_for(course), last_modified_for(course))
+    return {'message': 'Course not found'}, 404
+
+@read_endpoint("skill_list_get", limit=30)
+async def skill_list(request):
+    return await _list(request, 'skills', SkillService.get_all_skills, async_reads.get_all_skills,
+                       SkillService.get_skills_after, async_reads.get_skills_after, _skill_dict,
+                       many=(SkillService.get_skill, 'skill_id', async_reads.load_skills))
+
+@read_endpoint("skill_get", limit=15)
+async def skill_detail(request):
+    skill = await backends.cached(SkillService.get_skill, async_reads.get_skill, skill_id=request.path_params['skill_id'])
+    if skill:
+        return _conditional(request, lambda: _skill_dict(skill), etag_for(skill), last_modified_for(skill))
+    return {'message': 'Skill not found'}, 404
+
+@asynccontextmanager
+async def lifespan(_):
+    global backends
+    backends = AsyncBackends()
+    try:
+        yield
+    finally:
+        await backends.close()
+
+app = Starlette(
+    routes=[
+        Route('/api/users', user_list, methods=['GET']),
+        Route('/api/users/{user_id:int}', user_detail, methods=['GET']),
+        Route('/api/users/{user_id:int}/courses', user_courses, methods=['GET']),
+        Route('/api/users/{user_id:int}/skills', user_skills, methods=['GET']),
+        Route('/api/courses', course_list, methods=['GET']),
+        Route('/api/courses/{course_id:int}', course_detail, methods=['GET']),
+        Route('/api/skills', skill_list, methods=['GET']),
+        Route('/api/skills/{skill_id:int}', skill_detail, methods=['GET']),
+        # Writes, auth, static files and everything else stay on the Flask app
+        Mount('/', WSGIMiddleware(flask_app)),
+    ],
+    lifespan=lifespan,
+)
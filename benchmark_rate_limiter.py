@@ -0,0 +1,67 @@
+"""
+Compares the rate limiting strategies: memory per key and decisions per second.
+
+Runs against the in-memory backend, and against Redis as well when REDIS_URL is set:
+
+    python benchmark_rate_limiter.py [iterations]
+"""
+import os
+import sys
+import time
+import redis
+from utils.rate_limiter import RateLimiter
+from utils.rate_limit_strategies import STRATEGIES, HitLog
+
+LIMIT = 100
+PERIOD = 60
+
+
+def deep_sizeof(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(deep_sizeof(item) for item in value)
+    elif isinstance(value, HitLog):
+        size += sys.getsizeof(value.times)
+    return size
+
+
+def bench_memory(strategy, iterations):
+    limiter = RateLimiter(None)
+    limiter.global_limit = iterations + 1
+    start = time.perf_counter()
+    for i in range(iterations):
+        limiter._memory_rate_limit(strategy, 'bench', 'bench:global', LIMIT, PERIOD)
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed, deep_sizeof(limiter.in_memory_storage.get('bench', time.time()))
+
+
+def bench_redis(client, strategy, iterations):
+    limiter = RateLimiter(client)
+    limiter.global_limit = iterations + 1
+    key = f"bench:{strategy.name}"
+    client.delete(key, 'bench:global')
+    start = time.perf_counter()
+    for i in range(iterations):
+        limiter._redis_rate_limit(strategy, key, 'bench:global', LIMIT, PERIOD)
+    elapsed = time.perf_counter() - start
+    memory = client.memory_usage(key)
+    client.delete(key, 'bench:global')
+    return iterations / elapsed, memory
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    redis_url = os.environ.get('REDIS_URL')
+    client = redis.Redis.from_url(redis_url) if redis_url else None
+
+    print(f"{'strategy':<24}{'backend':<10}{'ops/sec':>12}{'bytes/key':>12}")
+    for name, strategy in STRATEGIES.items():
+        ops, memory = bench_memory(strategy, iterations)
+        print(f"{name:<24}{'memory':<10}{ops:>12.0f}{memory:>12}")
+        if client:
+            ops, memory = bench_redis(client, strategy, iterations)
+            print(f"{name:<24}{'redis':<10}{ops:>12.0f}{memory or 0:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Compares the cost of building and encoding each read endpoint's JSON payload:
+Flask-RESTful's default representation (stdlib json.dumps of the resource's
+dicts) against utils.json_output, from the same cached DTOs.
+
+    python benchmark_serialization.py [users] [iterations]
+
+`users` sizes the /api/users/course_count payload, which lists every user.
+"""
+import json
+import sys
+import time
+from services.dto import UserDTO, UserDetailDTO, UserCourseCountDTO, CourseDTO, SkillDTO, PageDTO
+from utils import json_output
+
+PAGE_SIZE = 20
+
+
+def make_course(i):
+    return CourseDTO(i, f"Course {i}", "An introduction to the fundamentals, with exercises " * 2, i % 50 + 1, 1, 1760000000 + i)
+
+
+def make_skill(i):
+    return SkillDTO(i, f"Skill {i}", i % 5 + 1, i % 50 + 1, 1, 1760000000 + i)
+
+
+def make_user(i):
+    return UserDTO(i, f"user{i}", f"user{i}@example.com", 1, 1760000000 + i)
+
+
+# Each payload as built by its resource in api/, from the DTOs the service returns
+def user_detail_payload(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'courses': [{'id': c.id, 'title': c.title} for c in user.courses],
+        'skills': [{'id': s.id, 'name': s.name, 'proficiency': s.proficiency} for s in user.skills]
+    }
+
+
+def user_list_payload(page):
+    return {
+        'users': [{'id': user.id, 'username': user.username, 'email': user.email} for user in page.items],
+        'total': page.total, 'pages': page.pages, 'current_page': page.page
+    }
+
+
+def course_list_payload(page):
+    return {
+        'courses': [{'id': course.id, 'title': course.title, 'description': course.description, 'user_id': course.user_id} for course in page.items],
+        'total': page.total, 'pages': page.pages, 'current_page': page.page
+    }
+
+
+def skill_list_payload(page):
+    return {
+        'skills': [{'id': skill.id, 'name': skill.name, 'proficiency': skill.proficiency, 'user_id': skill.user_id} for skill in page.items],
+        'total': page.total, 'pages': page.pages, 'current_page': page.page
+    }
+
+
+def course_payload(course):
+    return {'id': course.id, 'title': course.title, 'description': course.description, 'user_id': course.user_id}
+
+
+def skill_payload(skill):
+    return {'id': skill.id, 'name': skill.name, 'proficiency': skill.proficiency, 'user_id': skill.user_id}
+
+
+def cases(users):
+    courses = tuple(make_course(i) for i in range(1, PAGE_SIZE + 1))
+    skills = tuple(make_skill(i) for i in range(1, PAGE_SIZE + 1))
+    detail = UserDetailDTO(1, 'user1', 'user1@example.com', courses, skills, 1, 1760000000)
+    user_page = PageDTO(tuple(make_user(i) for i in range(1, PAGE_SIZE + 1)), 1000, 50, 1)
+    course_page = PageDTO(courses, 1000, 50, 1)
+    skill_page = PageDTO(skills, 1000, 50, 1)
+    course_counts = [UserCourseCountDTO(i, f"user{i}", f"user{i}@example.com", i % 7) for i in range(1, users + 1)]
+    # (endpoint, Flask-RESTful default, utils.json_output)
+    return [
+        ('/api/users/<id>', lambda: json.dumps(user_detail_payload(detail)) + "\n", lambda: json_output.dumps(user_detail_payload(detail))),
+        ('/api/users', lambda: json.dumps(user_list_payload(user_page)) + "\n", lambda: json_output.dumps(user_list_payload(user_page))),
+        ('/api/courses', lambda: json.dumps(course_list_payload(course_page)) + "\n", lambda: json_output.dumps(course_list_payload(course_page))),
+        ('/api/skills', lambda: json.dumps(skill_list_payload(skill_page)) + "\n", lambda: json_output.dumps(skill_list_payload(skill_page))),
+        ('/api/courses/<id>', lambda: json.dumps(course_payload(courses[0])) + "\n", lambda: json_output.dumps(course_payload(courses[0]))),
+        ('/api/skills/<id>', lambda: json.dumps(skill_payload(skills[0])) + "\n", lambda: json_output.dumps(skill_payload(skills[0]))),
+        (
+            '/api/users/course_count',
+            lambda: json.dumps({'users': [{'id': u.id, 'username': u.username, 'email': u.email, 'course_count': u.course_count} for u in course_counts]}) + "\n",
+            lambda: json_output.dumps({'users': [{'id': u.id, 'username': u.username, 'email': u.email, 'course_count': u.course_count} for u in course_counts]}),
+        ),
+    ]
+
+
+def bench(encode, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body = encode()
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed, len(body)
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    encoder = 'orjson' if json_output.orjson is not None else 'stdlib json'
+    print(f"utils.json_output encoder: {encoder}")
+    print(f"{'endpoint':<28}{'default/sec':>14}{'fast/sec':>14}{'speedup':>10}{'bytes':>10}")
+    for endpoint, default, fast in cases(users):
+        # Scale the big payload down so every row takes a comparable time
+        n = max(iterations * PAGE_SIZE // users, 10) if endpoint == '/api/users/course_count' else iterations
+        default_ops, size = bench(default, n)
+        fast_ops, _ = bench(fast, n)
+        print(f"{endpoint:<28}{default_ops:>14.0f}{fast_ops:>14.0f}{fast_ops / default_ops:>9.1f}x{size:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,39 +7,182 @@ celery = Celery(
     backend=Config.REDIS_URL
 )
 
-celery.conf.update(Config.__dict__)
+# Only Celery settings; the Flask config is not meant for Celery (and used to override its defaults)
+celery.conf.update(
+    worker_concurrency=Config.CELERY_WORKER_CONCURRENCY,
+    # Publishing happens from request threads, so one broker connection per thread is enough
+    broker_pool_limit=Config.WEB_CONCURRENCY,
+    redis_max_connections=Config.REDIS_POOL_MAX_CONNECTIONS,
+    broker_connection_retry_on_startup=True,
+)
+
+# Users whose stats need recomputing, and the marker for the batch task already scheduled to do it
+PENDING_STATS_KEY = 'stats:pending'
+STATS_FLUSH_KEY = 'stats:flush'
+STATS_BATCH_SIZE = 500
+
+# Held while refresh_skill_rollups rebuilds the rollup tables
+SKILL_ROLLUP_LOCK_KEY = 'lock:skill_rollups'
+
+# user_id a generate_user_report task was started for; Celery reports unknown task ids as PENDING
+REPORT_TASK_KEY = 'report:task:{}'
+
+def schedule_user_stats(*user_ids):
+    """
+    Queue a stats refresh for the users. Requests within the debounce window are
+    coalesced into a single update_user_stats_batch task for all pending users.
+    """
+    from app import redis_client
+
+    window = Config.USER_STATS_DEBOUNCE_SECONDS
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.sadd(PENDING_STATS_KEY, *user_ids)
+    pipe.set(STATS_FLUSH_KEY, 1, nx=True, ex=window)
+    added, first_in_window = pipe.execute()
+    if first_in_window:
+        update_user_stats_batch.apply_async(countdown=window)
+
+def _update_stats(user_ids):
+    from models import User, Course, Skill
+    from extensions import db
+    from sqlalchemy import func, select, or_
+    from utils.helpers import invalidate_cache
+
+    # Same correlated UPDATE as reconcile_user_counters: the counts are taken in the same statement
+    # that writes them, so concurrent _adjust_*_count increments are not overwritten. Only rows
+    # that drifted are written, so up-to-date users keep their version and ETag.
+    actual_courses = select(func.count(Course.id)).where(Course.user_id == User.id).scalar_subquery()
+    actual_skills = select(func.count(Skill.id)).where(Skill.user_id == User.id).scalar_subquery()
+    drifted = or_(User.course_count != actual_courses, User.skill_count != actual_skills)
+    changed = db.session.execute(select(User.id).where(User.id.in_(user_ids), drifted)).scalars().all()
+    if not changed:
+        return 0
+    User.query.filter(User.id.in_(changed), drifted).update(
+        {'course_count': actual_courses, 'skill_count': actual_skills}, synchronize_session=False
+    )
+    db.session.commit()
+    invalidate_cache('users', *(f'users:{user_id}' for user_id in changed))
+    return len(changed)
 
 @celery.task
 def update_user_stats(user_id):
+    _update_stats([user_id])
+    return f"Updated stats for user {user_id}"
+
+@celery.task
+def update_user_stats_batch():
+    from app import redis_client
+
+    # Cleared first so users queued from now on schedule a new batch
+    redis_client.delete(STATS_FLUSH_KEY)
+    updated = 0
+    while True:
+        user_ids = [int(user_id) for user_id in redis_client.spop(PENDING_STATS_KEY, STATS_BATCH_SIZE)]
+        if not user_ids:
+            break
+        updated += _update_stats(user_ids)
+    return f"Updated stats for {updated} users"
+
+@celery.task
+def reconcile_user_counters():
+    """
+    Safety net for the counters the services maintain incrementally:
+    rewrites any user whose stored counts drifted from the actual rows.
+    """
     from models import User, Course, Skill
     from extensions import db
-    
-    user = User.query.get(user_id)
-    if user:
-        course_count = Course.query.filter_by(user_id=user_id).count()
-        skill_count = Skill.query.filter_by(user_id=user_id).count()
-        user.course_count = course_count
-        user.skill_count = skill_count
-        db.session.commit()
-    return f"Updated stats for user {user_id}"
+    from sqlalchemy import func, select, or_
+    from utils.helpers import invalidate_cache
+
+    actual_courses = select(func.count(Course.id)).where(Course.user_id == User.id).scalar_subquery()
+    actual_skills = select(func.count(Skill.id)).where(Skill.user_id == User.id).scalar_subquery()
+    fixed = User.query.filter(
+        or_(User.course_count != actual_courses, User.skill_count != actual_skills)
+    ).update({'course_count': actual_courses, 'skill_count': actual_skills}, synchronize_session=False)
+    db.session.commit()
+    if fixed:
+        invalidate_cache('users')
+    return f"Reconciled counters for {fixed} users"
+
+@celery.task
+def refresh_skill_rollups():
+    """
+    Rebuilds the skill analytics rollups read by /api/analytics.
+
+    Runs are serialized with a Redis lock: two concurrent delete-then-insert
+    rebuilds (beat plus a manual run) would collide on the rollup primary keys.
+    """
+    import uuid
+    from app import redis_client
+    from services.analytics_service import AnalyticsService
+    from utils.helpers import invalidate_cache, RELEASE_LOCK_SCRIPT
+
+    token = uuid.uuid4().hex
+    if not redis_client.set(SKILL_ROLLUP_LOCK_KEY, token, nx=True, ex=Config.SKILL_ROLLUP_REFRESH_SECONDS):
+        return "Skill rollups are already being refreshed"
+    try:
+        refreshed = AnalyticsService.refresh_skill_rollups()
+    finally:
+        redis_client.register_script(RELEASE_LOCK_SCRIPT)(keys=[SKILL_ROLLUP_LOCK_KEY], args=[token])
+    invalidate_cache('skill_analytics')
+    return f"Refreshed rollups for {refreshed} skills"
+
+celery.conf.beat_schedule = {
+    'reconcile-user-counters': {
+        'task': 'celery_worker.reconcile_user_counters',
+        'schedule': 3600.0,
+    },
+    'refresh-skill-rollups': {
+        'task': 'celery_worker.refresh_skill_rollups',
+        'schedule': float(Config.SKILL_ROLLUP_REFRESH_SECONDS),
+    },
+    'expire-user-reports': {
+        'task': 'celery_worker.expire_user_reports',
+        'schedule': 3600.0,
+    },
+}
 
 @celery.task
 def generate_user_report(user_id):
+    """
+    Streams the report to report storage and returns a handle to it, so the
+    result backend never holds the report itself.
+    """
     from models import User, Course, Skill
-    
-    user = User.query.get(user_id)
-    if user:
-        courses = Course.query.filter_by(user_id=user_id).all()
-        skills = Skill.query.filter_by(user_id=user_id).all()
-        report = f"User Report for {user.username}\n"
-        report += f"Courses ({len(courses)}):\n"
-        for course in courses:
-            report += f"- {course.title}\n"
-        report += f"\nSkills ({len(skills)}):\n"
-        for skill in skills:
-            report += f"- {skill.name} (Proficiency: {skill.proficiency})\n"
-        return report
-    return f"User {user_id} not found"
+    from extensions import db
+    from sqlalchemy import func
+    from utils.report_storage import report_storage
+
+    user = db.session.get(User, user_id)
+    if not user:
+        return None
+
+    batch_size = Config.REPORT_YIELD_PER
+    course_count = db.session.query(func.count(Course.id)).filter(Course.user_id == user_id).scalar()
+    skill_count = db.session.query(func.count(Skill.id)).filter(Skill.user_id == user_id).scalar()
+    # Plain column tuples fetched batch_size rows at a time (server-side cursor where supported)
+    course_titles = db.session.query(Course.title).filter(Course.user_id == user_id).order_by(Course.id).yield_per(batch_size)
+    skill_rows = db.session.query(Skill.name, Skill.proficiency).filter(Skill.user_id == user_id).order_by(Skill.id).yield_per(batch_size)
+
+    handle = report_storage.new_handle(f"user-{user_id}")
+    with report_storage.writer(handle) as report:
+        report.write(f"User Report for {user.username}\n")
+        report.write(f"Courses ({course_count}):\n")
+        for (title,) in course_titles:
+            report.write(f"- {title}\n")
+        report.write(f"\nSkills ({skill_count}):\n")
+        for name, proficiency in skill_rows:
+            report.write(f"- {name} (Proficiency: {proficiency})\n")
+    return {'user_id': user_id, 'handle': handle, 'size': report_storage.size(handle)}
+
+@celery.task
+def refresh_cached_response(module, name, arguments, lock_token):
+    import importlib
+    from utils.helpers import refresh_cached_response as refresh
+
+    importlib.import_module(module)  # Registers the cached function
+    refresh(name, arguments, lock_token)
+    return f"Refreshed {name}"
 
 def init_celery(app):
     class ContextTask(celery.Task):
@@ -49,3 +192,14 @@ def init_celery(app):
 
     celery.Task = ContextTask
     return celery
+
+@celery.task
+def expire_user_reports():
+    """
+    Deletes generated reports older than REPORT_TTL_SECONDS from local report
+    storage; reports kept in Redis expire on their own
+    """
+    from utils.report_storage import report_storage
+
+    deleted = report_storage.delete_expired(Config.REPORT_TTL_SECONDS)
+    return f"Deleted {deleted} expired reports"
@@ -5,27 +5,110 @@ class Config:
     # Flask
     SECRET_KEY = os.environ.get('FLASK_SECRET_KEY') or 'a_secret_key'
     
+    # Concurrency per process; connection pools are sized from these
+    WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 8))  # Request threads per web process
+    CELERY_WORKER_CONCURRENCY = int(os.environ.get('CELERY_WORKER_CONCURRENCY', 4))
+    LOAD_BALANCER_CONCURRENCY = int(os.environ.get('LOAD_BALANCER_CONCURRENCY', 4))  # Worker threads
+    
     # Database
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # One connection per thread that can run a query, plus a little headroom for background threads.
+    # Every web and worker process opens up to pool_size + max_overflow, so keep
+    # replicas * (that sum) well under Postgres' max_connections.
     SQLALCHEMY_ENGINE_OPTIONS = {
-        "pool_size": 10,
+        "pool_size": max(WEB_CONCURRENCY, CELERY_WORKER_CONCURRENCY),
+        "max_overflow": 2,
+        "pool_timeout": 10,
         "pool_recycle": 300,
         "pool_pre_ping": True,
-        "max_overflow": 15,
     }
     
+    # Read replicas (comma-separated URLs); reads fall back to the primary when none are healthy
+    SQLALCHEMY_REPLICA_URIS = [url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url]
+    SQLALCHEMY_REPLICA_MAX_LAG = float(os.environ.get('DATABASE_REPLICA_MAX_LAG', 5))  # Seconds behind the primary
+    SQLALCHEMY_REPLICA_CHECK_INTERVAL = float(os.environ.get('DATABASE_REPLICA_CHECK_INTERVAL', 10))  # Seconds
+    # Seconds after a write during which cache misses under its tags are recomputed on the primary:
+    # a replica can be up to MAX_LAG behind, and fall further behind until the next health check
+    SQLALCHEMY_REPLICA_PIN_SECONDS = float(os.environ.get(
+        'DATABASE_REPLICA_PIN_SECONDS', SQLALCHEMY_REPLICA_MAX_LAG + SQLALCHEMY_REPLICA_CHECK_INTERVAL
+    ))
+    
     # Redis
     REDIS_URL = os.environ.get('REDIS_URL')
+    # One pool per process shared by the rate limiters, cache, near cache listener and load balancer:
+    # a connection per request thread and load balancer thread, plus the pub/sub listener and consumer loop
+    REDIS_POOL_MAX_CONNECTIONS = int(os.environ.get(
+        'REDIS_POOL_MAX_CONNECTIONS', max(WEB_CONCURRENCY, CELERY_WORKER_CONCURRENCY) + LOAD_BALANCER_CONCURRENCY + 4
+    ))
+    REDIS_POOL_TIMEOUT = float(os.environ.get('REDIS_POOL_TIMEOUT', 5))  # Seconds to wait for a free connection
     
     # Rate Limiting
-    RATELIMIT_STORAGE_URL = REDIS_URL
+    RATELIMIT_STORAGE_URI = REDIS_URL or 'memory://'
+    RATELIMIT_IN_MEMORY_FALLBACK_ENABLED = True
     RATELIMIT_STRATEGY = 'fixed-window'
+    # Algorithm used by utils.rate_limiter: the sliding log it has always used ('moving-window') unless
+    # overridden with 'fixed-window', 'sliding-window-counter', 'token-bucket' or 'gcra'
+    RATE_LIMITER_STRATEGY = os.environ.get('RATE_LIMITER_STRATEGY') or 'moving-window'
+    # Upper bound on client keys tracked by the in-memory fallback (LRU evicted)
+    RATE_LIMITER_MEMORY_MAX_KEYS = int(os.environ.get('RATE_LIMITER_MEMORY_MAX_KEYS', 10000))
+    # Multiplies every utils.rate_limiter limit; 0 disables them, e.g. for load_test.py runs from one machine
+    RATE_LIMIT_SCALE = float(os.environ.get('RATE_LIMIT_SCALE', 1))
     
     # Ensure all Redis-related configs use the same URL
     CACHE_REDIS_URL = REDIS_URL
-    CACHE_TYPE = "redis"
+    CACHE_TYPE = "utils.near_cache.TwoTierRedisCache"
+
+    # /metrics answers scrapes from these networks (comma-separated CIDRs), or with
+    # 'Authorization: Bearer <METRICS_TOKEN>' from anywhere; everything else gets a 403
+    METRICS_ALLOWED_NETWORKS = [network for network in os.environ.get('METRICS_ALLOWED_NETWORKS', '127.0.0.1/32,::1/128').split(',') if network]
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Process-local L1 cache in front of Redis
+    NEAR_CACHE_MAX_ENTRIES = int(os.environ.get('NEAR_CACHE_MAX_ENTRIES', 1024))
+    NEAR_CACHE_TTL = int(os.environ.get('NEAR_CACHE_TTL', 30))  # Seconds
     
+    # app.create_app registers Flask-Compress itself so it skips the precompressed frontend assets
+    COMPRESS_REGISTER = False
+    # Flask-Compress buffers a streamed body to compress it; streamed exports gzip themselves (utils.streaming)
+    COMPRESS_STREAMS = False
+
+    # Stats refreshes requested within this window are coalesced into one batch task
+    USER_STATS_DEBOUNCE_SECONDS = int(os.environ.get('USER_STATS_DEBOUNCE_SECONDS', 30))
+
+    # Where generated user reports are kept between the Celery worker that writes them and the web
+    # replica that serves the download: 'redis', or 'local' with REPORT_STORAGE_DIR set to a
+    # directory every web and worker host mounts (see utils.report_storage)
+    REPORT_STORAGE = os.environ.get('REPORT_STORAGE') or 'redis'
+    REPORT_STORAGE_DIR = os.environ.get('REPORT_STORAGE_DIR')
+    REPORT_YIELD_PER = int(os.environ.get('REPORT_YIELD_PER', 1000))  # Rows fetched per round trip
+    REPORT_TTL_SECONDS = int(os.environ.get('REPORT_TTL_SECONDS', 24 * 3600))  # Reports are downloadable this long, then deleted
+
+    # Streamed exports, e.g. /api/users/course_count/export
+    EXPORT_YIELD_PER = int(os.environ.get('EXPORT_YIELD_PER', 1000))  # Rows fetched per round trip
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 64 * 1024))  # Bytes per streamed chunk, before compression
+
+    # Upper bound on items accepted by the /bulk endpoints in one request (one transaction)
+    BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 500))
+
+    # Upper bound on ?per_page= on the list endpoints, for both offset and keyset pages
+    LIST_MAX_PER_PAGE = int(os.environ.get('LIST_MAX_PER_PAGE', 100))
+
+    # Upper bound on ids per ?ids= multi-get on the list endpoints
+    MULTI_GET_MAX_IDS = int(os.environ.get('MULTI_GET_MAX_IDS', 100))
+
+    # /api/search: matches ranked per table per query, and results per page
+    SEARCH_MAX_CANDIDATES = int(os.environ.get('SEARCH_MAX_CANDIDATES', 1000))
+    SEARCH_MAX_PER_PAGE = int(os.environ.get('SEARCH_MAX_PER_PAGE', 50))
+
+    # Seconds between refresh_skill_rollups runs, which rebuild the /api/analytics tables
+    SKILL_ROLLUP_REFRESH_SECONDS = int(os.environ.get('SKILL_ROLLUP_REFRESH_SECONDS', 600))
+
+    # utils.load_balancer stream consumer
+    LOAD_BALANCER_BATCH_SIZE = int(os.environ.get('LOAD_BALANCER_BATCH_SIZE', 10))  # Messages per XREADGROUP
+    LOAD_BALANCER_CLAIM_IDLE_MS = int(os.environ.get('LOAD_BALANCER_CLAIM_IDLE_MS', 60000))  # Reclaim tasks pending this long
+    LOAD_BALANCER_MAX_DELIVERIES = int(os.environ.get('LOAD_BALANCER_MAX_DELIVERIES', 5))  # Then dead-lettered
+
     # OAuth Configuration
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
@@ -53,8 +136,3 @@ class Config:
         'frame-src': "'self'",
         'connect-src': "'self'"
     }
-
-    # Performance Optimization
-    SQLALCHEMY_POOL_TIMEOUT = 30
-    SQLALCHEMY_POOL_RECYCLE = 1800
-    SQLALCHEMY_MAX_OVERFLOW = 5
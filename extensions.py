@@ -1,7 +1,159 @@
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.sql import Select
+from utils.metrics import InstrumentedQueuePool
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+# Seconds the replica is behind the primary; 0 on a primary or non-Postgres database.
+# A replica that has replayed all the WAL it received is current however old its last
+# replayed transaction is, so an idle primary doesn't make its replicas look lagged.
+REPLICA_LAG_QUERY = {
+    'postgresql': text(
+        "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+        "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    ),
+}
+
+class ReplicaRouter:
+    """
+    Round-robin over the read replicas that passed the last health check.
+
+    A background thread checks every replica each `check_interval` seconds;
+    replicas that fail to answer or lag the primary by more than `max_lag`
+    seconds get no reads until a later check passes.
+    """
+
+    def __init__(self):
+        self.engines = []
+        self.max_lag = 5.0
+        self.check_interval = 10.0
+        self.logger = logging.getLogger(__name__)
+        self._healthy = []
+        self._counter = itertools.count()
+        self._checker = None
+
+    def init_app(self, app):
+        options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        self.engines = [create_engine(url, poolclass=InstrumentedQueuePool, **options) for url in app.config.get('SQLALCHEMY_REPLICA_URIS', [])]
+        self.max_lag = app.config.get('SQLALCHEMY_REPLICA_MAX_LAG', self.max_lag)
+        self.check_interval = app.config.get('SQLALCHEMY_REPLICA_CHECK_INTERVAL', self.check_interval)
+        self._healthy = list(self.engines)
+        if self.engines and self._checker is None:
+            self._checker = threading.Thread(target=self._check_forever, daemon=True)
+            self._checker.start()
+
+    def choose(self):
+        healthy = self._healthy
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    def lag(self, engine):
+        query = REPLICA_LAG_QUERY.get(engine.dialect.name, text("SELECT 0"))
+        with engine.connect() as connection:
+            return float(connection.execute(query).scalar() or 0)
+
+    def check(self):
+        healthy = []
+        for engine in self.engines:
+            try:
+                lag = self.lag(engine)
+            except Exception as e:
+                self.logger.warning(f"Read replica {engine.url!r} is unavailable: {str(e)}")
+                continue
+            if lag > self.max_lag:
+                self.logger.warning(f"Read replica {engine.url!r} is {lag:.1f}s behind, above the {self.max_lag}s tolerance")
+                continue
+            healthy.append(engine)
+        self._healthy = healthy
+        return healthy
+
+    def _check_forever(self):
+        while True:
+            time.sleep(self.check_interval)
+            self.check()
+
+replica_router = ReplicaRouter()
+
+class RoutingSession(Session):
+    """
+    Sends SELECTs to a read replica while the session is in read-only scope
+    (GET requests and @read_replica methods). Once the session has written
+    anything it sticks to the primary, so a request reads its own writes;
+    use_primary() does the same for reads that must see other processes'
+    recent writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if self._flushing:
+            self.info['wrote'] = True
+        elif bind is None and clause is not None:
+            is_read = isinstance(clause, Select) and clause._for_update_arg is None
+            if not is_read:
+                self.info['wrote'] = True
+            elif self.info.get('read_only') and not self.info.get('wrote') and not self.info.get('primary'):
+                # One replica per session, so related reads (e.g. a count and its page) see the same snapshot
+                engine = self.info.get('replica') or replica_router.choose()
+                if engine is not None:
+                    self.info['replica'] = engine
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(
+    model_class=Base,
+    session_options={'class_': RoutingSession},
+    engine_options={'poolclass': InstrumentedQueuePool}  # Checkout wait times for /metrics
+)
+
+@contextmanager
+def use_replica():
+    info = db.session.info
+    previous = info.get('read_only', False)
+    info['read_only'] = True
+    try:
+        yield
+    finally:
+        info['read_only'] = previous
+
+@contextmanager
+def use_primary():
+    """
+    Read from the primary even in read-only scope, e.g. to recompute a cache
+    entry that was just invalidated by a write the replicas may not have yet
+    """
+    info = db.session.info
+    previous = info.get('primary', False)
+    info['primary'] = True
+    try:
+        yield
+    finally:
+        info['primary'] = previous
+
+def read_replica(f):
+    """
+    Run f's SELECTs on a read replica, unless the session has already written
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        with use_replica():
+            return f(*args, **kwargs)
+    return wrapper
+
+def init_replicas(app):
+    replica_router.init_app(app)
+
+    @app.before_request
+    def route_reads_to_replica():
+        db.session.info['read_only'] = request.method in ('GET', 'HEAD')
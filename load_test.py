@@ -0,0 +1,123 @@
+"""
+Closed-loop HTTP load test for comparing the WSGI and ASGI servers.
+
+Start both against the same database and Redis, e.g.
+
+    python main.py                                 # WSGI, port 8080
+    uvicorn asgi:app --port 8000                   # ASGI
+    python load_test.py http://localhost:8080 http://localhost:8000 --concurrency 200 --duration 30
+
+Each of `concurrency` keep-alive connections sends the next request as soon
+as the previous response arrives, cycling through --path. Reports requests
+per second, latency percentiles and the status codes seen.
+
+The read endpoints allow 10-30 requests per minute per client IP, so a run
+from one machine would mostly measure 429s. Start both servers with the
+limits raised or turned off to compare serving throughput:
+
+    RATE_LIMIT_SCALE=0 python main.py              # 0 disables them, 100 raises them 100x
+    RATE_LIMIT_SCALE=0 uvicorn asgi:app --port 8000
+
+Leave RATE_LIMIT_SCALE unset to measure 429 handling instead.
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ['/api/users', '/api/courses', '/api/skills', '/api/users/1', '/api/courses/1']
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by server")
+    status = int(status_line.split()[1])
+    length, chunked, close = 0, False, False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value:
+            chunked = True
+        elif name == 'connection' and value == 'close':
+            close = True
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+    return status, close
+
+
+async def connection(url, paths, deadline, latencies, statuses):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80)
+    ssl = parts.scheme == 'https'
+    requests = [
+        f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept: application/json\r\nAccept-Encoding: identity\r\n\r\n".encode('ascii')
+        for path in paths
+    ]
+    reader = writer = None
+    sent = 0
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port, ssl=ssl)
+            start = time.perf_counter()
+            writer.write(requests[sent % len(requests)])
+            sent += 1
+            status, close = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+        except (ConnectionError, asyncio.IncompleteReadError, OSError):
+            statuses['error'] += 1
+            close = True
+        if close and writer is not None:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+async def run(url, paths, concurrency, duration):
+    latencies, statuses = [], Counter()
+    deadline = time.monotonic() + duration
+    start = time.monotonic()
+    await asyncio.gather(*(connection(url, paths, deadline, latencies, statuses) for _ in range(concurrency)))
+    elapsed = time.monotonic() - start
+    latencies.sort()
+    return len(latencies) / elapsed, latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('urls', nargs='+', help='Base URLs of the servers to compare')
+    parser.add_argument('--path', action='append', dest='paths', help='Request path (repeatable)')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+
+    print(f"{'server':<32}{'req/sec':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses")
+    for url in args.urls:
+        rps, latencies, statuses = asyncio.run(run(url, paths, args.concurrency, args.duration))
+        p50, p95, p99 = (percentile(latencies, q) * 1000 for q in (0.5, 0.95, 0.99))
+        status_summary = ' '.join(f"{status}={count}" for status, count in sorted(statuses.items(), key=str))
+        print(f"{url:<32}{rps:>10.0f}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}  {status_summary}")
+
+
+if __name__ == '__main__':
+    main()
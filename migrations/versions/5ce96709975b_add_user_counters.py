@@ -0,0 +1,37 @@
+"""Add denormalized course/skill counters to user
+
+Revision ID: 5ce96709975b
+Revises: 3f9081c2bc3d
+Create Date: 2026-10-18 09:12:44.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5ce96709975b'
+down_revision = '3f9081c2bc3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('course_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('skill_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index(batch_op.f('ix_user_course_count'), ['course_count'], unique=False)
+
+    # Backfill from the existing rows; kept up to date by the services afterwards
+    op.execute(
+        'UPDATE "user" SET '
+        'course_count = (SELECT COUNT(*) FROM course WHERE course.user_id = "user".id), '
+        'skill_count = (SELECT COUNT(*) FROM skill WHERE skill.user_id = "user".id)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_course_count'))
+        batch_op.drop_column('skill_count')
+        batch_op.drop_column('course_count')
@@ -0,0 +1,41 @@
+"""Add version/updated_at to user, course and skill
+
+Revision ID: 8a4d2e61c7f3
+Revises: 5ce96709975b
+Create Date: 2026-10-18 14:02:31.540127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4d2e61c7f3'
+down_revision = '5ce96709975b'
+branch_labels = None
+depends_on = None
+
+TABLES = ('user', 'course', 'skill')
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    # Existing rows start at the migration time (users at their creation time, when known)
+    op.execute('UPDATE "user" SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)')
+    op.execute('UPDATE course SET updated_at = CURRENT_TIMESTAMP')
+    op.execute('UPDATE skill SET updated_at = CURRENT_TIMESTAMP')
+
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False, server_default=sa.func.now())
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
+            batch_op.drop_column('version')
@@ -0,0 +1,61 @@
+"""Add full-text and trigram search indexes to course and skill
+
+Revision ID: b7e3f19a2c54
+Revises: 8a4d2e61c7f3
+Create Date: 2026-10-18 16:40:12.873904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3f19a2c54'
+down_revision = '8a4d2e61c7f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Postgres only (12+ for generated columns); other databases search
+    # through utils.search's in-memory inverted index instead
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # Kept in sync with the columns by Postgres; weights and text search
+    # configurations match services.search_service's targets
+    op.execute(
+        "ALTER TABLE course ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+        ") STORED"
+    )
+    op.execute(
+        "ALTER TABLE skill ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(name, '')), 'A')"
+        ") STORED"
+    )
+    op.create_index('ix_course_search_vector', 'course', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_skill_search_vector', 'skill', ['search_vector'], unique=False, postgresql_using='gin')
+
+    # Prefix (autocomplete) matching: lower(column) LIKE 'prefix%'
+    op.create_index(
+        'ix_course_title_trgm', 'course', [sa.text('lower(title) gin_trgm_ops')], unique=False, postgresql_using='gin'
+    )
+    op.create_index(
+        'ix_skill_name_trgm', 'skill', [sa.text('lower(name) gin_trgm_ops')], unique=False, postgresql_using='gin'
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_skill_name_trgm', table_name='skill')
+    op.drop_index('ix_course_title_trgm', table_name='course')
+    op.drop_index('ix_skill_search_vector', table_name='skill')
+    op.drop_index('ix_course_search_vector', table_name='course')
+    op.drop_column('skill', 'search_vector')
+    op.drop_column('course', 'search_vector')
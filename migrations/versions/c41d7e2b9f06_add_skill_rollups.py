@@ -0,0 +1,48 @@
+"""Add skill analytics rollup tables
+
+Revision ID: c41d7e2b9f06
+Revises: b7e3f19a2c54
+Create Date: 2026-10-18 18:05:27.316442
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e2b9f06'
+down_revision = 'b7e3f19a2c54'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('skill_rollup',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('user_count', sa.Integer(), nullable=False),
+        sa.Column('avg_proficiency', sa.Float(), nullable=False),
+        sa.Column('min_proficiency', sa.Integer(), nullable=False),
+        sa.Column('max_proficiency', sa.Integer(), nullable=False),
+        sa.Column('median_proficiency', sa.Integer(), nullable=False),
+        sa.Column('p90_proficiency', sa.Integer(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    with op.batch_alter_table('skill_rollup', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_skill_rollup_avg_proficiency'), ['avg_proficiency'], unique=False)
+
+    op.create_table('skill_proficiency_rollup',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('proficiency', sa.Integer(), nullable=False),
+        sa.Column('user_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name', 'proficiency')
+    )
+    # Filled by the refresh_skill_rollups Celery task on its next run
+
+
+def downgrade():
+    op.drop_table('skill_proficiency_rollup')
+    with op.batch_alter_table('skill_rollup', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_skill_rollup_avg_proficiency'))
+
+    op.drop_table('skill_rollup')
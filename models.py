@@ -4,13 +4,25 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from datetime import datetime
 
-class User(UserMixin, db.Model):
+class RowVersionMixin:
+    # Behind the API's ETag/Last-Modified validators; bumped by every UPDATE
+    # of the row, including the Core and bulk UPDATEs in the services
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=db.literal_column('version') + 1)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, server_default=db.func.now(), onupdate=datetime.utcnow)
+
+class User(UserMixin, RowVersionMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False, index=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(256))
-    courses = relationship('Course', back_populates='user', lazy='dynamic')
-    skills = relationship('Skill', back_populates='user', lazy='dynamic')
+    # Loaded on access; queries that need them use selectinload to avoid N+1 and join fan-out
+    courses = relationship('Course', back_populates='user', lazy='select')
+    skills = relationship('Skill', back_populates='user', lazy='select')
+
+    # Denormalized counters, maintained by CourseService/SkillService and
+    # reconciled by the reconcile_user_counters Celery task
+    course_count = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+    skill_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # OAuth fields
     oauth_provider = db.Column(db.String(50))
@@ -28,16 +40,40 @@ class User(UserMixin, db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
-class Course(db.Model):
+class Course(RowVersionMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(128), nullable=False, index=True)
     description = db.Column(db.Text)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     user = relationship('User', back_populates='courses')
 
-class Skill(db.Model):
+class Skill(RowVersionMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(64), nullable=False, index=True)
     proficiency = db.Column(db.Integer, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     user = relationship('User', back_populates='skills')
+
+class SkillRollup(db.Model):
+    """
+    Proficiency summary per skill name (lowercased) across all users, rebuilt
+    by the refresh_skill_rollups Celery task; see AnalyticsService.
+    """
+    __tablename__ = 'skill_rollup'
+    name = db.Column(db.String(64), primary_key=True)
+    user_count = db.Column(db.Integer, nullable=False)  # Skill rows, one per user holding the skill
+    avg_proficiency = db.Column(db.Float, nullable=False, index=True)
+    min_proficiency = db.Column(db.Integer, nullable=False)
+    max_proficiency = db.Column(db.Integer, nullable=False)
+    median_proficiency = db.Column(db.Integer, nullable=False)  # percentile_disc(0.5)
+    p90_proficiency = db.Column(db.Integer, nullable=False)  # percentile_disc(0.9)
+    refreshed_at = db.Column(db.DateTime, nullable=False)
+
+class SkillProficiencyRollup(db.Model):
+    """
+    Number of users at each proficiency level of each skill name; rebuilt with SkillRollup
+    """
+    __tablename__ = 'skill_proficiency_rollup'
+    name = db.Column(db.String(64), primary_key=True)
+    proficiency = db.Column(db.Integer, primary_key=True)
+    user_count = db.Column(db.Integer, nullable=False)
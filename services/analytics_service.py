@@ -0,0 +1,93 @@
+from datetime import datetime
+from app import db
+from extensions import read_replica
+from models import Skill, SkillRollup, SkillProficiencyRollup
+from services.dto import SkillRollupDTO, SkillDistributionDTO
+from sqlalchemy import delete, func, insert, literal, select
+from utils.helpers import cache_response
+
+class AnalyticsService:
+    @staticmethod
+    @cache_response(timeout=600, tags=['skill_analytics'])  # Cache for 10 minutes
+    @read_replica
+    def get_top_skills(limit=10, min_users=1):
+        # Reads the precomputed rollup through its avg_proficiency index
+        query = SkillRollup.query.filter(SkillRollup.user_count >= min_users).order_by(
+            SkillRollup.avg_proficiency.desc(), SkillRollup.user_count.desc(), SkillRollup.name
+        ).limit(limit)
+        return [SkillRollupDTO.from_model(rollup) for rollup in query]
+
+    @staticmethod
+    @cache_response(timeout=600, tags=['skill_analytics'])  # Cache for 10 minutes
+    @read_replica
+    def get_skill_distribution(name):
+        rollup = db.session.get(SkillRollup, name.lower())
+        if not rollup:
+            return None
+        buckets = db.session.execute(
+            select(SkillProficiencyRollup.proficiency, SkillProficiencyRollup.user_count)
+            .where(SkillProficiencyRollup.name == rollup.name)
+            .order_by(SkillProficiencyRollup.proficiency)
+        ).all()
+        return SkillDistributionDTO(SkillRollupDTO.from_model(rollup), tuple(tuple(bucket) for bucket in buckets))
+
+    @staticmethod
+    def refresh_skill_rollups():
+        """
+        Rebuilds both rollup tables from skill with GROUP BY queries in one
+        transaction, so readers see either the previous or the new rollup.
+        Returns the number of skills.
+        """
+        name = func.lower(Skill.name)
+        refreshed_at = datetime.utcnow()
+
+        db.session.execute(delete(SkillProficiencyRollup))
+        db.session.execute(insert(SkillProficiencyRollup).from_select(
+            ['name', 'proficiency', 'user_count'],
+            select(name, Skill.proficiency, func.count(Skill.id)).group_by(name, Skill.proficiency)
+        ))
+
+        db.session.execute(delete(SkillRollup))
+        summary = [
+            name,
+            func.count(Skill.id),
+            func.avg(Skill.proficiency),
+            func.min(Skill.proficiency),
+            func.max(Skill.proficiency),
+        ]
+        columns = ['name', 'user_count', 'avg_proficiency', 'min_proficiency', 'max_proficiency', 'median_proficiency', 'p90_proficiency', 'refreshed_at']
+        if db.session.get_bind().dialect.name == 'postgresql':
+            db.session.execute(insert(SkillRollup).from_select(columns, select(
+                *summary,
+                func.percentile_disc(0.5).within_group(Skill.proficiency),
+                func.percentile_disc(0.9).within_group(Skill.proficiency),
+                literal(refreshed_at, SkillRollup.refreshed_at.type),
+            ).group_by(name)))
+        else:
+            # No ordered-set aggregates: percentiles come from the distribution rolled up above
+            distributions = {}
+            for skill_name, proficiency, user_count in db.session.execute(
+                select(SkillProficiencyRollup.name, SkillProficiencyRollup.proficiency, SkillProficiencyRollup.user_count)
+                .order_by(SkillProficiencyRollup.name, SkillProficiencyRollup.proficiency)
+            ):
+                distributions.setdefault(skill_name, []).append((proficiency, user_count))
+            rows = [
+                dict(zip(columns, (*row, _percentile_disc(distributions[row[0]], 0.5), _percentile_disc(distributions[row[0]], 0.9), refreshed_at)))
+                for row in db.session.execute(select(*summary).group_by(name))
+            ]
+            if rows:
+                db.session.execute(insert(SkillRollup), rows)
+
+        refreshed = db.session.execute(select(func.count()).select_from(SkillRollup)).scalar()
+        db.session.commit()
+        return refreshed
+
+def _percentile_disc(distribution, fraction):
+    # Same as Postgres' percentile_disc: the first value whose cumulative share reaches fraction
+    total = sum(count for _, count in distribution)
+    cumulative = 0
+    for value, count in distribution:
+        cumulative += count
+        if cumulative >= fraction * total:
+            return value
+    return distribution[-1][0]
@@ -0,0 +1,122 @@
+"""
+Async loaders for the ASGI read path.
+
+Each mirrors a @cache_response service method (same arguments, same DTOs),
+so utils.async_io.AsyncBackends.cached() can fill that method's cache
+entries without a synchronous database round trip. The load_* loaders
+mirror the services' multi-get miss loaders for AsyncBackends.cached_many().
+"""
+import math
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import selectinload
+from models import User, Course, Skill
+from services.dto import UserDTO, UserDetailDTO, CourseDTO, SkillDTO, PageDTO, CursorPageDTO
+from utils.pagination import encode_cursor
+
+
+async def _paginate(session, query, page, per_page, item_cls):
+    # Same semantics as Flask-SQLAlchemy's paginate(error_out=False)
+    page = max(page, 1)
+    total = await session.scalar(select(func.count()).select_from(query.subquery()))
+    items = (await session.scalars(query.limit(per_page).offset((page - 1) * per_page))).all()
+    pages = math.ceil(total / per_page) if per_page else 0
+    return PageDTO(tuple(item_cls.from_model(item) for item in items), total, pages, page)
+
+
+async def _load_many(session, model, ids, item_cls):
+    # See utils.helpers.cache_get_many; None for ids that don't exist
+    found = {row.id: item_cls.from_model(row) for row in await session.scalars(select(model).where(model.id.in_(ids)))}
+    return {item_id: found.get(item_id) for item_id in ids}
+
+
+async def _keyset_page(session, model, after_id, per_page, approximate_total, item_cls):
+    rows = (await session.scalars(select(model).where(model.id > after_id).order_by(model.id).limit(per_page + 1))).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1].id)
+    total = await _approximate_count(session, model) if approximate_total else None
+    return CursorPageDTO(tuple(item_cls.from_model(row) for row in rows), next_cursor, total)
+
+
+async def _approximate_count(session, model):
+    # See utils.pagination.approximate_count
+    if session.bind.dialect.name == 'postgresql':
+        table_name = session.bind.dialect.identifier_preparer.quote(model.__table__.name)
+        estimate = await session.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+            {'table_name': table_name}
+        )
+        if estimate is not None and estimate >= 0:
+            return estimate
+    return await session.scalar(select(func.count()).select_from(model))
+
+
+async def get_user(session, user_id):
+    user = await session.get(User, user_id)
+    if user:
+        return UserDTO.from_model(user)
+    return None
+
+
+async def get_all_users(session, page=1, per_page=20):
+    return await _paginate(session, select(User), page, per_page, UserDTO)
+
+
+async def get_users_after(session, after_id=0, per_page=20, approximate_total=False):
+    return await _keyset_page(session, User, after_id, per_page, approximate_total, UserDTO)
+
+
+async def load_users(session, user_ids):
+    return await _load_many(session, User, user_ids, UserDTO)
+
+
+async def get_user_with_courses_and_skills(session, user_id):
+    user = await session.scalar(
+        select(User).options(selectinload(User.courses), selectinload(User.skills)).where(User.id == user_id)
+    )
+    if user:
+        return UserDetailDTO.from_model(user)
+    return None
+
+
+async def get_user_courses(session, user_id):
+    return [CourseDTO.from_model(course) for course in await session.scalars(select(Course).where(Course.user_id == user_id))]
+
+
+async def get_user_skills(session, user_id):
+    return [SkillDTO.from_model(skill) for skill in await session.scalars(select(Skill).where(Skill.user_id == user_id))]
+
+
+async def get_course(session, course_id):
+    course = await session.get(Course, course_id)
+    return CourseDTO.from_model(course) if course else None
+
+
+async def load_courses(session, course_ids):
+    return await _load_many(session, Course, course_ids, CourseDTO)
+
+
+async def get_all_courses(session, page=1, per_page=20):
+    return await _paginate(session, select(Course), page, per_page, CourseDTO)
+
+
+async def get_courses_after(session, after_id=0, per_page=20, approximate_total=False):
+    return await _keyset_page(session, Course, after_id, per_page, approximate_total, CourseDTO)
+
+
+async def get_skill(session, skill_id):
+    skill = await session.get(Skill, skill_id)
+    return SkillDTO.from_model(skill) if skill else None
+
+
+async def load_skills(session, skill_ids):
+    return await _load_many(session, Skill, skill_ids, SkillDTO)
+
+
+async def get_all_skills(session, page=1, per_page=20):
+    return await _paginate(session, select(Skill), page, per_page, SkillDTO)
+
+
+async def get_skills_after(session, after_id=0, per_page=20, approximate_total=False):
+    return await _keyset_page(session, Skill, after_id, per_page, approximate_total, SkillDTO)
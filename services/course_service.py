@@ -1,26 +1,58 @@
 from app import db
-from models import Course
-from sqlalchemy.orm import joinedload
-from utils.helpers import cache_response, invalidate_cache, get_cache_key
+from extensions import read_replica
+from models import Course, User
+from collections import Counter
+from sqlalchemy import insert, update, delete, select
+from services.dto import CourseDTO, PageDTO, CursorPageDTO
+from utils.helpers import cache_response, cache_get_many, invalidate_cache
+from utils.pagination import keyset_page, approximate_count
 
 class CourseService:
     @staticmethod
-    @cache_response(timeout=600)  # Cache for 10 minutes
+    @cache_response(timeout=600, tags=['courses:{course_id}'])  # Cache for 10 minutes
+    @read_replica
     def get_course(course_id):
-        return Course.query.options(joinedload(Course.user)).get(course_id)
+        course = Course.query.get(course_id)
+        return CourseDTO.from_model(course) if course else None
+
+    @staticmethod
+    def get_courses_by_ids(course_ids):
+        """
+        Courses in the order of course_ids, leaving out ids that don't exist; shares get_course's cache entries
+        """
+        found = cache_get_many(CourseService.get_course, 'course_id', course_ids, CourseService._load_courses)
+        return [found[course_id] for course_id in course_ids if found[course_id] is not None]
+
+    @staticmethod
+    @read_replica
+    def _load_courses(course_ids):
+        # One WHERE id IN (...) for every cache miss
+        courses = {course.id: CourseDTO.from_model(course) for course in Course.query.filter(Course.id.in_(course_ids))}
+        return {course_id: courses.get(course_id) for course_id in course_ids}
 
     @staticmethod
-    @cache_response(timeout=300)  # Cache for 5 minutes
+    @cache_response(timeout=300, tags=['courses'])  # Cache for 5 minutes
+    @read_replica
     def get_all_courses(page=1, per_page=20):
-        return Course.query.options(joinedload(Course.user)).paginate(page=page, per_page=per_page, error_out=False)
+        courses_paginated = Course.query.paginate(page=page, per_page=per_page, error_out=False)
+        return PageDTO.from_pagination(courses_paginated, CourseDTO)
+
+    @staticmethod
+    @cache_response(timeout=300, tags=['courses'])  # Cache for 5 minutes
+    @read_replica
+    def get_courses_after(after_id=0, per_page=20, approximate_total=False):
+        courses, next_cursor = keyset_page(Course.query, Course.id, after_id, per_page)
+        total = approximate_count(Course) if approximate_total else None
+        return CursorPageDTO(tuple(CourseDTO.from_model(course) for course in courses), next_cursor, total)
 
     @staticmethod
     def create_course(data):
         course = Course(title=data['title'], description=data['description'], user_id=data['user_id'])
         db.session.add(course)
+        CourseService._adjust_course_count(course.user_id, 1)
         db.session.commit()
-        invalidate_cache(get_cache_key('courses'))
-        return course
+        invalidate_cache('courses', f'users:{course.user_id}')
+        return CourseDTO.from_model(course)
 
     @staticmethod
     def update_course(course_id, data):
@@ -29,19 +61,89 @@ class CourseService:
             course.title = data.get('title', course.title)
             course.description = data.get('description', course.description)
             db.session.commit()
-            invalidate_cache(get_cache_key('courses', course_id))
-        return course
+            invalidate_cache('courses', f'courses:{course_id}', f'users:{course.user_id}')
+            return CourseDTO.from_model(course)
+        return None
 
     @staticmethod
     def delete_course(course_id):
         course = Course.query.get(course_id)
         if course:
+            user_id = course.user_id
             db.session.delete(course)
+            CourseService._adjust_course_count(user_id, -1)
             db.session.commit()
-            invalidate_cache(get_cache_key('courses', course_id))
+            invalidate_cache('courses', f'courses:{course_id}', f'users:{user_id}')
             return True
         return False
 
     @staticmethod
+    def bulk_create_courses(items):
+        """
+        Inserts all rows with one multi-row INSERT in a single transaction, then invalidates once.
+        Raises ValueError, before writing anything, if a user_id doesn't exist.
+        """
+        rows = [{'title': item['title'], 'description': item['description'], 'user_id': item['user_id']} for item in items]
+        if not rows:
+            return []
+        user_ids = {row['user_id'] for row in rows}
+        unknown = user_ids - set(db.session.execute(select(User.id).where(User.id.in_(user_ids))).scalars())
+        if unknown:
+            raise ValueError(f"Unknown user_id: {', '.join(str(user_id) for user_id in sorted(unknown))}")
+        created = db.session.execute(
+            insert(Course).values(rows).returning(Course.id, Course.title, Course.description, Course.user_id, Course.version, Course.updated_at)
+        ).all()
+        per_user = Counter(row['user_id'] for row in rows)
+        for user_id, count in per_user.items():
+            CourseService._adjust_course_count(user_id, count)
+        db.session.commit()
+        invalidate_cache('courses', *(f'users:{user_id}' for user_id in per_user))
+        return sorted((CourseDTO.from_model(row) for row in created), key=lambda course: course.id)
+
+    @staticmethod
+    def bulk_update_courses(items):
+        """
+        Updates rows by primary key with one executemany; returns the ids that were updated
+        """
+        changes = {}
+        for item in items:
+            values = {key: item[key] for key in ('title', 'description') if key in item}
+            if values:
+                changes[item['id']] = values
+        if not changes:
+            return []
+        owners = dict(db.session.execute(select(Course.id, Course.user_id).where(Course.id.in_(changes))).all())
+        if owners:
+            # ORM bulk UPDATE by primary key, batched into executemany per set of updated columns
+            db.session.execute(update(Course), [dict(values, id=course_id) for course_id, values in changes.items() if course_id in owners])
+            db.session.commit()
+            invalidate_cache('courses', *(f'courses:{course_id}' for course_id in owners), *(f'users:{user_id}' for user_id in set(owners.values())))
+        return sorted(owners)
+
+    @staticmethod
+    def bulk_delete_courses(course_ids):
+        """
+        Deletes rows with one DELETE ... WHERE id IN (...); returns the ids that were deleted
+        """
+        if not course_ids:
+            return []
+        owners = dict(db.session.execute(select(Course.id, Course.user_id).where(Course.id.in_(course_ids))).all())
+        if owners:
+            db.session.execute(delete(Course).where(Course.id.in_(owners)), execution_options={'synchronize_session': False})
+            per_user = Counter(owners.values())
+            for user_id, count in per_user.items():
+                CourseService._adjust_course_count(user_id, -count)
+            db.session.commit()
+            invalidate_cache('courses', *(f'courses:{course_id}' for course_id in owners), *(f'users:{user_id}' for user_id in per_user))
+        return sorted(owners)
+
+    @staticmethod
+    def _adjust_course_count(user_id, delta):
+        # Incremented in the database within the write's transaction, so concurrent writes don't lose updates
+        db.session.execute(update(User).where(User.id == user_id).values(course_count=User.course_count + delta))
+
+    @staticmethod
+    @read_replica
     def get_courses_by_user(user_id, page=1, per_page=20):
-        return Course.query.filter(Course.user_id == user_id).paginate(page=page, per_page=per_page, error_out=False)
+        courses_paginated = Course.query.filter(Course.user_id == user_id).paginate(page=page, per_page=per_page, error_out=False)
+        return PageDTO.from_pagination(courses_paginated, CourseDTO)
@@ -0,0 +1,147 @@
+from datetime import timezone
+from typing import Optional
+from utils.serialization import dto
+
+
+def _epoch(value):
+    # updated_at columns hold naive UTC datetimes; cached as whole epoch seconds, the HTTP date resolution
+    return int(value.replace(tzinfo=timezone.utc).timestamp()) if value is not None else None
+
+
+@dto
+class CourseDTO:
+    id: int
+    title: str
+    description: Optional[str]
+    user_id: int
+    # Row version and last update, for ETag/Last-Modified; None on entries cached before they existed
+    version: Optional[int] = None
+    updated_at: Optional[int] = None
+
+    @classmethod
+    def from_model(cls, course):
+        return cls(course.id, course.title, course.description, course.user_id, course.version, _epoch(course.updated_at))
+
+
+@dto
+class SkillDTO:
+    id: int
+    name: str
+    proficiency: int
+    user_id: int
+    # Row version and last update, for ETag/Last-Modified; None on entries cached before they existed
+    version: Optional[int] = None
+    updated_at: Optional[int] = None
+
+    @classmethod
+    def from_model(cls, skill):
+        return cls(skill.id, skill.name, skill.proficiency, skill.user_id, skill.version, _epoch(skill.updated_at))
+
+
+@dto
+class UserDTO:
+    id: int
+    username: str
+    email: str
+    # Row version and last update, for ETag/Last-Modified; None on entries cached before they existed
+    version: Optional[int] = None
+    updated_at: Optional[int] = None
+
+    @classmethod
+    def from_model(cls, user):
+        return cls(user.id, user.username, user.email, user.version, _epoch(user.updated_at))
+
+
+@dto
+class UserDetailDTO:
+    id: int
+    username: str
+    email: str
+    courses: tuple
+    skills: tuple
+    version: Optional[int] = None
+    updated_at: Optional[int] = None
+
+    @classmethod
+    def from_model(cls, user):
+        """user with its courses and skills loaded"""
+        return cls(
+            user.id,
+            user.username,
+            user.email,
+            tuple(CourseDTO.from_model(c) for c in user.courses),
+            tuple(SkillDTO.from_model(s) for s in user.skills),
+            user.version,
+            _epoch(user.updated_at)
+        )
+
+
+@dto
+class UserCourseCountDTO:
+    id: int
+    username: str
+    email: str
+    course_count: int
+
+
+@dto
+class PageDTO:
+    """Same attributes as a Flask-SQLAlchemy Pagination, with the items converted to DTOs."""
+    items: tuple
+    total: Optional[int]
+    pages: int
+    page: int
+
+    @classmethod
+    def from_pagination(cls, pagination, item_cls):
+        return cls(tuple(item_cls.from_model(item) for item in pagination.items), pagination.total, pagination.pages, pagination.page)
+
+
+@dto
+class CursorPageDTO:
+    """A keyset page; next_cursor is None on the last page and total is only set when requested."""
+    items: tuple
+    next_cursor: Optional[str]
+    total: Optional[int]
+
+
+@dto
+class SearchHitDTO:
+    kind: str  # 'course' or 'skill'
+    id: int
+    score: float
+
+
+@dto
+class SearchPageDTO:
+    """Ranked hits only; the entities are loaded through the services' multi-get."""
+    items: tuple
+    page: int
+    has_more: bool
+    # More rows matched than SEARCH_MAX_CANDIDATES per table; only those candidates were ranked
+    truncated: bool = False
+
+
+@dto
+class SkillRollupDTO:
+    name: str
+    user_count: int
+    avg_proficiency: float
+    min_proficiency: int
+    max_proficiency: int
+    median_proficiency: int
+    p90_proficiency: int
+    refreshed_at: int  # Epoch seconds
+
+    @classmethod
+    def from_model(cls, rollup):
+        return cls(
+            rollup.name, rollup.user_count, rollup.avg_proficiency, rollup.min_proficiency, rollup.max_proficiency,
+            rollup.median_proficiency, rollup.p90_proficiency, _epoch(rollup.refreshed_at)
+        )
+
+
+@dto
+class SkillDistributionDTO:
+    summary: SkillRollupDTO
+    distribution: tuple  # (proficiency, user_count) pairs, by proficiency
@@ -0,0 +1,36 @@
+from config import Config
+from extensions import read_replica
+from models import Course, Skill
+from services.dto import SearchHitDTO, SearchPageDTO
+from utils.helpers import cache_response
+from utils.search import SearchTarget, get_search_backend
+
+# Fields and weights match the search_vector columns of the add_search_indexes migration
+SEARCH_TARGETS = {
+    'courses': SearchTarget('course', Course, ((Course.title, 'A'), (Course.description, 'B')), 'english'),
+    'skills': SearchTarget('skill', Skill, ((Skill.name, 'A'),), 'simple'),
+}
+
+class SearchService:
+    @staticmethod
+    @cache_response(timeout=60, tags=['courses', 'skills'])  # Cache for 1 minute
+    @read_replica
+    def search(q, types=('courses', 'skills'), prefix=False, page=1, per_page=20):
+        """
+        One page of hits for q across the given types, best first. prefix=True
+        matches titles/names starting with q (autocomplete) instead of words.
+        """
+        backend = get_search_backend(Config.SEARCH_MAX_CANDIDATES)
+        page = max(page, 1)
+        offset = (page - 1) * per_page
+        # Each table's best offset + per_page + 1 hits are enough to merge this page and tell if there is another
+        limit = offset + per_page + 1
+        hits = []
+        truncated = False
+        for search_type in types:
+            target = SEARCH_TARGETS[search_type]
+            matches, cut_off = backend.prefix(target, q, limit) if prefix else backend.search(target, q, limit)
+            hits.extend(SearchHitDTO(target.kind, row_id, score) for row_id, score in matches)
+            truncated = truncated or cut_off
+        hits.sort(key=lambda hit: (-hit.score, hit.kind, hit.id))
+        return SearchPageDTO(tuple(hits[offset:offset + per_page]), page, len(hits) > offset + per_page, truncated)
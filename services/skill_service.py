@@ -1,26 +1,58 @@
 from app import db
-from models import Skill
-from sqlalchemy.orm import joinedload
-from utils.helpers import cache_response, invalidate_cache, get_cache_key
+from extensions import read_replica
+from models import Skill, User
+from collections import Counter
+from sqlalchemy import insert, update, delete, select
+from services.dto import SkillDTO, PageDTO, CursorPageDTO
+from utils.helpers import cache_response, cache_get_many, invalidate_cache
+from utils.pagination import keyset_page, approximate_count
 
 class SkillService:
     @staticmethod
-    @cache_response(timeout=600)  # Cache for 10 minutes
+    @cache_response(timeout=600, tags=['skills:{skill_id}'])  # Cache for 10 minutes
+    @read_replica
     def get_skill(skill_id):
-        return Skill.query.options(joinedload(Skill.user)).get(skill_id)
+        skill = Skill.query.get(skill_id)
+        return SkillDTO.from_model(skill) if skill else None
+
+    @staticmethod
+    def get_skills_by_ids(skill_ids):
+        """
+        Skills in the order of skill_ids, leaving out ids that don't exist; shares get_skill's cache entries
+        """
+        found = cache_get_many(SkillService.get_skill, 'skill_id', skill_ids, SkillService._load_skills)
+        return [found[skill_id] for skill_id in skill_ids if found[skill_id] is not None]
+
+    @staticmethod
+    @read_replica
+    def _load_skills(skill_ids):
+        # One WHERE id IN (...) for every cache miss
+        skills = {skill.id: SkillDTO.from_model(skill) for skill in Skill.query.filter(Skill.id.in_(skill_ids))}
+        return {skill_id: skills.get(skill_id) for skill_id in skill_ids}
 
     @staticmethod
-    @cache_response(timeout=300)  # Cache for 5 minutes
+    @cache_response(timeout=300, tags=['skills'])  # Cache for 5 minutes
+    @read_replica
     def get_all_skills(page=1, per_page=20):
-        return Skill.query.options(joinedload(Skill.user)).paginate(page=page, per_page=per_page, error_out=False)
+        skills_paginated = Skill.query.paginate(page=page, per_page=per_page, error_out=False)
+        return PageDTO.from_pagination(skills_paginated, SkillDTO)
+
+    @staticmethod
+    @cache_response(timeout=300, tags=['skills'])  # Cache for 5 minutes
+    @read_replica
+    def get_skills_after(after_id=0, per_page=20, approximate_total=False):
+        skills, next_cursor = keyset_page(Skill.query, Skill.id, after_id, per_page)
+        total = approximate_count(Skill) if approximate_total else None
+        return CursorPageDTO(tuple(SkillDTO.from_model(skill) for skill in skills), next_cursor, total)
 
     @staticmethod
     def create_skill(data):
         skill = Skill(name=data['name'], proficiency=data['proficiency'], user_id=data['user_id'])
         db.session.add(skill)
+        SkillService._adjust_skill_count(skill.user_id, 1)
         db.session.commit()
-        invalidate_cache(get_cache_key('skills'))
-        return skill
+        invalidate_cache('skills', f'users:{skill.user_id}')
+        return SkillDTO.from_model(skill)
 
     @staticmethod
     def update_skill(skill_id, data):
@@ -29,19 +61,89 @@ class SkillService:
             skill.name = data.get('name', skill.name)
             skill.proficiency = data.get('proficiency', skill.proficiency)
             db.session.commit()
-            invalidate_cache(get_cache_key('skills', skill_id))
-        return skill
+            invalidate_cache('skills', f'skills:{skill_id}', f'users:{skill.user_id}')
+            return SkillDTO.from_model(skill)
+        return None
 
     @staticmethod
     def delete_skill(skill_id):
         skill = Skill.query.get(skill_id)
         if skill:
+            user_id = skill.user_id
             db.session.delete(skill)
+            SkillService._adjust_skill_count(user_id, -1)
             db.session.commit()
-            invalidate_cache(get_cache_key('skills', skill_id))
+            invalidate_cache('skills', f'skills:{skill_id}', f'users:{user_id}')
             return True
         return False
 
     @staticmethod
+    def bulk_create_skills(items):
+        """
+        Inserts all rows with one multi-row INSERT in a single transaction, then invalidates once.
+        Raises ValueError, before writing anything, if a user_id doesn't exist.
+        """
+        rows = [{'name': item['name'], 'proficiency': item['proficiency'], 'user_id': item['user_id']} for item in items]
+        if not rows:
+            return []
+        user_ids = {row['user_id'] for row in rows}
+        unknown = user_ids - set(db.session.execute(select(User.id).where(User.id.in_(user_ids))).scalars())
+        if unknown:
+            raise ValueError(f"Unknown user_id: {', '.join(str(user_id) for user_id in sorted(unknown))}")
+        created = db.session.execute(
+            insert(Skill).values(rows).returning(Skill.id, Skill.name, Skill.proficiency, Skill.user_id, Skill.version, Skill.updated_at)
+        ).all()
+        per_user = Counter(row['user_id'] for row in rows)
+        for user_id, count in per_user.items():
+            SkillService._adjust_skill_count(user_id, count)
+        db.session.commit()
+        invalidate_cache('skills', *(f'users:{user_id}' for user_id in per_user))
+        return sorted((SkillDTO.from_model(row) for row in created), key=lambda skill: skill.id)
+
+    @staticmethod
+    def bulk_update_skills(items):
+        """
+        Updates rows by primary key with one executemany; returns the ids that were updated
+        """
+        changes = {}
+        for item in items:
+            values = {key: item[key] for key in ('name', 'proficiency') if key in item}
+            if values:
+                changes[item['id']] = values
+        if not changes:
+            return []
+        owners = dict(db.session.execute(select(Skill.id, Skill.user_id).where(Skill.id.in_(changes))).all())
+        if owners:
+            # ORM bulk UPDATE by primary key, batched into executemany per set of updated columns
+            db.session.execute(update(Skill), [dict(values, id=skill_id) for skill_id, values in changes.items() if skill_id in owners])
+            db.session.commit()
+            invalidate_cache('skills', *(f'skills:{skill_id}' for skill_id in owners), *(f'users:{user_id}' for user_id in set(owners.values())))
+        return sorted(owners)
+
+    @staticmethod
+    def bulk_delete_skills(skill_ids):
+        """
+        Deletes rows with one DELETE ... WHERE id IN (...); returns the ids that were deleted
+        """
+        if not skill_ids:
+            return []
+        owners = dict(db.session.execute(select(Skill.id, Skill.user_id).where(Skill.id.in_(skill_ids))).all())
+        if owners:
+            db.session.execute(delete(Skill).where(Skill.id.in_(owners)), execution_options={'synchronize_session': False})
+            per_user = Counter(owners.values())
+            for user_id, count in per_user.items():
+                SkillService._adjust_skill_count(user_id, -count)
+            db.session.commit()
+            invalidate_cache('skills', *(f'skills:{skill_id}' for skill_id in owners), *(f'users:{user_id}' for user_id in per_user))
+        return sorted(owners)
+
+    @staticmethod
+    def _adjust_skill_count(user_id, delta):
+        # Incremented in the database within the write's transaction, so concurrent writes don't lose updates
+        db.session.execute(update(User).where(User.id == user_id).values(skill_count=User.skill_count + delta))
+
+    @staticmethod
+    @read_replica
     def get_skills_by_user(user_id, page=1, per_page=20):
-        return Skill.query.filter(Skill.user_id == user_id).paginate(page=page, per_page=per_page, error_out=False)
+        skills_paginated = Skill.query.filter(Skill.user_id == user_id).paginate(page=page, per_page=per_page, error_out=False)
+        return PageDTO.from_pagination(skills_paginated, SkillDTO)
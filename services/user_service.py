@@ -1,55 +1,69 @@
-from app import db, cache
+from app import db
+from config import Config
+from extensions import read_replica, use_replica
 from models import User, Course, Skill
-from sqlalchemy.orm import joinedload, contains_eager
-from utils.helpers import invalidate_cache, get_cache_key
-import json
-from sqlalchemy import text, Index, func
+from services.dto import UserDTO, UserDetailDTO, UserCourseCountDTO, CourseDTO, SkillDTO, PageDTO, CursorPageDTO
+from sqlalchemy.orm import selectinload
+from utils.helpers import cache_response, cache_get_many, invalidate_cache
+from utils.pagination import keyset_page, approximate_count
+from sqlalchemy import text, Index, func, select
 
 class UserService:
+    # Sort keys accepted by iter_users_with_course_count, prefixed with '-' for descending
+    EXPORT_SORT_COLUMNS = {'id': User.id, 'username': User.username, 'course_count': User.course_count}
+    EXPORT_FIELDS = ('id', 'username', 'email', 'course_count')
+
     @staticmethod
-    @cache.memoize(timeout=600)  # Cache for 10 minutes
+    @cache_response(timeout=600, tags=['users:{user_id}'])  # Cache for 10 minutes
+    @read_replica
     def get_user(user_id):
-        user = User.query.options(
-            joinedload(User.courses),
-            joinedload(User.skills)
-        ).get(user_id)
+        user = db.session.get(User, user_id)
         if user:
-            from celery_worker import update_user_stats
-            update_user_stats.delay(user_id)  # Trigger background task
-        return user
+            return UserDTO.from_model(user)
+        return None
+
+    @staticmethod
+    def get_users_by_ids(user_ids):
+        """
+        Users in the order of user_ids, leaving out ids that don't exist; shares get_user's cache entries
+        """
+        found = cache_get_many(UserService.get_user, 'user_id', user_ids, UserService._load_users)
+        return [found[user_id] for user_id in user_ids if found[user_id] is not None]
+
+    @staticmethod
+    @read_replica
+    def _load_users(user_ids):
+        # One WHERE id IN (...) for every cache miss
+        users = {user.id: UserDTO.from_model(user) for user in User.query.filter(User.id.in_(user_ids))}
+        return {user_id: users.get(user_id) for user_id in user_ids}
 
     @staticmethod
-    @cache.memoize(timeout=300)  # Cache for 5 minutes
+    @cache_response(timeout=300, tags=['users'])  # Cache for 5 minutes
+    @read_replica
     def get_all_users(page=1, per_page=20):
-        return User.query.options(
-            joinedload(User.courses),
-            joinedload(User.skills)
-        ).paginate(page=page, per_page=per_page, error_out=False)
+        users_paginated = User.query.paginate(page=page, per_page=per_page, error_out=False)
+        return PageDTO.from_pagination(users_paginated, UserDTO)
 
     @staticmethod
-    def get_user_with_courses_and_skills(user_id):
-        cache_key = f"user:{user_id}:full"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return json.loads(cached_data)
+    @cache_response(timeout=300, tags=['users'])  # Cache for 5 minutes
+    @read_replica
+    def get_users_after(after_id=0, per_page=20, approximate_total=False):
+        users, next_cursor = keyset_page(User.query, User.id, after_id, per_page)
+        total = approximate_count(User) if approximate_total else None
+        return CursorPageDTO(tuple(UserDTO.from_model(user) for user in users), next_cursor, total)
 
+    @staticmethod
+    @cache_response(timeout=600, tags=['users:{user_id}'])  # Cache for 10 minutes
+    @read_replica
+    def get_user_with_courses_and_skills(user_id):
+        # One query per collection (WHERE user_id IN ...) instead of a courses x skills outer join
         user = User.query.options(
-            contains_eager(User.courses),
-            contains_eager(User.skills)
-        ).outerjoin(User.courses).outerjoin(User.skills).filter(User.id == user_id).first()
+            selectinload(User.courses),
+            selectinload(User.skills)
+        ).filter(User.id == user_id).first()
 
         if user:
-            user_data = {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'courses': [{'id': c.id, 'title': c.title} for c in user.courses],
-                'skills': [{'id': s.id, 'name': s.name, 'proficiency': s.proficiency} for s in user.skills]
-            }
-            cache.set(cache_key, json.dumps(user_data), timeout=600)  # Cache for 10 minutes
-            from celery_worker import update_user_stats
-            update_user_stats.delay(user_id)  # Trigger background task
-            return user_data
+            return UserDetailDTO.from_model(user)
         return None
 
     @staticmethod
@@ -58,10 +72,10 @@ class UserService:
         user.set_password(data['password'])
         db.session.add(user)
         db.session.commit()
-        invalidate_cache(get_cache_key('users'))
-        from celery_worker import update_user_stats
-        update_user_stats.delay(user.id)  # Trigger background task
-        return user
+        invalidate_cache('users')
+        from celery_worker import schedule_user_stats
+        schedule_user_stats(user.id)  # Coalesced background stats refresh
+        return UserDTO.from_model(user)
 
     @staticmethod
     def update_user(user_id, data):
@@ -72,10 +86,11 @@ class UserService:
             if 'password' in data:
                 user.set_password(data['password'])
             db.session.commit()
-            invalidate_cache(get_cache_key('users', user_id))
-            from celery_worker import update_user_stats
-            update_user_stats.delay(user_id)  # Trigger background task
-        return user
+            invalidate_cache('users', f'users:{user_id}')
+            from celery_worker import schedule_user_stats
+            schedule_user_stats(user_id)  # Coalesced background stats refresh
+            return UserDTO.from_model(user)
+        return None
 
     @staticmethod
     def delete_user(user_id):
@@ -83,32 +98,58 @@ class UserService:
         if user:
             db.session.delete(user)
             db.session.commit()
-            invalidate_cache(get_cache_key('users', user_id))
+            invalidate_cache('users', f'users:{user_id}')
             return True
         return False
 
     @staticmethod
-    @cache.memoize(timeout=300)  # Cache for 5 minutes
+    @cache_response(timeout=300, tags=['users:{user_id}'])  # Cache for 5 minutes
+    @read_replica
     def get_user_courses(user_id):
-        return Course.query.filter(Course.user_id == user_id).all()
+        return [CourseDTO.from_model(course) for course in Course.query.filter(Course.user_id == user_id)]
 
     @staticmethod
-    @cache.memoize(timeout=300)  # Cache for 5 minutes
+    @cache_response(timeout=300, tags=['users:{user_id}'])  # Cache for 5 minutes
+    @read_replica
     def get_user_skills(user_id):
-        return Skill.query.filter(Skill.user_id == user_id).all()
+        return [SkillDTO.from_model(skill) for skill in Skill.query.filter(Skill.user_id == user_id)]
 
     @staticmethod
-    @cache.memoize(timeout=300)  # Cache for 5 minutes
+    @cache_response(timeout=300, tags=['users', 'courses'], stale_ttl=600)  # Cache for 5 minutes, serve stale while refreshing
+    @read_replica
     def get_users_with_course_count():
+        # Reads the denormalized counter instead of joining and grouping every course
         query = db.session.query(
             User.id,
             User.username,
             User.email,
-            func.count(Course.id).label('course_count')
-        ).outerjoin(Course).group_by(User.id, User.username, User.email)
+            User.course_count
+        )
         
         result = query.all()
-        return [dict(zip(['id', 'username', 'email', 'course_count'], row)) for row in result]
+        return [UserCourseCountDTO(*row) for row in result]
+
+    @staticmethod
+    def iter_users_with_course_count(min_courses=None, max_courses=None, username_prefix=None, sort='id', yield_per=1000):
+        """
+        Yields (id, username, email, course_count) rows, filtered and sorted in
+        the database and fetched `yield_per` at a time through a server-side
+        cursor. Not cached: an export of every user is never held in memory.
+        """
+        column = UserService.EXPORT_SORT_COLUMNS[sort.lstrip('-')]
+        query = select(User.id, User.username, User.email, User.course_count)
+        if min_courses is not None:
+            query = query.where(User.course_count >= min_courses)
+        if max_courses is not None:
+            query = query.where(User.course_count <= max_courses)
+        if username_prefix:
+            query = query.where(User.username.startswith(username_prefix, autoescape=True))
+        query = query.order_by(column.desc() if sort.startswith('-') else column.asc())
+        if column is not User.id:
+            query = query.order_by(User.id)  # Stable order among equal sort values
+        with use_replica():
+            for partition in db.session.execute(query.execution_options(yield_per=yield_per)).partitions():
+                yield from partition
 
     @staticmethod
     def ensure_indexes():
@@ -124,5 +165,29 @@ class UserService:
 
     @staticmethod
     def generate_user_report(user_id):
-        from celery_worker import generate_user_report
-        return generate_user_report.delay(user_id)
+        from app import redis_client
+        from celery_worker import generate_user_report, REPORT_TASK_KEY
+        task = generate_user_report.delay(user_id)
+        # Lets get_user_report tell this task from an unknown id until the report expires
+        redis_client.set(REPORT_TASK_KEY.format(task.id), user_id, ex=Config.REPORT_TTL_SECONDS)
+        return task
+
+    @staticmethod
+    @read_replica
+    def get_user_report(user_id, task_id):
+        """
+        Returns (state, handle); handle is only set once the report for this user is in storage.
+        State is NOT_FOUND for task ids that weren't started for this user or whose report expired.
+        """
+        from app import redis_client
+        from celery_worker import celery, REPORT_TASK_KEY
+        owner = redis_client.get(REPORT_TASK_KEY.format(task_id))
+        if owner is None or int(owner) != user_id:
+            return 'NOT_FOUND', None
+        result = celery.AsyncResult(task_id)
+        if not result.successful():
+            return result.state, None
+        report = result.result
+        if not report or report.get('user_id') != user_id:
+            return 'NOT_FOUND', None
+        return result.state, report['handle']
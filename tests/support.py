@@ -0,0 +1,69 @@
+"""
+Shared setup for the tests: the app on a throwaway SQLite database, with
+Redis served in process by fakeredis and Celery tasks run eagerly.
+
+Import this before anything from the app: the configuration is read from
+the environment when config is first imported.
+"""
+import os
+import tempfile
+import unittest
+
+try:
+    import fakeredis
+except ImportError:  # Test dependency, see the test extra in pyproject.toml
+    raise unittest.SkipTest("fakeredis is required to run the tests")
+
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(prefix='upskill-tests-'), 'test.db')
+REDIS_URL = 'redis://localhost:6379/15'
+
+os.environ['DATABASE_URL'] = f'sqlite:///{DATABASE_PATH}'
+os.environ['REDIS_URL'] = REDIS_URL
+
+from config import Config
+from utils import redis_pool
+
+# Every client in the process goes through the shared pool for REDIS_URL, so seeding it is enough
+redis_pool._pools[(REDIS_URL, ())] = redis_pool.InstrumentedConnectionPool(
+    connection_class=fakeredis.FakeConnection,
+    server=fakeredis.FakeServer(),
+    max_connections=Config.REDIS_POOL_MAX_CONNECTIONS,
+    timeout=Config.REDIS_POOL_TIMEOUT,
+)
+
+from app import app, redis_client
+from celery_worker import celery, STATS_FLUSH_KEY
+from extensions import db
+from utils.near_cache import near_cache
+
+app.config['TESTING'] = True
+app.config['WTF_CSRF_ENABLED'] = False
+celery.conf.task_always_eager = True
+
+
+class AppTestCase(unittest.TestCase):
+    """
+    A fresh schema, Redis and near cache per test. Seed data inside
+    `with app.app_context():` and leave it before making requests, so every
+    request gets its own session as it does when served.
+    """
+
+    def setUp(self):
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+        redis_client.flushdb()
+        near_cache.clear()
+        # Marks the stats batch as already scheduled, so user writes don't run it inline (eager Celery)
+        redis_client.set(STATS_FLUSH_KEY, 1)
+        self.client = app.test_client()
+
+    def get(self, url, **kwargs):
+        # Talisman redirects plain HTTP
+        return self.client.get(url, base_url='https://localhost', **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.client.post(url, base_url='https://localhost', **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.client.put(url, base_url='https://localhost', **kwargs)
@@ -0,0 +1,57 @@
+import unittest
+from support import AppTestCase, app, db, redis_client
+from models import User, Skill, SkillRollup
+from celery_worker import SKILL_ROLLUP_LOCK_KEY, refresh_skill_rollups
+
+
+class SkillRollupTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        with app.app_context():
+            users = [User(username=f'learner{i}', email=f'learner{i}@example.com') for i in range(5)]
+            db.session.add_all(users)
+            db.session.flush()
+            for user, proficiency in zip(users, (1, 3, 3, 5, 5)):
+                db.session.add(Skill(name='Python' if user.id % 2 else 'python', proficiency=proficiency, user_id=user.id))
+            for user, proficiency in zip(users, (4, 2)):
+                db.session.add(Skill(name='SQL', proficiency=proficiency, user_id=user.id))
+            db.session.commit()
+
+    def test_rollup_contents(self):
+        refresh_skill_rollups.delay()
+        with app.app_context():
+            rollups = {rollup.name: rollup for rollup in SkillRollup.query}
+            self.assertEqual(set(rollups), {'python', 'sql'})
+            python = rollups['python']
+            self.assertEqual((python.user_count, python.min_proficiency, python.max_proficiency), (5, 1, 5))
+            self.assertAlmostEqual(python.avg_proficiency, 3.4)
+            self.assertEqual((python.median_proficiency, python.p90_proficiency), (3, 5))
+            self.assertEqual((rollups['sql'].median_proficiency, rollups['sql'].p90_proficiency), (2, 4))
+
+    def test_endpoints(self):
+        self.assertEqual(self.get('/api/analytics/skills/top').get_json(), {'skills': [], 'refreshed_at': None})
+        refresh_skill_rollups.delay()
+        top = self.get('/api/analytics/skills/top?min_users=2').get_json()
+        self.assertEqual([skill['name'] for skill in top['skills']], ['python', 'sql'])
+        self.assertIsNotNone(top['refreshed_at'])
+
+        distribution = self.get('/api/analytics/skills/PYTHON/distribution').get_json()
+        self.assertEqual(distribution['distribution'], [
+            {'proficiency': 1, 'user_count': 1}, {'proficiency': 3, 'user_count': 2}, {'proficiency': 5, 'user_count': 2},
+        ])
+        self.assertEqual(self.get('/api/analytics/skills/rust/distribution').status_code, 404)
+
+    def test_concurrent_refresh_is_skipped(self):
+        redis_client.set(SKILL_ROLLUP_LOCK_KEY, 'another-worker')
+        self.assertIn('already', refresh_skill_rollups.delay().get())
+        with app.app_context():
+            self.assertEqual(SkillRollup.query.count(), 0)
+        redis_client.delete(SKILL_ROLLUP_LOCK_KEY)
+        refresh_skill_rollups.delay()
+        self.assertFalse(redis_client.exists(SKILL_ROLLUP_LOCK_KEY))
+        with app.app_context():
+            self.assertEqual(SkillRollup.query.count(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import re
+import time
+import unittest
+from support import AppTestCase, DATABASE_PATH, REDIS_URL, app, db, redis_client
+from models import User, Course
+from services.course_service import CourseService
+from utils import redis_pool, serialization
+from utils.metrics import endpoint_metrics
+from utils.near_cache import near_cache
+
+try:
+    import asgi
+    from fakeredis.aioredis import FakeConnection
+    from redis.asyncio import ConnectionPool
+    from starlette.datastructures import Headers
+    from utils.async_io import AsyncBackends
+    from utils.metrics import InstrumentedAsyncRedis
+except ImportError:  # The async extra, see pyproject.toml
+    asgi = None
+
+
+def requests_total(endpoint, status):
+    match = re.search(rf'upskill_requests_total{{endpoint="{endpoint}",method="GET",status="{status}"}} (\d+)', endpoint_metrics.render())
+    return int(match.group(1)) if match else 0
+
+
+@unittest.skipIf(asgi is None, "the async extra is required for the ASGI tests")
+class AsgiReadPathTest(AppTestCase, unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        super().setUp()
+        with app.app_context():
+            user = User(username='learner', email='learner@example.com')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Course(title="Course", description="About", user_id=user.id))
+            db.session.commit()
+
+    async def asyncSetUp(self):
+        asgi.backends = AsyncBackends(database_url=f'sqlite:///{DATABASE_PATH}', redis_url=REDIS_URL)
+        # Same in-process server as the Flask side, see support.py
+        server = redis_pool._pools[(REDIS_URL, ())].connection_kwargs['server']
+        await asgi.backends.redis.aclose()
+        asgi.backends.redis = InstrumentedAsyncRedis(connection_pool=ConnectionPool(connection_class=FakeConnection, server=server))
+
+    async def asyncTearDown(self):
+        await asgi.backends.close()
+
+    async def request(self, path, scheme='https', headers=()):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': scheme, 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'localhost'), *headers], 'client': ('127.0.0.1', 50000), 'server': ('localhost', 443),
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await asgi.app(scope, receive, send)
+        return messages[0]['status'], Headers(raw=messages[0]['headers'])
+
+    async def test_sends_the_flask_security_headers(self):
+        flask_headers = self.get('/api/courses/1').headers
+        status, headers = await self.request('/api/courses/1')
+        self.assertEqual(status, 200)
+        for name in ('Strict-Transport-Security', 'Content-Security-Policy', 'Referrer-Policy', 'Permissions-Policy',
+                     'X-Frame-Options', 'X-Content-Type-Options'):
+            self.assertEqual(headers[name], flask_headers[name])
+
+    async def test_redirects_plain_http(self):
+        status, headers = await self.request('/api/courses/1', scheme='http')
+        self.assertEqual(status, 302)
+        self.assertEqual(headers['Location'], 'https://localhost/api/courses/1')
+        self.assertNotIn('Strict-Transport-Security', headers)
+
+        status, headers = await self.request('/api/courses/1', scheme='http', headers=[(b'x-forwarded-proto', b'https')])
+        self.assertEqual(status, 200)
+        self.assertIn('Strict-Transport-Security', headers)
+
+    async def test_records_endpoint_metrics(self):
+        before = requests_total('courseresource', 200)
+        status, headers = await self.request('/api/courses/1')
+        self.assertEqual(status, 200)
+        self.assertEqual(requests_total('courseresource', 200), before + 1)
+        self.assertIn('desc="1 queries"', headers['Server-Timing'])
+        self.assertNotIn('desc="0 commands"', headers['Server-Timing'])
+
+    async def test_early_refresh_follows_the_cache_response_lock(self):
+        self.get('/api/courses/1')
+        cache_key = CourseService.get_course.make_key(CourseService.get_course.bind_arguments(course_id=1))
+        # Slow to compute and about to expire, so the next read refreshes it early
+        envelope = serialization.loads(redis_client.get(cache_key))
+        redis_client.set(cache_key, serialization.dumps(dict(envelope, d=1000, x=time.time() + 5)))
+        with app.app_context():
+            db.session.execute(db.update(Course).values(title="Renamed"))
+            db.session.commit()
+
+        # A Flask worker holds the entry's lock: the cached value is served, not recomputed
+        redis_client.set(f"lock:{cache_key}", 'flask-worker')
+        near_cache.clear()
+        await self.request('/api/courses/1')
+        self.assertEqual(serialization.loads(redis_client.get(cache_key))['v'].title, "Course")
+
+        redis_client.delete(f"lock:{cache_key}")
+        near_cache.clear()
+        await self.request('/api/courses/1')
+        self.assertEqual(serialization.loads(redis_client.get(cache_key))['v'].title, "Renamed")
+        self.assertFalse(redis_client.exists(f"lock:{cache_key}"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from support import AppTestCase, app, db
+from models import User, Course
+
+
+class CourseBulkTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        with app.app_context():
+            user = User(username='learner', email='learner@example.com')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Course(title="Course", description="About", user_id=user.id))
+            db.session.commit()
+            self.user_id = user.id
+
+    def test_create(self):
+        response = self.post('/api/courses/bulk', json={'courses': [
+            {'title': f"Course {i}", 'description': "About", 'user_id': self.user_id} for i in range(3)
+        ]})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.get_json()['courses']), 3)
+        with app.app_context():
+            self.assertEqual(db.session.get(User, self.user_id).course_count, 3)
+
+    def test_create_rejects_unknown_user(self):
+        response = self.post('/api/courses/bulk', json={'courses': [
+            {'title': "Course", 'description': "About", 'user_id': self.user_id},
+            {'title': "Course", 'description': "About", 'user_id': 999},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('999', response.get_json()['message'])
+        with app.app_context():
+            self.assertEqual(Course.query.count(), 1)
+
+    def test_update_rejects_non_integer_ids(self):
+        for course_id in ('1', [1], 1.0, True, None):
+            response = self.put('/api/courses/bulk', json={'courses': [{'id': course_id, 'title': "Renamed"}]})
+            self.assertEqual(response.status_code, 400, course_id)
+
+    def test_update(self):
+        response = self.put('/api/courses/bulk', json={'courses': [{'id': 1, 'title': "Renamed"}, {'id': 99, 'title': "Gone"}]})
+        self.assertEqual(response.get_json(), {'updated': [1]})
+        self.assertEqual(self.get('/api/courses/1').get_json()['title'], "Renamed")
+
+    def test_delete_rejects_non_integer_ids(self):
+        response = self.client.delete('/api/courses/bulk', json={'ids': ['1']}, base_url='https://localhost')
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+from support import AppTestCase, app, db
+from models import User, Course
+
+
+class ConditionalGetTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        with app.app_context():
+            user = User(username='learner', email='learner@example.com')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add_all(Course(title=f"Course {i}", description="About", user_id=user.id) for i in range(3))
+            db.session.commit()
+
+    def test_detail_revalidates_with_etag_and_last_modified(self):
+        response = self.get('/api/courses/1')
+        self.assertIn('Last-Modified', response.headers)
+        self.assertEqual(self.get('/api/courses/1', headers={'If-None-Match': response.headers['ETag']}).status_code, 304)
+        self.assertEqual(self.get('/api/courses/1', headers={'If-Modified-Since': response.headers['Last-Modified']}).status_code, 304)
+
+    def test_list_revalidates_with_etag_only(self):
+        response = self.get('/api/courses')
+        self.assertNotIn('Last-Modified', response.headers)
+        self.assertEqual(self.get('/api/courses', headers={'If-None-Match': response.headers['ETag']}).status_code, 304)
+
+    def test_list_etag_changes_when_a_row_is_deleted(self):
+        etag = self.get('/api/courses').headers['ETag']
+        self.client.delete('/api/courses/3', base_url='https://localhost')
+        response = self.get('/api/courses', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['total'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
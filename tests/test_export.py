@@ -0,0 +1,34 @@
+import gzip
+import json
+import unittest
+from support import AppTestCase, app, db
+from models import User
+
+
+class UsersExportTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        with app.app_context():
+            db.session.add_all(User(username=f"user{i}", email=f"user{i}@example.com", course_count=i) for i in range(3))
+            db.session.commit()
+
+    def test_csv(self):
+        response = self.get('/api/users/course_count/export?format=csv&sort=-course_count')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(lines[0], 'id,username,email,course_count')
+        self.assertEqual([line.split(',')[3] for line in lines[1:]], ['2', '1', '0'])
+
+    def test_csv_without_matches_has_a_header(self):
+        response = self.get('/api/users/course_count/export?format=csv&min_courses=99')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(as_text=True), 'id,username,email,course_count\r\n')
+
+    def test_ndjson_gzipped(self):
+        response = self.get('/api/users/course_count/export?min_courses=1', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        rows = [json.loads(line) for line in gzip.decompress(response.get_data()).splitlines()]
+        self.assertEqual([row['username'] for row in rows], ['user1', 'user2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
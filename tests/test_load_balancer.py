@@ -0,0 +1,63 @@
+import json
+import time
+import unittest
+from support import AppTestCase, redis_client
+from utils.load_balancer import LoadBalancer
+
+
+class LoadBalancerTest(AppTestCase):
+    def consumer(self, name, **options):
+        options = {'claim_idle_ms': 50, 'max_deliveries': 5, **options}
+        load_balancer = LoadBalancer(queue_name='test_queue', consumer=name, **options)
+        load_balancer.ensure_group()
+        return load_balancer
+
+    def read(self, load_balancer, count):
+        response = redis_client.xreadgroup(load_balancer.group, load_balancer.consumer, {load_balancer.queue_name: '>'}, count=count)
+        return [message_id for message_id, _ in response[0][1]]
+
+    def claimed_ids(self, messages):
+        return [message_id for message_id, _ in messages]
+
+    def test_claims_stale_messages_of_another_consumer(self):
+        dead, alive = self.consumer('dead'), self.consumer('alive')
+        ids = [dead.enqueue_task({'n': n}) for n in range(2)]
+        self.assertEqual(self.read(dead, 2), ids)
+        self.assertEqual(alive._claim_stale(10), [])
+        time.sleep(0.06)
+        self.assertEqual(self.claimed_ids(alive._claim_stale(10)), ids)
+        self.assertEqual(alive.stats()['claimed'], 2)
+
+    def test_dead_letters_by_delivery_count_of_the_claimed_messages(self):
+        dead, alive = self.consumer('dead'), self.consumer('alive', max_deliveries=1)
+        first, own, last = (dead.enqueue_task({'n': n}) for n in range(3))
+        self.read(dead, 3)
+        time.sleep(0.06)
+        # alive's own fresh pending message lies between the two it claims
+        redis_client.xclaim('test_queue', 'workers', 'alive', 0, [own])
+        self.assertEqual(alive._claim_stale(10), [])
+        dead_letters = redis_client.xrange('test_queue:dead')
+        self.assertEqual([fields[b'source_id'] for _, fields in dead_letters], [first, last])
+        self.assertEqual(json.loads(dead_letters[0][1][b'task']), {'n': 0})
+
+    def test_claims_follow_the_xautoclaim_cursor(self):
+        dead, alive = self.consumer('dead'), self.consumer('alive')
+        ids = [dead.enqueue_task({'n': n}) for n in range(3)]
+        self.read(dead, 3)
+        time.sleep(0.06)
+        # Each call resumes after the last claimed message, and starts over at the end of the pending list
+        for message_id, cursor in zip(ids, ids[1:] + [b'0-0']):
+            self.assertEqual(self.claimed_ids(alive._claim_stale(1)), [message_id])
+            self.assertEqual(alive._claim_cursor, cursor)
+
+    def test_moves_the_legacy_list_onto_the_stream(self):
+        redis_client.rpush('test_queue', json.dumps({'n': 0}), json.dumps({'n': 1}))
+        load_balancer = self.consumer('alive')
+        self.assertEqual(redis_client.type('test_queue'), b'stream')
+        load_balancer.enqueue_task({'n': 2})
+        tasks = [json.loads(fields[b'task']) for _, fields in redis_client.xrange('test_queue')]
+        self.assertEqual(tasks, [{'n': 0}, {'n': 1}, {'n': 2}])
+
+
+if __name__ == '__main__':
+    unittest.main()
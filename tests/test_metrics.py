@@ -0,0 +1,28 @@
+import unittest
+from unittest import mock
+from support import AppTestCase, app
+
+
+class MetricsAccessTest(AppTestCase):
+    def scrape(self, remote_addr, **kwargs):
+        return self.client.get('/metrics', environ_base={'REMOTE_ADDR': remote_addr}, **kwargs)
+
+    def test_allowed_networks(self):
+        self.assertEqual(self.scrape('127.0.0.1').status_code, 200)
+        self.assertEqual(self.scrape('203.0.113.5').status_code, 403)
+        with mock.patch.dict(app.config, METRICS_ALLOWED_NETWORKS=['10.0.0.0/8']):
+            self.assertEqual(self.scrape('10.1.2.3').status_code, 200)
+            self.assertEqual(self.scrape('127.0.0.1').status_code, 403)
+
+    def test_token(self):
+        headers = {'Authorization': 'Bearer scrape-secret'}
+        self.assertEqual(self.scrape('203.0.113.5', headers=headers).status_code, 403)
+        with mock.patch.dict(app.config, METRICS_TOKEN='scrape-secret'):
+            response = self.scrape('203.0.113.5', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(b'upskill_requests_total', response.data)
+            self.assertEqual(self.scrape('203.0.113.5', headers={'Authorization': 'Bearer wrong'}).status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
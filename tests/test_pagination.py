@@ -0,0 +1,49 @@
+import unittest
+from support import AppTestCase, app, db
+from models import User, Course
+from utils.pagination import MAX_ID, MAX_OFFSET, clamp_page_args, decode_ids
+
+
+class ClampPageArgsTest(unittest.TestCase):
+    def test_bounds(self):
+        self.assertEqual(clamp_page_args(1, 0, 100), (1, 1))
+        self.assertEqual(clamp_page_args(-5, 500, 100), (1, 100))
+        page, per_page = clamp_page_args(10 ** 20, 20, 100)
+        self.assertLessEqual((page - 1) * per_page, MAX_OFFSET)
+
+
+class DecodeIdsTest(unittest.TestCase):
+    def test_ids_in_range(self):
+        self.assertEqual(decode_ids(f'3,1,3,{MAX_ID}', 10), [3, 1, MAX_ID])
+        for value in ('0', '-1', '1,-2', str(MAX_ID + 1), '99999999999999999999'):
+            with self.assertRaises(ValueError, msg=value):
+                decode_ids(value, 10)
+
+
+class ListPaginationTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        with app.app_context():
+            user = User(username='learner', email='learner@example.com')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add_all(Course(title=f"Course {i}", description="About", user_id=user.id) for i in range(5))
+            db.session.commit()
+
+    def test_keyset_page_with_zero_per_page(self):
+        response = self.get('/api/courses?after_id=0&per_page=0')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['courses']), 1)
+        self.assertIsNotNone(response.get_json()['next_cursor'])
+
+    def test_out_of_range_arguments(self):
+        for query in ('page=100000000000000000000', 'per_page=-1', 'after_id=100000000000000000000'):
+            self.assertEqual(self.get(f'/api/courses?{query}').status_code, 200, query)
+
+    def test_out_of_range_ids(self):
+        for ids in ('99999999999999999999', '-1', '1,0'):
+            self.assertEqual(self.get(f'/api/courses?ids={ids}').status_code, 400, ids)
+
+
+if __name__ == '__main__':
+    unittest.main()
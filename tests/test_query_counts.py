@@ -0,0 +1,103 @@
+"""
+Statements and rows each read endpoint costs on a cache miss, counted at the
+cursor. Rows are those the database returns, so a join that fans out a
+user's collections into a cartesian product shows up here even though the
+ORM folds it back into the same objects.
+"""
+import unittest
+from contextlib import contextmanager
+from sqlalchemy import event
+from support import AppTestCase, app, db
+from models import User, Course, Skill
+
+COURSES = 100
+SKILLS = 100
+
+
+@contextmanager
+def count_queries():
+    """
+    Collects (statement, rows returned) for every statement executed in the block
+    """
+    with app.app_context():
+        engine = db.engine
+    executed = []
+
+    def after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        rows = None
+        if statement.lstrip().upper().startswith('SELECT'):
+            # Counted on a separate cursor so the application's result is left untouched
+            counter = connection.connection.dbapi_connection.cursor()
+            rows = counter.execute(f"SELECT count(*) FROM ({statement})", parameters).fetchone()[0]
+            counter.close()
+        executed.append((statement, rows))
+
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    try:
+        yield executed
+    finally:
+        event.remove(engine, 'after_cursor_execute', after_cursor_execute)
+
+
+class QueryCountTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        with app.app_context():
+            user = User(username='learner', email='learner@example.com')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add_all(Course(title=f"Course {i}", description="About", user_id=user.id) for i in range(COURSES))
+            db.session.add_all(Skill(name=f"Skill {i}", proficiency=i % 5 + 1, user_id=user.id) for i in range(SKILLS))
+            db.session.commit()
+            self.user_id = user.id
+
+    def assertCost(self, url, statements, rows):
+        with count_queries() as executed:
+            response = self.get(url)
+        self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+        self.assertEqual(len(executed), statements, [statement for statement, _ in executed])
+        self.assertEqual(sum(count or 0 for _, count in executed), rows)
+        return response
+
+    def test_user_detail_loads_each_collection_once(self):
+        # The user, then one IN query per collection: 1 + 100 + 100 rows, not 100 x 100
+        response = self.assertCost(f'/api/users/{self.user_id}', statements=3, rows=1 + COURSES + SKILLS)
+        self.assertEqual(len(response.get_json()['courses']), COURSES)
+        self.assertEqual(len(response.get_json()['skills']), SKILLS)
+
+    def test_user_detail_is_served_from_cache(self):
+        self.get(f'/api/users/{self.user_id}')
+        self.assertCost(f'/api/users/{self.user_id}', statements=0, rows=0)
+
+    def test_user_list(self):
+        # The page and its COUNT(*); collections are not loaded for the list
+        self.assertCost('/api/users', statements=2, rows=2)
+
+    def test_user_courses(self):
+        self.assertCost(f'/api/users/{self.user_id}/courses', statements=1, rows=COURSES)
+
+    def test_user_skills(self):
+        self.assertCost(f'/api/users/{self.user_id}/skills', statements=1, rows=SKILLS)
+
+    def test_course_list(self):
+        self.assertCost('/api/courses?per_page=20', statements=2, rows=20 + 1)
+
+    def test_course_keyset_page(self):
+        # One row past the page tells whether there is a next one; no COUNT(*)
+        self.assertCost('/api/courses?after_id=0&per_page=20', statements=1, rows=20 + 1)
+
+    def test_course_detail(self):
+        self.assertCost('/api/courses/1', statements=1, rows=1)
+
+    def test_skill_list(self):
+        self.assertCost('/api/skills?per_page=20', statements=2, rows=20 + 1)
+
+    def test_skill_keyset_page(self):
+        self.assertCost('/api/skills?after_id=0&per_page=20', statements=1, rows=20 + 1)
+
+    def test_skill_detail(self):
+        self.assertCost('/api/skills/1', statements=1, rows=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
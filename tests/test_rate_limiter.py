@@ -0,0 +1,40 @@
+import unittest
+from unittest import mock
+from support import AppTestCase
+from utils.rate_limiter_init import rate_limiter
+
+
+class RateLimiterTest(AppTestCase):
+    def test_default_strategy_is_the_sliding_log(self):
+        self.assertEqual(rate_limiter.default_strategy, 'moving-window')
+
+    def test_counts_requests(self):
+        first = self.get('/api/courses')
+        second = self.get('/api/courses')
+        self.assertEqual(first.headers['X-RateLimit-Limit'], '30')
+        self.assertEqual(int(first.headers['X-RateLimit-Remaining']) - 1, int(second.headers['X-RateLimit-Remaining']))
+
+    def test_scale_raises_or_disables_the_limits(self):
+        self.addCleanup(rate_limiter.set_scale, 1)
+        rate_limiter.set_scale(100)
+        response = self.get('/api/courses')
+        self.assertEqual(response.headers['X-RateLimit-Limit'], '3000')
+        self.assertEqual(response.headers['X-Global-RateLimit-Limit'], '100000')
+        rate_limiter.set_scale(0)
+        responses = [self.get('/api/users/1/courses') for _ in range(20)]
+        self.assertEqual({response.status_code for response in responses}, {200})
+        self.assertNotIn('X-RateLimit-Limit', responses[0].headers)
+
+    def test_unknown_strategy_is_rejected_when_decorating(self):
+        with self.assertRaises(ValueError):
+            rate_limiter.limit('test', limit=1, period=60, strategy='nope')
+
+    def test_errors_are_json(self):
+        with mock.patch.object(rate_limiter, '_redis_rate_limit', side_effect=RuntimeError("down")):
+            response = self.get('/api/courses')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json(), {'error': 'Internal server error'})
+
+
+if __name__ == '__main__':
+    unittest.main()
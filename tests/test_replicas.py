@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine, select, update
+from support import AppTestCase, app, db, redis_client
+from extensions import replica_router, use_primary, use_replica
+from models import User, Course
+from utils.helpers import get_written_key
+from utils.metrics import InstrumentedQueuePool
+from utils.near_cache import near_cache
+
+
+class ReplicaRoutingTest(AppTestCase):
+    """
+    A second SQLite database stands in for the replica. Its rows differ from
+    the primary's, so each read shows which database served it.
+    """
+
+    def setUp(self):
+        super().setUp()
+        path = os.path.join(tempfile.mkdtemp(prefix='upskill-replica-'), 'replica.db')
+        self.replica = create_engine(f'sqlite:///{path}', poolclass=InstrumentedQueuePool)
+        self.addCleanup(self.replica.dispose)
+        db.metadata.create_all(self.replica)
+        for patch in (mock.patch.object(replica_router, 'engines', [self.replica]),
+                      mock.patch.object(replica_router, '_healthy', [self.replica])):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        with app.app_context():
+            for bind, title in ((db.engine, "On the primary"), (self.replica, "On the replica")):
+                with bind.begin() as connection:
+                    connection.execute(User.__table__.insert().values(id=1, username='learner', email='learner@example.com', password_hash='x'))
+                    connection.execute(Course.__table__.insert().values(id=1, title=title, description="About", user_id=1))
+
+    def primary_title(self):
+        with app.app_context(), db.engine.connect() as connection:
+            return connection.execute(select(Course.title).where(Course.id == 1)).scalar()
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.get('/api/courses/1').get_json()['title'], "On the replica")
+
+    def test_writes_go_to_the_primary(self):
+        response = self.put('/api/courses/1', json={'title': "Renamed"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.primary_title(), "Renamed")
+        with self.replica.connect() as connection:
+            self.assertEqual(connection.execute(select(Course.title)).scalar(), "On the replica")
+
+    def test_session_reads_its_own_writes(self):
+        with app.app_context(), use_replica():
+            self.assertEqual(db.session.get(Course, 1).title, "On the replica")
+            db.session.execute(update(Course).where(Course.id == 1).values(title="Renamed"))
+            db.session.expire_all()
+            self.assertEqual(db.session.get(Course, 1).title, "Renamed")
+            db.session.rollback()
+
+    def test_use_primary_bypasses_the_replica(self):
+        with app.app_context(), use_replica(), use_primary():
+            self.assertEqual(db.session.get(Course, 1).title, "On the primary")
+
+    def test_recently_written_tags_are_recomputed_on_the_primary(self):
+        self.assertEqual(self.get('/api/courses/1').get_json()['title'], "On the replica")
+        self.put('/api/courses/1', json={'title': "Renamed"})
+        self.assertTrue(redis_client.exists(get_written_key('courses:1')))
+        # The replica hasn't replayed the write yet; the entry is recomputed from the primary anyway
+        self.assertEqual(self.get('/api/courses/1').get_json()['title'], "Renamed")
+
+        # Once the pin expires, misses are read from the replica again
+        redis_client.flushdb()
+        near_cache.clear()
+        self.assertEqual(self.get('/api/courses/1').get_json()['title'], "On the replica")
+
+
+if __name__ == '__main__':
+    unittest.main()
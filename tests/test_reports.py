@@ -0,0 +1,83 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from support import AppTestCase, app, db, redis_client
+from models import User
+from celery_worker import expire_user_reports
+from config import Config
+from utils.report_storage import LocalReportStorage, RedisReportStorage, create_report_storage, report_storage
+
+
+class UserReportTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        with app.app_context():
+            db.session.add_all([User(username='learner', email='learner@example.com'),
+                                User(username='other', email='other@example.com')])
+            db.session.commit()
+
+    def test_unknown_task_id_is_not_found(self):
+        self.assertEqual(self.get('/api/users/1/reports/unknown').status_code, 404)
+
+    def test_task_id_of_another_user_is_not_found(self):
+        task_id = self.post('/api/users/1/reports').get_json()['task_id']
+        self.assertNotEqual(self.get(f'/api/users/1/reports/{task_id}').status_code, 404)
+        self.assertEqual(self.get(f'/api/users/2/reports/{task_id}').status_code, 404)
+
+    def test_expired_local_reports_are_deleted(self):
+        storage = LocalReportStorage(tempfile.mkdtemp(prefix='upskill-reports-'))
+        old, new = storage.new_handle('user-1'), storage.new_handle('user-1')
+        for handle in (old, new):
+            with storage.writer(handle) as report:
+                report.write("User Report\n")
+        expired = time.time() - app.config['REPORT_TTL_SECONDS'] - 60
+        os.utime(os.path.join(storage.root, old), (expired, expired))
+
+        with mock.patch('utils.report_storage.report_storage', storage):
+            expire_user_reports.delay()
+        self.assertFalse(storage.exists(old))
+        self.assertTrue(storage.exists(new))
+
+
+class ReportStorageTest(AppTestCase):
+    def test_redis_is_the_default(self):
+        self.assertIsInstance(report_storage, RedisReportStorage)
+
+    def test_local_storage_needs_a_configured_directory(self):
+        with mock.patch.multiple(Config, REPORT_STORAGE='local', REPORT_STORAGE_DIR=None):
+            with self.assertRaises(ValueError):
+                create_report_storage(Config)
+
+    def test_redis_round_trip(self):
+        storage = RedisReportStorage(redis_client, ttl=60)
+        handle = storage.new_handle('user-1')
+        lines = [f"- Course {i}: {'x' * 2000}\n" for i in range(100)]
+        with storage.writer(handle) as report:
+            for line in lines:
+                report.write(line)
+        self.assertTrue(storage.exists(handle))
+        self.assertEqual(storage.size(handle), len(''.join(lines)))
+        chunks = list(storage.iter_chunks(handle))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= storage.CHUNK_SIZE for chunk in chunks))
+        self.assertEqual(b''.join(chunks).decode(), ''.join(lines))
+        self.assertLessEqual(redis_client.ttl(f"report:{handle}"), 60)
+
+        storage.delete(handle)
+        self.assertFalse(storage.exists(handle))
+
+    def test_redis_partial_report_is_not_visible(self):
+        storage = RedisReportStorage(redis_client, ttl=60)
+        handle = storage.new_handle('user-1')
+        with self.assertRaises(RuntimeError):
+            with storage.writer(handle) as report:
+                report.write("User Report\n" * 10000)
+                raise RuntimeError("worker died")
+        self.assertFalse(storage.exists(handle))
+        self.assertEqual(redis_client.keys('report:*'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
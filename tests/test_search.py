@@ -0,0 +1,104 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+from support import AppTestCase, app, db
+from config import Config
+from models import User, Course, Skill
+from services.search_service import SEARCH_TARGETS
+from utils import search
+from utils.search import InvertedIndex
+
+NOW = datetime(2026, 1, 1)
+
+
+def course_rows(*rows):
+    # (id, updated_at, title, description), as InvertedIndexSearch selects them
+    return [(row_id, NOW + timedelta(seconds=row_id), title, description) for row_id, title, description in rows]
+
+
+class InvertedIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = InvertedIndex(SEARCH_TARGETS['courses'], course_rows(
+            (1, "Python basics", "Variables and loops"),
+            (2, "Advanced Python", "Python decorators, generators and Python internals"),
+            (3, "Cooking", "Knife skills, with a python-free kitchen"),
+            (4, "Rust", "Ownership"),
+        ))
+
+    def test_all_terms_must_match(self):
+        hits, truncated = self.index.search("python decorators", 10, 100)
+        self.assertEqual([row_id for row_id, _ in hits], [2])
+        self.assertFalse(truncated)
+
+    def test_title_matches_rank_above_description_matches(self):
+        hits, _ = self.index.search("python", 10, 100)
+        self.assertEqual([row_id for row_id, _ in hits][-1], 3)
+
+    def test_no_match(self):
+        self.assertEqual(self.index.search("haskell", 10, 100), ([], False))
+        self.assertEqual(self.index.search("!!", 10, 100), ([], False))
+
+    def test_candidates_are_the_most_recent_matches(self):
+        hits, truncated = self.index.search("python", 10, 2)
+        self.assertTrue(truncated)
+        self.assertEqual(sorted(row_id for row_id, _ in hits), [2, 3])
+
+    def test_prefix(self):
+        hits, truncated = self.index.prefix("PY", 10, 100)
+        self.assertEqual([row_id for row_id, _ in hits], [1])
+        self.assertFalse(truncated)
+        self.assertEqual(self.index.prefix("zz", 10, 100), ([], False))
+
+    def test_prefix_candidates_are_the_shortest_names(self):
+        index = InvertedIndex(SEARCH_TARGETS['courses'], course_rows(
+            (1, "Python for data science", ""), (2, "Python", ""), (3, "Python web", ""),
+        ))
+        hits, truncated = index.prefix("python", 10, 2)
+        self.assertTrue(truncated)
+        self.assertEqual([row_id for row_id, _ in hits], [2, 3])
+
+
+class SearchEndpointTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        search._backends.clear()  # Per-process indexes of the previous test's tables
+        with app.app_context():
+            user = User(username='learner', email='learner@example.com')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add_all(Course(title=f"Python {i}", description="Scripting", user_id=user.id) for i in range(25))
+            db.session.add(Skill(name="Python", proficiency=4, user_id=user.id))
+            db.session.commit()
+
+    def test_pages_across_types(self):
+        first = self.get('/api/search?q=python&per_page=20').get_json()
+        second = self.get('/api/search?q=python&per_page=20&page=2').get_json()
+        self.assertEqual(len(first['results']), 20)
+        self.assertTrue(first['has_more'])
+        self.assertEqual(len(second['results']), 6)
+        self.assertFalse(second['has_more'])
+        self.assertFalse(second['truncated'])
+        self.assertEqual(len({(hit['type'], hit['id']) for hit in first['results'] + second['results']}), 26)
+
+    def test_prefix(self):
+        results = self.get('/api/search?q=pyt&prefix=true&type=skills').get_json()['results']
+        self.assertEqual([(hit['type'], hit['name']) for hit in results], [('skill', "Python")])
+
+    def test_truncated(self):
+        with mock.patch.dict(app.config, SEARCH_MAX_CANDIDATES=10), mock.patch.object(Config, 'SEARCH_MAX_CANDIDATES', 10):
+            body = self.get('/api/search?q=python&type=courses').get_json()
+        self.assertTrue(body['truncated'])
+        self.assertEqual(len(body['results']), 10)
+
+    def test_out_of_range_page(self):
+        response = self.get('/api/search?q=python&page=100000000000000000000')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['results'], [])
+
+    def test_rejects_bad_queries(self):
+        self.assertEqual(self.get('/api/search').status_code, 400)
+        self.assertEqual(self.get('/api/search?q=python&type=users').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
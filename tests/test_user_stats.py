@@ -0,0 +1,43 @@
+import unittest
+from support import AppTestCase, app, db
+from models import User, Course
+from celery_worker import update_user_stats
+
+
+class UserStatsTest(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        with app.app_context():
+            user = User(username='learner', email='learner@example.com')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add_all(Course(title=f"Course {i}", description="About", user_id=user.id) for i in range(2))
+            user.course_count = 2
+            db.session.commit()
+
+    def version(self):
+        with app.app_context():
+            user = db.session.get(User, 1)
+            return user.version, user.course_count
+
+    def test_up_to_date_counters_are_not_rewritten(self):
+        version, _ = self.version()
+        etag = self.get('/api/users/1').headers['ETag']
+        update_user_stats.delay(1)
+        update_user_stats.delay(1)
+        self.assertEqual(self.version(), (version, 2))
+        self.assertEqual(self.get('/api/users/1', headers={'If-None-Match': etag}).status_code, 304)
+
+    def test_drifted_counters_are_fixed_and_invalidated(self):
+        with app.app_context():
+            User.query.filter(User.id == 1).update({'course_count': 5})
+            db.session.commit()
+        etag = self.get('/api/users/1').headers['ETag']
+        update_user_stats.delay(1)
+        self.assertEqual(self.version()[1], 2)
+        # The cached detail was invalidated, so it is served with the new version's ETag
+        self.assertEqual(self.get('/api/users/1', headers={'If-None-Match': etag}).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+import uuid
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from config import Config
+from utils import serialization
+from utils.helpers import RELEASE_LOCK_SCRIPT, fresh_value, get_lock_key, refresh_early, store_entry
+from utils.metrics import InstrumentedAsyncRedis
+from utils.near_cache import near_cache, MISSING
+from utils.rate_limit_strategies import get_strategy
+from utils.rate_limiter_init import rate_limiter
+
+# Async drivers used for each database URL scheme
+ASYNC_DRIVERS = {
+    'postgres': 'postgresql+asyncpg',
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+logger = logging.getLogger(__name__)
+
+def async_database_url(url):
+    scheme, separator, rest = url.partition('://')
+    driver = ASYNC_DRIVERS.get(scheme.split('+')[0])
+    if driver is None:
+        raise ValueError(f"No async driver configured for {scheme} URLs")
+    return f"{driver}{separator}{rest}"
+
+
+class AsyncBackends:
+    """
+    Async Postgres and Redis clients for the ASGI read path (see asgi.py).
+
+    Shares cache entries, tags and rate limit state with the WSGI app, so
+    both can serve the same deployment side by side: entries written by
+    either path are served by both, and invalidate_cache() on the write path
+    clears them for both.
+    """
+
+    def __init__(self, database_url=None, redis_url=None):
+        self.engine = create_async_engine(
+            async_database_url(database_url or Config.SQLALCHEMY_DATABASE_URI),
+            **Config.SQLALCHEMY_ENGINE_OPTIONS
+        )
+        self.session = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.redis = InstrumentedAsyncRedis.from_url(redis_url or Config.REDIS_URL, max_connections=Config.REDIS_POOL_MAX_CONNECTIONS)
+        self._scripts = {}
+
+    async def close(self):
+        await self.redis.aclose()
+        await self.engine.dispose()
+
+    def _get_script(self, name, source):
+        script = self._scripts.get(name)
+        if script is None:
+            script = self._scripts[name] = self.redis.register_script(source)
+        return script
+
+    async def rate_limit(self, key_prefix, limit, period, remote_addr):
+        """
+        Same algorithm, keys and limits as utils.rate_limiter; returns (allowed, headers)
+        """
+        if not rate_limiter.scale:
+            return True, {}
+        limit = rate_limiter.scaled(limit)
+        algorithm = get_strategy(rate_limiter.default_strategy)
+        script = self._get_script(algorithm.name, algorithm.script)
+        results = await script(
+            keys=[f"{key_prefix}:{algorithm.name}:{remote_addr}", f"global:{remote_addr}"],
+            args=rate_limiter.script_args(limit, period),
+        )
+        request_count, remaining, reset, global_count, allowed = (int(value) for value in results)
+        headers = {
+            'X-RateLimit-Limit': str(limit),
+            'X-RateLimit-Remaining': str(remaining),
+            'X-RateLimit-Reset': str(reset),
+            'X-Global-RateLimit-Limit': str(rate_limiter.global_limit),
+            'X-Global-RateLimit-Remaining': str(max(rate_limiter.global_limit - global_count, 0)),
+        }
+        return bool(allowed), headers
+
+    async def cached(self, cached_function, loader, **kwargs):
+        """
+        Read-through for a @cache_response function, loading misses with the async loader.
+
+        Same entries and policy as cache_response (see the shared helpers in
+        utils.helpers): early expiration, one caller per key recomputing under
+        the same Redis lock while the others wait, and stale-while-revalidate
+        entries refreshed by the same Celery task.
+        """
+        arguments = cached_function.bind_arguments(**kwargs)
+        options = cached_function.cache_options
+        cache_key = cached_function.make_key(arguments)
+
+        value = near_cache.get(cache_key)
+        if value is not MISSING:
+            return value
+        cached_response = await self.redis.get(cache_key)
+        near_cache.record_l2(cached_response is not None)
+        if cached_response:
+            envelope = serialization.loads(cached_response)
+            response, remaining = envelope['v'], envelope['x'] - time.time()
+            if remaining > 0:
+                near_cache.set(cache_key, response, remaining)
+                if not refresh_early(envelope, options['early_beta']):
+                    return response
+                if not options['stale_ttl']:
+                    token = await self._acquire_lock(cache_key, options['lock_timeout'])
+                    return await self._recompute(cache_key, options, arguments, loader, token) if token else response
+            # Serve the stale (or soon to be stale) value while a worker refreshes it
+            await asyncio.to_thread(cached_function.schedule_refresh, arguments)
+            return response
+        return await self._recompute(cache_key, options, arguments, loader)
+
+    async def cached_many(self, cached_function, argument, values, loader):
+        """
+        Async counterpart of utils.helpers.cache_get_many, loading misses with
+        one call to the async loader(session, missing_values)
+        """
+        options = cached_function.cache_options
+        arguments = {value: cached_function.bind_arguments(**{argument: value}) for value in values}
+        keys = {value: cached_function.make_key(arguments[value]) for value in values}
+
+        results = {}
+        for value in values:
+            cached_response = near_cache.get(keys[value])
+            if cached_response is not MISSING:
+                results[value] = cached_response
+        pending = [value for value in values if value not in results]
+        if pending:
+            for value, cached_response in zip(pending, await self.redis.mget([keys[value] for value in pending])):
+                near_cache.record_l2(cached_response is not None)
+                if cached_response:
+                    envelope = serialization.loads(cached_response)
+                    remaining = envelope['x'] - time.time()
+                    if remaining > 0:
+                        near_cache.set(keys[value], envelope['v'], remaining)
+                        results[value] = envelope['v']
+        missing = [value for value in values if value not in results]
+        if missing:
+            start = time.time()
+            async with self.session() as session:
+                loaded = await loader(session, missing)
+            duration = (time.time() - start) / len(missing)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for value in missing:
+                    results[value] = loaded.get(value)
+                    store_entry(pipe, keys[value], results[value], duration, options, arguments[value])
+                await pipe.execute()
+            for value in missing:
+                near_cache.set(keys[value], results[value], options['timeout'])
+        return results
+
+    async def _acquire_lock(self, cache_key, timeout):
+        token = uuid.uuid4().hex
+        if await self.redis.set(get_lock_key(cache_key), token, nx=True, px=int(timeout * 1000)):
+            return token
+        return None
+
+    async def _recompute(self, cache_key, options, arguments, loader, lock_token=None):
+        # Same as cache_response's recompute: wait for the lock holder's result rather than recomputing too
+        token = lock_token or await self._acquire_lock(cache_key, options['lock_timeout'])
+        if token is None:
+            deadline = time.time() + options['lock_timeout']
+            while time.time() < deadline:
+                await asyncio.sleep(0.05)
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    cached, locked = await pipe.get(cache_key).exists(get_lock_key(cache_key)).execute()
+                value = fresh_value(cached)
+                if value is not MISSING:
+                    return value
+                if not locked:
+                    break
+        try:
+            return await self._compute(cache_key, options, arguments, loader)
+        finally:
+            if token is not None:
+                await self._get_script('release_lock', RELEASE_LOCK_SCRIPT)(keys=[get_lock_key(cache_key)], args=[token])
+
+    async def _compute(self, cache_key, options, arguments, loader):
+        start = time.time()
+        async with self.session() as session:
+            response = await loader(session, **arguments)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            store_entry(pipe, cache_key, response, time.time() - start, options, arguments)
+            await pipe.execute()
+        near_cache.set(cache_key, response, options['timeout'])
+        return response
@@ -0,0 +1,81 @@
+"""
+Conditional GET for the API read endpoints.
+
+Validators are derived from the `version`/`updated_at` of the DTOs a
+representation is built from (Last-Modified for single rows only), so an endpoint whose DTOs come from the cache
+can answer If-None-Match / If-Modified-Since with a 304 without touching the
+database or serializing a body.
+"""
+import hashlib
+from datetime import datetime, timezone
+from flask import current_app, request
+from werkzeug.http import http_date, parse_date, parse_etags, quote_etag
+
+# Clients revalidate on every use instead of reusing a copy that may be stale
+CACHE_CONTROL = 'private, no-cache'
+
+
+def etag_for(*items, extra=()):
+    """
+    Strong ETag for a representation of the given DTOs and `extra` values
+    (page totals, cursors...); None when any DTO has no known version.
+    """
+    parts = []
+    for item in items:
+        if item.version is None:
+            return None
+        parts.append((type(item).__name__, item.id, item.version))
+    parts.append(tuple(extra))
+    return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def last_modified_for(item):
+    """
+    updated_at of a single-row representation, as a UTC datetime; None when unknown.
+
+    Collections are validated by ETag only: a delete or a shifted page leaves
+    no newer updated_at behind, so their latest updated_at can't tell a client
+    revalidating with If-Modified-Since alone that its copy is stale.
+    """
+    if item.updated_at is None:
+        return None
+    return datetime.fromtimestamp(item.updated_at, tz=timezone.utc)
+
+
+def is_current(headers, etag=None, last_modified=None):
+    """
+    Whether the client's copy, described by its request headers, matches the validators.
+
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2).
+    """
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match:
+        if etag is None:
+            return False
+        tags = parse_etags(if_none_match)
+        # Flask-Compress sends compressed bodies with the ETag suffixed by ":<algorithm>"
+        return tags.star_tag or any(tag.split(':', 1)[0] == etag for tag in tags.as_set(include_weak=True))
+    if_modified_since = parse_date(headers.get('If-Modified-Since'))
+    if if_modified_since is not None and last_modified is not None:
+        return last_modified <= if_modified_since
+    return False
+
+
+def validator_headers(etag=None, last_modified=None):
+    headers = {'Cache-Control': CACHE_CONTROL}
+    if etag is not None:
+        headers['ETag'] = quote_etag(etag)
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    return headers
+
+
+def not_modified(etag=None, last_modified=None):
+    """
+    A 304 response when the current request's client copy is current, otherwise None:
+
+        return not_modified(etag) or (body, 200, validator_headers(etag))
+    """
+    if not is_current(request.headers, etag, last_modified):
+        return None
+    return current_app.response_class(status=304, headers=validator_headers(etag, last_modified))
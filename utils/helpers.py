@@ -1,41 +1,296 @@
+from contextlib import nullcontext
 from functools import wraps
-from flask import jsonify, request
+from flask import jsonify
 from app import redis_client
+from config import Config
+from extensions import replica_router, use_primary
+from utils.near_cache import near_cache, MISSING
+from utils import serialization
+import inspect
 import json
+import logging
+import math
+import random
+import time
+import uuid
 
-def cache_response(timeout=300):
+# Tag sets must outlive every entry they index, otherwise entries become unreachable by invalidation
+TAG_TTL = 86400
+
+# Collects and removes every entry of the given tags atomically in one round trip, and marks
+# each tag as recently written so the entries are recomputed on the primary (see _recently_written).
+# KEYS: tag sets, then their written markers. ARGV: marker TTL in milliseconds.
+# Returns the removed cache keys so replicas can drop their near-cache copies.
+INVALIDATE_TAGS_SCRIPT = """
+local removed = {}
+local tags = #KEYS / 2
+for i = 1, tags do
+    local tag_key = KEYS[i]
+    redis.call('SET', KEYS[tags + i], '1', 'PX', ARGV[1])
+    local members = redis.call('SMEMBERS', tag_key)
+    for i = 1, #members, 500 do
+        redis.call('UNLINK', unpack(members, i, math.min(i + 499, #members)))
+    end
+    for _, member in ipairs(members) do
+        removed[#removed + 1] = member
+    end
+    redis.call('UNLINK', tag_key)
+end
+return removed
+"""
+
+# Deletes the lock only if it is still held by the given token
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_invalidate_script = None
+_release_lock_script = None
+_cached_functions = {}
+logger = logging.getLogger(__name__)
+
+def get_tag_key(tag):
+    return f"tag:{tag}"
+
+def get_written_key(tag):
+    return f"written:{tag}"
+
+def _recently_written(tags):
+    """
+    Whether any of the tags was invalidated within SQLALCHEMY_REPLICA_PIN_SECONDS.
+    An entry recomputed from a lagging replica right after a write would cache
+    the pre-write rows for its whole timeout, so those misses read the primary.
+    """
+    if not tags or not replica_router.engines:
+        return False
+    return redis_client.exists(*(get_written_key(tag) for tag in tags)) > 0
+
+def _read_source(tags):
+    return use_primary() if _recently_written(tags) else nullcontext()
+
+def get_lock_key(cache_key):
+    return f"lock:{cache_key}"
+
+def _acquire_lock(cache_key, timeout):
+    token = uuid.uuid4().hex
+    if redis_client.set(get_lock_key(cache_key), token, nx=True, px=int(timeout * 1000)):
+        return token
+    return None
+
+def _release_lock(cache_key, token):
+    global _release_lock_script
+    if _release_lock_script is None:
+        _release_lock_script = redis_client.register_script(RELEASE_LOCK_SCRIPT)
+    _release_lock_script(keys=[get_lock_key(cache_key)], args=[token])
+
+# The helpers below hold the entry format and refresh policy of cache_response without doing I/O,
+# so the asyncio read path (utils.async_io) applies the same semantics to the same entries
+
+def fresh_value(cached_response):
+    """
+    The value of a raw cache entry that hasn't expired yet, else MISSING
+    """
+    if cached_response:
+        envelope = serialization.loads(cached_response)
+        if envelope['x'] > time.time():
+            return envelope['v']
+    return MISSING
+
+def refresh_early(envelope, early_beta):
+    # Probabilistic early expiration: -log(U) * delta * beta grows past the remaining TTL
+    # for slow-to-compute entries first, so one request refreshes ahead of the crowd
+    return envelope['d'] * early_beta * -math.log(1.0 - random.random()) >= envelope['x'] - time.time()
+
+def store_entry(pipe, cache_key, response, duration, options, arguments):
+    """
+    Queues the commands that store an entry and record it under its tags on a (sync or asyncio) pipeline
+    """
+    envelope = {'v': response, 'd': duration, 'x': time.time() + options['timeout']}
+    pipe.setex(cache_key, options['timeout'] + options['stale_ttl'], serialization.dumps(envelope))
+    for tag in options['tags']:
+        tag_key = get_tag_key(tag.format(**arguments))
+        pipe.sadd(tag_key, cache_key)
+        pipe.expire(tag_key, TAG_TTL)
+
+def cache_response(timeout=300, tags=(), stale_ttl=0, early_beta=1.0, lock_timeout=10):
+    """
+    Cache the result of f keyed by its arguments.
+
+    Results must be plain JSON data or DTOs (see utils.serialization). The near
+    cache holds the decoded value, so hits skip decoding as well as the round trip.
+
+    tags are format strings filled with f's arguments (e.g. 'courses:{course_id}');
+    invalidate_cache(tag) removes every entry recorded under that tag.
+
+    Misses are recomputed by a single worker holding a short Redis lock while
+    the others wait for its result. Entries are refreshed early with a
+    probability that grows as they near expiry, scaled by how long they took
+    to compute (early_beta). With stale_ttl, expired entries are served for up
+    to that many more seconds while a Celery task refreshes them.
+    """
     def decorator(f):
+        signature = inspect.signature(f)
+        name = f.__qualname__
+        options = {'timeout': timeout, 'tags': tuple(tags), 'stale_ttl': stale_ttl, 'early_beta': early_beta, 'lock_timeout': lock_timeout}
+
+        def make_key(arguments):
+            return f"cache:{name}:{json.dumps(arguments, sort_keys=True, default=str)}"
+
+        def compute(arguments):
+            # Store the response and record it under each of its tags
+            start = time.time()
+            with _read_source([tag.format(**arguments) for tag in tags]):
+                response = f(**arguments)
+            cache_key = make_key(arguments)
+            pipe = redis_client.pipeline(transaction=False)
+            store_entry(pipe, cache_key, response, time.time() - start, options, arguments)
+            pipe.execute()
+            near_cache.set(cache_key, response, timeout)
+            return response
+
+        def recompute(arguments, lock_token=None):
+            cache_key = make_key(arguments)
+            token = lock_token or _acquire_lock(cache_key, lock_timeout)
+            if token is None:
+                # Another worker is rebuilding this entry; wait for its result instead of recomputing too
+                deadline = time.time() + lock_timeout
+                while time.time() < deadline:
+                    time.sleep(0.05)
+                    cached, locked = redis_client.pipeline(transaction=False).get(cache_key).exists(get_lock_key(cache_key)).execute()
+                    value = fresh_value(cached)
+                    if value is not MISSING:
+                        return value
+                    if not locked:
+                        break
+            try:
+                return compute(arguments)
+            finally:
+                if token is not None:
+                    _release_lock(cache_key, token)
+
+        def schedule_refresh(arguments):
+            cache_key = make_key(arguments)
+            token = _acquire_lock(cache_key, lock_timeout)
+            if token is None:
+                return  # A refresh is already in progress
+            try:
+                from celery_worker import refresh_cached_response
+                refresh_cached_response.delay(f.__module__, name, arguments, token)
+            except Exception as e:
+                logger.error(f"Failed to schedule cache refresh for {cache_key}: {str(e)}")
+                _release_lock(cache_key, token)
+
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Generate a unique cache key based on the function name, arguments, and request data
-            cache_key = f"{f.__name__}:{request.path}:{json.dumps(request.args)}:{request.data.decode('utf-8')}"
+            arguments = bind_arguments(*args, **kwargs)
+            # Generate a unique cache key based on the function and its arguments
+            cache_key = make_key(arguments)
             
-            # Check if the response is in the cache
+            # Check the process-local cache first, then Redis
+            cached_response = near_cache.get(cache_key)
+            if cached_response is not MISSING:
+                return cached_response
+
             cached_response = redis_client.get(cache_key)
+            near_cache.record_l2(cached_response is not None)
             if cached_response:
-                return json.loads(cached_response)
+                envelope = serialization.loads(cached_response)
+                response, remaining = envelope['v'], envelope['x'] - time.time()
+                if remaining > 0:
+                    near_cache.set(cache_key, response, remaining)
+                    if not refresh_early(envelope, early_beta):
+                        return response
+                    if not stale_ttl:
+                        token = _acquire_lock(cache_key, lock_timeout)
+                        return recompute(arguments, token) if token else response
+                # Serve the stale (or soon to be stale) value while a worker refreshes it
+                schedule_refresh(arguments)
+                return response
             
             # If not in cache, call the original function
-            response = f(*args, **kwargs)
-            
-            # Cache the response
-            redis_client.setex(cache_key, timeout, json.dumps(response))
-            
-            return response
+            return recompute(arguments)
+
+        def bind_arguments(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return bound.arguments
+
+        _cached_functions[name] = recompute
+        # Lets other read paths (utils.async_io) share this function's entries and tags
+        decorated_function.bind_arguments = bind_arguments
+        decorated_function.make_key = make_key
+        decorated_function.schedule_refresh = schedule_refresh
+        decorated_function.cache_options = options
         return decorated_function
     return decorator
 
-def invalidate_cache(pattern):
+def cache_get_many(cached_function, argument, values, load_many):
+    """
+    Batch read-through for a @cache_response function of one entity, e.g.
+    CourseService.get_course by course_id, sharing that function's entries.
+
+    Fresh entries come from the near cache, then from one MGET; the misses are
+    loaded by one load_many(missing_values) call, which returns {value: result}
+    with None for entities that don't exist, and are stored under the function's
+    keys and tags with one pipeline. Returns {value: result} for every value.
+
+    Expired entries are reloaded with the batch rather than served stale, and
+    batch loads take no per-entry lock: the batch is a single query either way.
+    """
+    options = cached_function.cache_options
+    arguments = {value: cached_function.bind_arguments(**{argument: value}) for value in values}
+    keys = {value: cached_function.make_key(arguments[value]) for value in values}
+
+    results = {}
+    for value in values:
+        cached_response = near_cache.get(keys[value])
+        if cached_response is not MISSING:
+            results[value] = cached_response
+    pending = [value for value in values if value not in results]
+    if pending:
+        for value, cached_response in zip(pending, redis_client.mget([keys[value] for value in pending])):
+            near_cache.record_l2(cached_response is not None)
+            if cached_response:
+                envelope = serialization.loads(cached_response)
+                remaining = envelope['x'] - time.time()
+                if remaining > 0:
+                    near_cache.set(keys[value], envelope['v'], remaining)
+                    results[value] = envelope['v']
+    missing = [value for value in values if value not in results]
+    if missing:
+        start = time.time()
+        with _read_source({tag.format(**arguments[value]) for value in missing for tag in options['tags']}):
+            loaded = load_many(missing)
+        duration = (time.time() - start) / len(missing)
+        pipe = redis_client.pipeline(transaction=False)
+        for value in missing:
+            results[value] = loaded.get(value)
+            store_entry(pipe, keys[value], results[value], duration, options, arguments[value])
+        pipe.execute()
+        for value in missing:
+            near_cache.set(keys[value], results[value], options['timeout'])
+    return results
+
+def refresh_cached_response(name, arguments, lock_token):
     """
-    Invalidate cache entries matching the given pattern
+    Recompute a cached call; run by the refresh_cached_response Celery task
     """
-    for key in redis_client.scan_iter(pattern):
-        redis_client.delete(key)
+    _cached_functions[name](arguments, lock_token)
 
-def get_cache_key(resource_type, resource_id=None):
+def invalidate_cache(*tags):
     """
-    Generate a cache key pattern for a specific resource or resource type
+    Invalidate every cache entry recorded under the given tags, in Redis and in every replica's near cache.
+    For SQLALCHEMY_REPLICA_PIN_SECONDS afterwards, misses under these tags are recomputed on the primary.
     """
-    if resource_id:
-        return f"{resource_type}:{resource_id}:*"
-    return f"{resource_type}:*"
+    global _invalidate_script
+    if _invalidate_script is None:
+        _invalidate_script = redis_client.register_script(INVALIDATE_TAGS_SCRIPT)
+    removed = _invalidate_script(
+        keys=[get_tag_key(tag) for tag in tags] + [get_written_key(tag) for tag in tags],
+        args=[int(Config.SQLALCHEMY_REPLICA_PIN_SECONDS * 1000)]
+    )
+    if removed:
+        near_cache.invalidate(redis_client, keys=[key.decode('utf-8') for key in removed])
@@ -1,34 +1,218 @@
-import redis
 import json
-import time
+import logging
+import os
+import socket
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from redis.exceptions import ResponseError
 from app import redis_client
+from config import Config
+
+# Moves the tasks of a queue that is still the list it used to be (RPUSH/BLPOP) onto a stream
+# under the same key, in one atomic step so producers and other consumers never see it half-moved
+MIGRATE_LIST_SCRIPT = """
+if redis.call('TYPE', KEYS[1])['ok'] ~= 'list' then
+    return 0
+end
+local tasks = redis.call('LRANGE', KEYS[1], 0, -1)
+redis.call('DEL', KEYS[1])
+for _, task in ipairs(tasks) do
+    redis.call('XADD', KEYS[1], '*', 'task', task)
+end
+return #tasks
+"""
 
 class LoadBalancer:
-    def __init__(self, queue_name='task_queue'):
+    """
+    Work queue on a Redis Stream consumed through a consumer group.
+
+    Messages stay in the group's pending list until the worker function
+    returns and they are XACKed, so a task in flight on a worker that dies
+    is claimed by another consumer (XAUTOCLAIM) once it has been idle for
+    `claim_idle_ms`. Tasks that keep failing are moved to `<queue>:dead`
+    after `max_deliveries` attempts. A queue still holding the list of
+    earlier versions is moved onto the stream when a consumer starts.
+
+    At most `max_in_flight` tasks are read but not yet finished, so a slow
+    worker function stops the consumer from pulling more of the stream.
+    """
+
+    def __init__(self, queue_name='task_queue', group='workers', consumer=None,
+                 concurrency=None, batch_size=None, max_in_flight=None,
+                 claim_idle_ms=None, max_deliveries=None, block_ms=1000, maxlen=None):
         self.queue_name = queue_name
+        self.dead_letter_queue = f"{queue_name}:dead"
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.concurrency = concurrency or Config.LOAD_BALANCER_CONCURRENCY
+        self.batch_size = batch_size or Config.LOAD_BALANCER_BATCH_SIZE
+        self.max_in_flight = max_in_flight or self.concurrency * 2
+        self.claim_idle_ms = claim_idle_ms or Config.LOAD_BALANCER_CLAIM_IDLE_MS
+        self.max_deliveries = max_deliveries or Config.LOAD_BALANCER_MAX_DELIVERIES
+        self.block_ms = block_ms
+        self.maxlen = maxlen
         self.redis_client = redis_client
+        self.logger = logging.getLogger(__name__)
+        self._in_flight = 0
+        self._slots = threading.Condition()
+        self._stop = threading.Event()
+        self._counters_lock = threading.Lock()
+        self._started_at = None
+        self._claim_cursor = '0-0'
+        self.counters = {
+            'processed': 0, 'failed': 0, 'claimed': 0, 'dead_lettered': 0,
+            'processing_seconds': 0.0, 'max_processing_seconds': 0.0,
+            'queue_seconds': 0.0, 'max_queue_seconds': 0.0,
+        }
 
     def enqueue_task(self, task):
-        self.redis_client.rpush(self.queue_name, json.dumps(task))
+        kwargs = {'maxlen': self.maxlen, 'approximate': True} if self.maxlen else {}
+        return self.redis_client.xadd(self.queue_name, {'task': json.dumps(task)}, **kwargs)
 
-    def dequeue_task(self):
-        task = self.redis_client.blpop(self.queue_name, timeout=1)
-        if task:
-            return json.loads(task[1])
-        return None
+    def migrate_list_queue(self):
+        """
+        Returns how many tasks were moved from the list queue of earlier versions onto the stream
+        """
+        moved = self.redis_client.register_script(MIGRATE_LIST_SCRIPT)(keys=[self.queue_name])
+        if moved:
+            self.logger.warning(f"Moved {moved} tasks from the {self.queue_name} list onto the stream")
+        return moved
+
+    def ensure_group(self):
+        self.migrate_list_queue()
+        try:
+            self.redis_client.xgroup_create(self.queue_name, self.group, id='0', mkstream=True)
+        except ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
 
     def process_tasks(self, worker_function):
-        while True:
-            task = self.dequeue_task()
-            if task:
-                worker_function(task)
+        self.ensure_group()
+        self._started_at = time.monotonic()
+        next_claim = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='load-balancer') as executor:
+            while not self._stop.is_set():
+                try:
+                    slots = self._wait_for_slots()
+                    if slots == 0:
+                        continue
+                    messages = []
+                    if time.monotonic() >= next_claim:
+                        messages = self._claim_stale(slots)
+                        next_claim = time.monotonic() + self.claim_idle_ms / 1000.0 / 2
+                    if not messages:
+                        response = self.redis_client.xreadgroup(
+                            self.group, self.consumer, {self.queue_name: '>'},
+                            count=slots, block=self.block_ms
+                        )
+                        messages = response[0][1] if response else []
+                    for message_id, fields in messages:
+                        self._reserve_slot()
+                        executor.submit(self._handle, worker_function, message_id, fields)
+                except Exception as e:
+                    self.logger.error(f"Load balancer consumer error: {str(e)}")
+                    self._stop.wait(1)
+
+    def _wait_for_slots(self):
+        # Backpressure: don't read more than max_in_flight unfinished tasks
+        with self._slots:
+            self._slots.wait_for(lambda: self._in_flight < self.max_in_flight or self._stop.is_set(), timeout=1)
+            return max(0, min(self.batch_size, self.max_in_flight - self._in_flight))
+
+    def _reserve_slot(self):
+        with self._slots:
+            self._in_flight += 1
+
+    def _release_slot(self):
+        with self._slots:
+            self._in_flight -= 1
+            self._slots.notify()
+
+    def _claim_stale(self, count):
+        """
+        Takes over messages left pending by consumers that died or stalled; dead-letters poison messages.
+        Successive calls walk the whole pending list, starting over once XAUTOCLAIM reaches its end.
+        """
+        cursor, messages, *_ = self.redis_client.xautoclaim(
+            self.queue_name, self.group, self.consumer, self.claim_idle_ms, start_id=self._claim_cursor, count=count
+        )
+        self._claim_cursor = cursor
+        messages = [(message_id, fields) for message_id, fields in messages if fields is not None]
+        if not messages:
+            return []
+        # Delivery counts of exactly the claimed messages, which XAUTOCLAIM has just incremented
+        pipe = self.redis_client.pipeline(transaction=False)
+        for message_id, _ in messages:
+            pipe.xpending_range(self.queue_name, self.group, min=message_id, max=message_id, count=1)
+        deliveries = {entry['message_id']: entry['times_delivered'] for pending in pipe.execute() for entry in pending}
+        claimed = []
+        for message_id, fields in messages:
+            if deliveries.get(message_id, 0) > self.max_deliveries:
+                self._dead_letter(message_id, fields)
             else:
-                time.sleep(0.1)  # Sleep briefly to avoid busy-waiting
+                claimed.append((message_id, fields))
+        self._count(claimed=len(claimed))
+        return claimed
+
+    def _dead_letter(self, message_id, fields):
+        if isinstance(message_id, bytes):
+            message_id = message_id.decode('utf-8')
+        pipe = self.redis_client.pipeline()
+        pipe.xadd(self.dead_letter_queue, dict(fields, source_id=message_id))
+        pipe.xack(self.queue_name, self.group, message_id)
+        pipe.execute()
+        self.logger.warning(f"Moved task {message_id} to {self.dead_letter_queue} after {self.max_deliveries} deliveries")
+        self._count(dead_lettered=1)
+
+    def _handle(self, worker_function, message_id, fields):
+        if isinstance(message_id, bytes):
+            message_id = message_id.decode('utf-8')
+        queued = max(0.0, time.time() - int(message_id.split('-')[0]) / 1000.0)
+        start = time.perf_counter()
+        try:
+            worker_function(json.loads(fields[b'task'] if b'task' in fields else fields['task']))
+            self.redis_client.xack(self.queue_name, self.group, message_id)
+        except Exception as e:
+            # Left pending; retried through XAUTOCLAIM once idle for claim_idle_ms
+            self.logger.error(f"Task {message_id} failed: {str(e)}")
+            self._count(failed=1)
+        else:
+            duration = time.perf_counter() - start
+            self._count(processed=1, processing_seconds=duration, queue_seconds=queued)
+        finally:
+            self._release_slot()
+
+    def _count(self, **increments):
+        with self._counters_lock:
+            for name, value in increments.items():
+                self.counters[name] += value
+            if 'processing_seconds' in increments:
+                self.counters['max_processing_seconds'] = max(self.counters['max_processing_seconds'], increments['processing_seconds'])
+                self.counters['max_queue_seconds'] = max(self.counters['max_queue_seconds'], increments['queue_seconds'])
+
+    def stats(self):
+        with self._counters_lock:
+            stats = dict(self.counters)
+        processed = stats['processed']
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0
+        stats.update(
+            in_flight=self._in_flight,
+            throughput_per_second=processed / elapsed if elapsed else 0.0,
+            avg_processing_seconds=stats['processing_seconds'] / processed if processed else 0.0,
+            avg_queue_seconds=stats['queue_seconds'] / processed if processed else 0.0,
+        )
+        return stats
+
+    def stop(self):
+        self._stop.set()
+        with self._slots:
+            self._slots.notify_all()
 
-def start_worker(worker_function):
-    load_balancer = LoadBalancer()
+def start_worker(worker_function, **options):
+    load_balancer = LoadBalancer(**options)
     worker_thread = threading.Thread(target=load_balancer.process_tasks, args=(worker_function,))
+    worker_thread.load_balancer = load_balancer
     worker_thread.start()
     return worker_thread
 
@@ -36,4 +220,5 @@ def start_worker(worker_function):
 # def example_worker(task):
 #     print(f"Processing task: {task}")
 #
-# start_worker(example_worker)
+# worker = start_worker(example_worker, concurrency=8)
+# worker.load_balancer.stats()
@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+
+
+class _Shard:
+    __slots__ = ('lock', 'entries')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+
+class MemoryStore:
+    """
+    Bounded in-process key/state store used when Redis is unavailable.
+
+    Keys are spread over independently locked shards to cut lock contention.
+    Each shard keeps its entries in LRU order; expired entries are dropped
+    as they reach the head and the least recently used key is evicted once a
+    shard holds more than its share of max_keys.
+    """
+
+    # Expired entries dropped from the LRU head per write, bounds the work per request
+    PURGE_BATCH = 8
+
+    def __init__(self, max_keys=10000, shards=16):
+        self.max_keys = max_keys
+        self._shards = [_Shard() for _ in range(shards)]
+
+    def _shard(self, key):
+        return self._shards[hash(key) % len(self._shards)]
+
+    def update(self, key, func, ttl, now):
+        """
+        Atomically replaces the state of key with func(state).
+
+        func receives the current state (None if missing or expired) and returns
+        (new_state, result); result is handed back to the caller.
+        """
+        shard = self._shard(key)
+        capacity = max(self.max_keys // len(self._shards), 1)
+        with shard.lock:
+            entries = shard.entries
+            entry = entries.pop(key, None)
+            state = entry[1] if entry is not None and entry[0] > now else None
+            state, result = func(state)
+            entries[key] = (now + ttl, state)
+
+            for _ in range(self.PURGE_BATCH):
+                oldest_key, (expires_at, _state) = next(iter(entries.items()))
+                if expires_at > now or oldest_key == key:
+                    break
+                del entries[oldest_key]
+            while len(entries) > capacity:
+                entries.popitem(last=False)
+        return result
+
+    def get(self, key, now):
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+        return entry[1] if entry is not None and entry[0] > now else None
+
+    def clear(self):
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+
+    def __len__(self):
+        return sum(len(shard.entries) for shard in self._shards)
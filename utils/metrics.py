@@ -0,0 +1,251 @@
+import hmac
+import ipaddress
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from flask import g, has_request_context, request
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio.client import Pipeline as AsyncPipeline
+from redis.client import Pipeline
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Per-request counters kept on flask.g, summed per endpoint for /metrics
+REQUEST_COUNTERS = ('sql_statements', 'sql_seconds', 'redis_commands', 'redis_seconds', 'celery_enqueued')
+
+# Counters of the ASGI request being handled, where there is no flask.g (see asgi.py)
+async_request_counters = ContextVar('async_request_counters', default=None)
+
+
+class EndpointMetrics:
+    """
+    Process-wide aggregates per (endpoint, method), exported in Prometheus text format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)  # (endpoint, method, status) -> count
+        self._totals = defaultdict(lambda: dict.fromkeys(REQUEST_COUNTERS + ('duration_seconds',), 0))
+
+    def record(self, endpoint, method, status, duration, counters):
+        with self._lock:
+            self._requests[(endpoint, method, status)] += 1
+            totals = self._totals[(endpoint, method)]
+            totals['duration_seconds'] += duration
+            for name in REQUEST_COUNTERS:
+                totals[name] += counters[name]
+
+    def render(self, extra_samples=()):
+        lines = [
+            '# HELP upskill_requests_total Requests handled, by endpoint, method and status.',
+            '# TYPE upskill_requests_total counter',
+        ]
+        with self._lock:
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                lines.append(f'upskill_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+            totals = sorted(self._totals.items())
+            for name, help_text in (
+                ('duration_seconds', 'Time spent handling requests.'),
+                ('sql_statements', 'SQL statements executed.'),
+                ('sql_seconds', 'Time spent executing SQL statements.'),
+                ('redis_commands', 'Redis commands sent, pipelined commands counted individually.'),
+                ('redis_seconds', 'Time spent waiting on Redis.'),
+                ('celery_enqueued', 'Celery tasks enqueued.'),
+            ):
+                lines.append(f'# HELP upskill_request_{name}_total {help_text}')
+                lines.append(f'# TYPE upskill_request_{name}_total counter')
+                for (endpoint, method), values in totals:
+                    lines.append(f'upskill_request_{name}_total{{endpoint="{endpoint}",method="{method}"}} {values[name]}')
+        lines.extend(extra_samples)
+        return '\n'.join(lines) + '\n'
+
+
+endpoint_metrics = EndpointMetrics()
+
+
+def _add(name, value):
+    if has_request_context():
+        if 'request_counters' in g:
+            g.request_counters[name] += value
+        return
+    counters = async_request_counters.get()
+    if counters is not None:
+        counters[name] += value
+
+
+def finish_request(endpoint, method, status, started, counters):
+    """
+    Records a finished request and returns its Server-Timing header value
+    """
+    duration = time.perf_counter() - started
+    endpoint_metrics.record(endpoint, method, status, duration, counters)
+    return _server_timing(counters, duration)
+
+
+class InstrumentedPipeline(Pipeline):
+    def execute(self, raise_on_error=True):
+        commands = len(self.command_stack)
+        start = time.perf_counter()
+        try:
+            return super().execute(raise_on_error=raise_on_error)
+        finally:
+            _add('redis_commands', commands)
+            _add('redis_seconds', time.perf_counter() - start)
+
+
+class InstrumentedRedis(Redis):
+    """
+    Redis client that counts commands and time spent per request
+    """
+
+    def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            _add('redis_commands', 1)
+            _add('redis_seconds', time.perf_counter() - start)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+class InstrumentedAsyncPipeline(AsyncPipeline):
+    async def execute(self, raise_on_error=True):
+        commands = len(self.command_stack)
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error=raise_on_error)
+        finally:
+            _add('redis_commands', commands)
+            _add('redis_seconds', time.perf_counter() - start)
+
+
+class InstrumentedAsyncRedis(AsyncRedis):
+    """
+    redis.asyncio counterpart of InstrumentedRedis for the ASGI read path
+    """
+
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            _add('redis_commands', 1)
+            _add('redis_seconds', time.perf_counter() - start)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return InstrumentedAsyncPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long checkouts wait for a free connection
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.counters = {'checkouts': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0, 'timeouts': 0}
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.counters['timeouts'] += 1
+            raise
+        wait = time.perf_counter() - start
+        with self._stats_lock:
+            self.counters['checkouts'] += 1
+            self.counters['wait_seconds'] += wait
+            self.counters['max_wait_seconds'] = max(self.counters['max_wait_seconds'], wait)
+        return connection
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self.counters, in_use=self.checkedout(), open=self.checkedin() + self.checkedout(),
+                        max_connections=self.size() + self._max_overflow)
+
+
+def render_pool_samples(pools):
+    """
+    Prometheus samples for {(kind, name): pool} where each pool has stats()
+    """
+    lines = []
+    for metric, kind, help_text in (
+        ('checkouts', 'counter', 'Connections checked out of the pool.'),
+        ('wait_seconds', 'counter', 'Time spent waiting for a free connection.'),
+        ('timeouts', 'counter', 'Checkouts that gave up waiting for a connection.'),
+        ('max_wait_seconds', 'gauge', 'Longest wait for a connection since start.'),
+        ('in_use', 'gauge', 'Connections currently checked out.'),
+        ('open', 'gauge', 'Connections currently open.'),
+        ('max_connections', 'gauge', 'Most connections the pool will open.'),
+    ):
+        name = f'upskill_pool_{metric}_total' if kind == 'counter' else f'upskill_pool_{metric}'
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for (backend, pool_name), pool in sorted(pools.items()):
+            lines.append(f'{name}{{backend="{backend}",pool="{pool_name}"}} {pool.stats()[metric]}')
+    return lines
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info['query_start'].pop()
+    _add('sql_statements', 1)
+    _add('sql_seconds', time.perf_counter() - start)
+
+
+def scrape_allowed(remote_addr, authorization, allowed_networks, token):
+    """
+    Whether a /metrics request comes from an allowed network or carries the scrape token
+    """
+    if token and authorization and hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode()):
+        return True
+    try:
+        address = ipaddress.ip_address(remote_addr or '')
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in allowed_networks)
+
+
+def _server_timing(counters, duration):
+    return ', '.join([
+        f'db;dur={counters["sql_seconds"] * 1000:.1f};desc="{counters["sql_statements"]} queries"',
+        f'redis;dur={counters["redis_seconds"] * 1000:.1f};desc="{counters["redis_commands"]} commands"',
+        f'celery;desc="{counters["celery_enqueued"]} enqueued"',
+        f'total;dur={duration * 1000:.1f}',
+    ])
+
+
+def init_metrics(app):
+    from celery.signals import before_task_publish
+
+    @before_task_publish.connect(weak=False)
+    def count_enqueued_task(**kwargs):
+        _add('celery_enqueued', 1)
+
+    @app.before_request
+    def start_request_metrics():
+        g.request_started = time.perf_counter()
+        g.request_counters = dict.fromkeys(REQUEST_COUNTERS, 0)
+
+    @app.after_request
+    def finish_request_metrics(response):
+        if 'request_counters' not in g:
+            return response
+        response.headers['Server-Timing'] = finish_request(
+            request.endpoint or 'unmatched', request.method, response.status_code, g.request_started, g.request_counters
+        )
+        return response
@@ -0,0 +1,193 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from flask_caching.backends.rediscache import RedisCache
+from utils.redis_pool import PooledRedis
+
+MISSING = object()
+
+
+class NearCache:
+    """
+    Bounded per-process LRU with TTL that sits in front of Redis (L1 in front of L2).
+
+    Entries live for at most `ttl` seconds, so a replica that misses an
+    invalidation message serves stale data for a bounded time only.
+    Invalidations are broadcast over Redis pub/sub so every replica drops
+    its local copy.
+    """
+    CHANNEL = 'cache:invalidate'
+
+    def __init__(self, max_entries=1024, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.logger = logging.getLogger(__name__)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._origin = uuid.uuid4().hex
+        self._listener = None
+        self.counters = {'l1_hits': 0, 'l1_misses': 0, 'l2_hits': 0, 'l2_misses': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.counters['l1_hits'] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.counters['l1_misses'] += 1
+        return MISSING
+
+    def set(self, key, value, timeout=None):
+        ttl = min(self.ttl, timeout) if timeout and timeout > 0 else self.ttl
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_l2(self, hit):
+        with self._lock:
+            self.counters['l2_hits' if hit else 'l2_misses'] += 1
+
+    def discard(self, keys=(), patterns=()):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+            if patterns:
+                for key in [k for k in self._entries if any(fnmatchcase(k, p) for p in patterns)]:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, l1_size=len(self._entries))
+
+    def invalidate(self, redis_client, keys=(), patterns=()):
+        """
+        Drops the keys/patterns locally and tells every other replica to do the same
+        """
+        keys, patterns = list(keys), list(patterns)
+        self.discard(keys, patterns)
+        try:
+            redis_client.publish(self.CHANNEL, json.dumps({'origin': self._origin, 'keys': keys, 'patterns': patterns}))
+        except Exception as e:
+            self.logger.error(f"Failed to broadcast cache invalidation: {str(e)}")
+
+    def start_listener(self, redis_client):
+        if self._listener is not None:
+            return
+        self._listener = threading.Thread(target=self._listen, args=(redis_client,), daemon=True)
+        self._listener.start()
+
+    def _listen(self, redis_client):
+        while True:
+            try:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CHANNEL)
+                for message in pubsub.listen():
+                    payload = json.loads(message['data'])
+                    if payload.get('origin') != self._origin:
+                        self.discard(payload.get('keys', ()), payload.get('patterns', ()))
+            except Exception as e:
+                # Invalidations may have been missed while disconnected
+                self.logger.warning(f"Cache invalidation listener error: {str(e)}")
+                self.clear()
+                time.sleep(5)
+
+
+near_cache = NearCache()
+
+
+class TwoTierRedisCache(RedisCache):
+    """
+    flask-caching backend that serves cache.memoize/cache.cached from the
+    process-local near cache before going to Redis.
+    """
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        redis_url = config.get('CACHE_REDIS_URL')
+        if not redis_url:
+            return super().factory(app, config, args, kwargs)
+        # Reuse the process-wide Redis pool instead of opening one per cache
+        kwargs['host'] = PooledRedis.from_url(redis_url)
+        if config.get('CACHE_KEY_PREFIX'):
+            kwargs['key_prefix'] = config['CACHE_KEY_PREFIX']
+        return cls(*args, **kwargs)
+
+    def _near_key(self, key):
+        return f"flask_cache:{key}"
+
+    def get(self, key):
+        value = near_cache.get(self._near_key(key))
+        if value is not MISSING:
+            return value
+        value = super().get(key)
+        near_cache.record_l2(value is not None)
+        if value is not None:
+            near_cache.set(self._near_key(key), value)
+        return value
+
+    def get_many(self, *keys):
+        values = [near_cache.get(self._near_key(key)) for key in keys]
+        missing = [key for key, value in zip(keys, values) if value is MISSING]
+        if missing:
+            fetched = dict(zip(missing, super().get_many(*missing)))
+            for index, key in enumerate(keys):
+                if values[index] is MISSING:
+                    value = values[index] = fetched[key]
+                    near_cache.record_l2(value is not None)
+                    if value is not None:
+                        near_cache.set(self._near_key(key), value)
+        return values
+
+    def has(self, key):
+        if near_cache.get(self._near_key(key)) is not MISSING:
+            return True
+        return super().has(key)
+
+    def set(self, key, value, timeout=None):
+        result = super().set(key, value, timeout=timeout)
+        # Other replicas would keep serving their previous copy until it expires
+        near_cache.invalidate(self._write_client, keys=[self._near_key(key)])
+        near_cache.set(self._near_key(key), value, self._normalize_timeout(timeout))
+        return result
+
+    def set_many(self, mapping, timeout=None):
+        result = super().set_many(mapping, timeout=timeout)
+        # Memoize version bumps go through set_many, so other replicas must drop their copies
+        near_cache.invalidate(self._write_client, keys=[self._near_key(key) for key in mapping])
+        for key, value in mapping.items():
+            near_cache.set(self._near_key(key), value, self._normalize_timeout(timeout))
+        return result
+
+    def delete(self, key):
+        result = super().delete(key)
+        near_cache.invalidate(self._write_client, keys=[self._near_key(key)])
+        return result
+
+    def delete_many(self, *keys):
+        result = super().delete_many(*keys)
+        near_cache.invalidate(self._write_client, keys=[self._near_key(key) for key in keys])
+        return result
+
+    def clear(self):
+        result = super().clear()
+        near_cache.invalidate(self._write_client, patterns=['flask_cache:*'])
+        return result
+
+
+def init_near_cache(app, redis_client):
+    near_cache.max_entries = app.config.get('NEAR_CACHE_MAX_ENTRIES', near_cache.max_entries)
+    near_cache.ttl = app.config.get('NEAR_CACHE_TTL', near_cache.ttl)
+    near_cache.start_listener(redis_client)
@@ -0,0 +1,126 @@
+import base64
+import json
+from sqlalchemy import text
+from extensions import db
+
+
+# Bounds for page arguments, so OFFSET and id comparisons fit the database's 64-bit integers
+MAX_OFFSET = 2 ** 31
+MAX_ID = 2 ** 63 - 1
+
+
+def clamp_page_args(page, per_page, max_per_page):
+    """
+    Bounds ?page= and ?per_page=: per_page to 1..max_per_page, and page so its OFFSET stays below MAX_OFFSET
+    """
+    per_page = min(max(per_page, 1), max_per_page)
+    return min(max(page, 1), MAX_OFFSET // per_page + 1), per_page
+
+
+def clamp_id(item_id):
+    return min(max(item_id, 0), MAX_ID)
+
+
+def encode_cursor(last_id):
+    """
+    Opaque cursor pointing just after the row with the given id
+    """
+    return base64.urlsafe_b64encode(json.dumps({'id': last_id}).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Returns the id encoded in the cursor; an empty cursor starts from the beginning.
+    Raises ValueError for malformed cursors.
+    """
+    if not cursor:
+        return 0
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return int(payload['id'])
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def decode_ids(value, max_ids):
+    """
+    Parses a comma-separated ?ids= list into unique ids, in the order given.
+    Raises ValueError for malformed, empty or oversized lists, and for ids
+    outside 1..MAX_ID, which no row has and the database can't compare.
+    """
+    ids = []
+    for part in value.split(','):
+        try:
+            item_id = int(part)
+        except ValueError as e:
+            raise ValueError(f"Invalid id: {part.strip()}") from e
+        if not 1 <= item_id <= MAX_ID:
+            raise ValueError(f"Invalid id: {part.strip()}")
+        if item_id not in ids:
+            ids.append(item_id)
+    if len(ids) > max_ids:
+        raise ValueError(f"At most {max_ids} ids per request")
+    return ids
+
+
+# Bulk item fields that hold ids; they must be ints to match and compare against the primary keys
+BULK_ID_FIELDS = ('id', 'user_id')
+
+
+def decode_bulk_items(data, key, required_fields, max_items):
+    """
+    Validates the list under `key` of a /bulk request body: objects with the
+    required fields, or bare ids when there are none. Id fields must be ints.
+    Raises ValueError for malformed, incomplete or oversized lists.
+    """
+    items = (data if isinstance(data, dict) else {}).get(key)
+    if not isinstance(items, list):
+        raise ValueError(f"Expected a list under '{key}'")
+    if len(items) > max_items:
+        raise ValueError(f"At most {max_items} items per request")
+    for index, item in enumerate(items):
+        if not required_fields:
+            if not _is_id(item):
+                raise ValueError(f"Item {index} is not an id")
+            continue
+        if not isinstance(item, dict):
+            raise ValueError(f"Item {index} is not an object")
+        missing = [field for field in required_fields if field not in item]
+        if missing:
+            raise ValueError(f"Item {index} is missing {', '.join(missing)}")
+        invalid = [field for field in BULK_ID_FIELDS if field in item and not _is_id(item[field])]
+        if invalid:
+            raise ValueError(f"Item {index} has a non-integer {', '.join(invalid)}")
+    return items
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def keyset_page(query, id_column, after_id, per_page):
+    """
+    Seeks past after_id using the primary key index instead of OFFSET.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    rows = query.filter(id_column > after_id).order_by(id_column).limit(per_page + 1).all()
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        return rows, encode_cursor(rows[-1].id)
+    return rows, None
+
+
+def approximate_count(model):
+    """
+    Row count estimate from the planner statistics (pg_class.reltuples) instead of COUNT(*).
+    Falls back to an exact count on other databases or tables that were never analyzed.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        table_name = db.engine.dialect.identifier_preparer.quote(model.__table__.name)
+        estimate = db.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+            {'table_name': table_name}
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return estimate
+    return model.query.count()
@@ -0,0 +1,283 @@
+import math
+from abc import ABC, abstractmethod
+from array import array
+
+# Shared prologue for every strategy script: reads the arguments, takes the
+# timestamp from the Redis server clock and bumps the global counter.
+# KEYS[1]: per-endpoint state, KEYS[2]: global counter
+# ARGV: limit, burst, period, global_limit, global_period, member
+SCRIPT_PROLOGUE = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local limit = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local period = tonumber(ARGV[3])
+local global_limit = tonumber(ARGV[4])
+local global_period = tonumber(ARGV[5])
+
+local global_count = redis.call('INCR', KEYS[2])
+if global_count == 1 then
+    redis.call('EXPIRE', KEYS[2], global_period)
+end
+local global_ok = global_count <= global_limit
+local allowed = 0
+"""
+
+SCRIPT_EPILOGUE = """
+return {count, math.max(limit - count, 0), reset, global_count, allowed}
+"""
+
+# Guards against float rounding when converting elapsed time into whole requests
+EPSILON = 1e-9
+
+
+class HitLog:
+    """
+    Fixed-size ring buffer of admitted request timestamps.
+
+    Never holds more than limit + burst entries, since no more requests than
+    that are admitted within one period.
+    """
+    __slots__ = ('times', 'head', 'size')
+
+    def __init__(self, capacity):
+        self.times = array('d', bytes(8 * capacity))
+        self.head = 0
+        self.size = 0
+
+    def expire(self, cutoff):
+        capacity = len(self.times)
+        while self.size and self.times[self.head] <= cutoff:
+            self.head = (self.head + 1) % capacity
+            self.size -= 1
+
+    def append(self, timestamp):
+        capacity = len(self.times)
+        self.times[(self.head + self.size) % capacity] = timestamp
+        self.size += 1
+
+    def oldest(self):
+        return self.times[self.head] if self.size else None
+
+
+class RateLimitStrategy(ABC):
+    """
+    A rate limiting algorithm with a Redis (Lua) and an in-memory implementation.
+
+    Both implementations report the number of requests already counted against
+    the key, so the caller can apply the same limit/burst semantics regardless
+    of the algorithm.
+    """
+    name = None
+    body = None
+
+    @property
+    def script(self):
+        return SCRIPT_PROLOGUE + self.body + SCRIPT_EPILOGUE
+
+    @abstractmethod
+    def memory_hit(self, state, now, limit, period, burst, global_ok):
+        """
+        Returns (state, request_count, reset, allowed) for the given stored state
+        """
+
+    def ttl(self, limit, period, burst):
+        """
+        Seconds after the last hit when the stored state no longer matters
+        """
+        return period
+
+
+class SlidingLogStrategy(RateLimitStrategy):
+    """Exact sliding window; stores one entry per admitted request."""
+    name = 'moving-window'
+    body = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - period)
+local count = redis.call('ZCARD', KEYS[1])
+if count < limit + burst and global_ok then
+    redis.call('ZADD', KEYS[1], now, ARGV[6])
+    redis.call('EXPIRE', KEYS[1], period)
+    allowed = 1
+end
+
+local reset = math.ceil(now + period)
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+if oldest[2] then
+    reset = math.ceil(tonumber(oldest[2]) + period)
+end
+"""
+
+    def memory_hit(self, state, now, limit, period, burst, global_ok):
+        hits = state if state is not None and len(state.times) == limit + burst else HitLog(limit + burst)
+        hits.expire(now - period)
+        request_count = hits.size
+        allowed = request_count < limit + burst and global_ok
+        if allowed:
+            hits.append(now)
+        oldest = hits.oldest()
+        reset = math.ceil(oldest + period) if oldest is not None else math.ceil(now + period)
+        return hits, request_count, reset, allowed
+
+
+class FixedWindowStrategy(RateLimitStrategy):
+    """Single counter per window, starting at the first request."""
+    name = 'fixed-window'
+    body = """
+local count = tonumber(redis.call('GET', KEYS[1])) or 0
+if count < limit + burst and global_ok then
+    if redis.call('INCR', KEYS[1]) == 1 then
+        redis.call('EXPIRE', KEYS[1], period)
+    end
+    allowed = 1
+end
+local ttl = redis.call('TTL', KEYS[1])
+if ttl < 0 then
+    ttl = period
+end
+local reset = math.ceil(now) + ttl
+"""
+
+    def memory_hit(self, state, now, limit, period, burst, global_ok):
+        window_end, request_count = state if state and state[0] > now else (now + period, 0)
+        allowed = request_count < limit + burst and global_ok
+        if allowed:
+            state = (window_end, request_count + 1)
+        else:
+            state = (window_end, request_count)
+        return state, request_count, math.ceil(window_end), allowed
+
+
+class SlidingWindowCounterStrategy(RateLimitStrategy):
+    """Approximates a sliding window by weighting the previous fixed window."""
+    name = 'sliding-window-counter'
+    body = """
+local window = math.floor(now / period)
+local state = redis.call('HMGET', KEYS[1], 'window', 'current', 'previous')
+local stored = tonumber(state[1]) or window
+local current = tonumber(state[2]) or 0
+local previous = tonumber(state[3]) or 0
+if stored == window - 1 then
+    previous = current
+    current = 0
+elseif stored < window - 1 then
+    previous = 0
+    current = 0
+end
+
+local weight = 1 - (now - window * period) / period
+local count = math.floor(previous * weight + current)
+if count < limit + burst and global_ok then
+    current = current + 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'window', window, 'current', current, 'previous', previous)
+redis.call('EXPIRE', KEYS[1], period * 2)
+local reset = (window + 1) * period
+"""
+
+    def memory_hit(self, state, now, limit, period, burst, global_ok):
+        window = math.floor(now / period)
+        stored, current, previous = state or (window, 0, 0)
+        if stored == window - 1:
+            previous, current = current, 0
+        elif stored < window - 1:
+            previous, current = 0, 0
+
+        weight = 1 - (now - window * period) / period
+        request_count = math.floor(previous * weight + current)
+        allowed = request_count < limit + burst and global_ok
+        if allowed:
+            current += 1
+        return (window, current, previous), request_count, (window + 1) * period, allowed
+
+    def ttl(self, limit, period, burst):
+        return period * 2
+
+
+class TokenBucketStrategy(RateLimitStrategy):
+    """Bucket of limit + burst tokens refilled at limit / period per second."""
+    name = 'token-bucket'
+    body = """
+local capacity = limit + burst
+local rate = limit / period
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+
+local count = math.ceil(capacity - tokens - """ + repr(EPSILON) + """)
+if count < capacity and global_ok then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate))
+local reset = math.ceil(now + (capacity - tokens) / rate)
+"""
+
+    def memory_hit(self, state, now, limit, period, burst, global_ok):
+        capacity = limit + burst
+        rate = limit / period
+        tokens, ts = state or (capacity, now)
+        tokens = min(capacity, tokens + max(now - ts, 0) * rate)
+
+        request_count = math.ceil(capacity - tokens - EPSILON)
+        allowed = request_count < capacity and global_ok
+        if allowed:
+            tokens -= 1
+        return (tokens, now), request_count, math.ceil(now + (capacity - tokens) / rate), allowed
+
+    def ttl(self, limit, period, burst):
+        return (limit + burst) * period / limit
+
+
+class GCRAStrategy(RateLimitStrategy):
+    """Generic cell rate algorithm; stores only the theoretical arrival time."""
+    name = 'gcra'
+    body = """
+local interval = period / limit
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+
+local count = math.ceil((tat - now) / interval - """ + repr(EPSILON) + """)
+if count < limit + burst and global_ok then
+    tat = tat + interval
+    redis.call('SET', KEYS[1], tat, 'PX', math.ceil((tat - now) * 1000))
+    allowed = 1
+end
+local reset = math.ceil(tat)
+"""
+
+    def memory_hit(self, state, now, limit, period, burst, global_ok):
+        interval = period / limit
+        tat = max(state or now, now)
+
+        request_count = math.ceil((tat - now) / interval - EPSILON)
+        allowed = request_count < limit + burst and global_ok
+        if allowed:
+            tat += interval
+        return tat, request_count, math.ceil(tat), allowed
+
+    def ttl(self, limit, period, burst):
+        return (limit + burst) * period / limit
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (
+        SlidingLogStrategy(),
+        FixedWindowStrategy(),
+        SlidingWindowCounterStrategy(),
+        TokenBucketStrategy(),
+        GCRAStrategy(),
+    )
+}
+
+
+def get_strategy(name):
+    try:
+        return STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown rate limiting strategy: {name}")
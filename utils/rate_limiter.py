@@ -1,50 +1,58 @@
 import time
 from flask import request, jsonify, make_response
 from functools import wraps
-from collections import defaultdict
-import threading
 import logging
+import uuid
+from utils.rate_limit_strategies import get_strategy
+from utils.memory_store import MemoryStore
 
 class RateLimiter:
-    def __init__(self, redis_client):
+    GLOBAL_LIMIT = 1000  # Global limit per minute, before scaling
+
+    def __init__(self, redis_client, strategy='moving-window', max_memory_keys=10000):
         self.redis_client = redis_client
-        self.in_memory_storage = defaultdict(list)
-        self.lock = threading.Lock()
+        self.default_strategy = strategy
+        self.in_memory_storage = MemoryStore(max_keys=max_memory_keys)
         self.logger = logging.getLogger(__name__)
-        self.global_limit = 1000  # Global limit per minute
+        self.scale = 1.0
+        self.global_limit = self.GLOBAL_LIMIT
         self.burst_limit = 5  # Burst limit
+        self.global_period = 60
+        self._scripts = {}
+
+    def limit(self, key_prefix, limit, period, strategy=None):
+        # An explicit strategy is checked when the view is decorated, the default in init_rate_limiter
+        explicit = get_strategy(strategy) if strategy else None
 
-    def limit(self, key_prefix, limit, period):
         def decorator(f):
             @wraps(f)
             def wrapped(*args, **kwargs):
-                key = f"{key_prefix}:{request.remote_addr}"
-                current = int(time.time())
-                window_start = current - period
+                if not self.scale:
+                    return f(*args, **kwargs)
+                # Resolved per call so the configured default and scale apply to decorators bound at import time
+                algorithm = explicit or get_strategy(self.default_strategy)
+                scaled_limit = self.scaled(limit)
+                key = f"{key_prefix}:{algorithm.name}:{request.remote_addr}"
+                global_key = f"global:{request.remote_addr}"
 
                 try:
                     if self.redis_client:
                         self.logger.info(f"Using Redis for rate limiting: {key}")
-                        request_count, remaining, reset = self._redis_rate_limit(key, limit, period, current, window_start)
+                        request_count, remaining, reset, global_count, allowed = self._redis_rate_limit(algorithm, key, global_key, scaled_limit, period)
                     else:
                         self.logger.info(f"Using in-memory storage for rate limiting: {key}")
-                        request_count, remaining, reset = self._memory_rate_limit(key, limit, period, current, window_start)
+                        request_count, remaining, reset, global_count, allowed = self._memory_rate_limit(algorithm, key, global_key, scaled_limit, period)
 
-                    # Check global rate limit
-                    global_key = f"global:{request.remote_addr}"
-                    global_count = self._increment_counter(global_key, 60)
-
-                    if request_count < limit and global_count <= self.global_limit:
-                        response = f(*args, **kwargs)
-                    elif request_count < limit + self.burst_limit and global_count <= self.global_limit:
-                        self.logger.warning(f"Burst limit applied for {key}")
+                    if allowed:
+                        if request_count >= scaled_limit:
+                            self.logger.warning(f"Burst limit applied for {key}")
                         response = f(*args, **kwargs)
                     else:
                         self.logger.warning(f"Rate limit exceeded for {key}")
                         response = jsonify({"error": "Rate limit exceeded"}), 429
 
                     response = make_response(response)
-                    response.headers["X-RateLimit-Limit"] = str(limit)
+                    response.headers["X-RateLimit-Limit"] = str(scaled_limit)
                     response.headers["X-RateLimit-Remaining"] = str(remaining)
                     response.headers["X-RateLimit-Reset"] = str(reset)
                     response.headers["X-Global-RateLimit-Limit"] = str(self.global_limit)
@@ -54,55 +62,76 @@ class RateLimiter:
 
                 except Exception as e:
                     self.logger.error(f"Error in rate limiting: {str(e)}")
-                    return jsonify({"error": "Internal server error"}), 500
+                    # A full response: Flask-RESTful would try to encode a (Response, status) tuple as the body
+                    return make_response(jsonify({"error": "Internal server error"}), 500)
 
             return wrapped
         return decorator
 
-    def _redis_rate_limit(self, key, limit, period, current, window_start):
+    def set_scale(self, scale):
+        """
+        Multiplies every limit, including the global one, by scale; 0 turns rate limiting off.
+        Meant for load tests, which send far more requests per client than the limits allow.
+        """
+        self.scale = scale
+        self.global_limit = self.scaled(self.GLOBAL_LIMIT)
+
+    def scaled(self, limit):
+        return max(1, int(limit * self.scale))
+
+    def _get_script(self, algorithm):
+        # redis-py's Script runs EVALSHA with the cached digest and reloads the
+        # script transparently if the server answers NOSCRIPT (restart/failover).
+        script = self._scripts.get(algorithm.name)
+        if script is None:
+            script = self._scripts[algorithm.name] = self.redis_client.register_script(algorithm.script)
+        return script
+
+    def script_args(self, limit, period):
+        # The member must be unique so that requests within the same second are all counted
+        return [limit, self.burst_limit, period, self.global_limit, self.global_period, uuid.uuid4().hex]
+
+    def _redis_rate_limit(self, algorithm, key, global_key, limit, period):
         try:
-            pipe = self.redis_client.pipeline()
-            pipe.zremrangebyscore(key, 0, window_start)
-            pipe.zcard(key)
-            pipe.zadd(key, {str(current): current})
-            pipe.expire(key, period)
-            results = pipe.execute()
-            request_count = results[1]
-            remaining = max(limit - request_count, 0)
-            reset = window_start + period
-            return request_count, remaining, reset
+            script = self._get_script(algorithm)
+            results = script(keys=[key, global_key], args=self.script_args(limit, period))
+            request_count, remaining, reset, global_count, allowed = (int(value) for value in results)
+            return request_count, remaining, reset, global_count, bool(allowed)
         except Exception as e:
             self.logger.error(f"Redis rate limiting error: {str(e)}")
             raise
 
-    def _memory_rate_limit(self, key, limit, period, current, window_start):
-        with self.lock:
-            self.in_memory_storage[key] = [t for t in self.in_memory_storage[key] if t > window_start]
-            request_count = len(self.in_memory_storage[key])
-            if request_count < limit:
-                self.in_memory_storage[key].append(current)
-            remaining = max(limit - request_count, 0)
-            reset = window_start + period
-        return request_count, remaining, reset
-
-    def _increment_counter(self, key, period):
-        if self.redis_client:
-            count = self.redis_client.incr(key)
-            self.redis_client.expire(key, period)
-        else:
-            with self.lock:
-                self.in_memory_storage[key] = [t for t in self.in_memory_storage[key] if t > time.time() - period]
-                self.in_memory_storage[key].append(time.time())
-                count = len(self.in_memory_storage[key])
-        return count
+    def _memory_rate_limit(self, algorithm, key, global_key, limit, period):
+        current = time.time()
+
+        def count_global(state):
+            window_end, count = state if state and state[0] > current else (current + self.global_period, 0)
+            count += 1
+            return (window_end, count), count
+
+        global_count = self.in_memory_storage.update(global_key, count_global, self.global_period, current)
+
+        def hit(state):
+            state, request_count, reset, allowed = algorithm.memory_hit(
+                state, current, limit, period, self.burst_limit, global_count <= self.global_limit,
+            )
+            return state, (request_count, reset, allowed)
+
+        request_count, reset, allowed = self.in_memory_storage.update(
+            key, hit, algorithm.ttl(limit, period, self.burst_limit), current,
+        )
+        remaining = max(limit - request_count, 0)
+        return request_count, remaining, reset, global_count, allowed
 
     def switch_to_redis(self, redis_client):
         self.logger.info("Switching to Redis for rate limiting")
         self.redis_client = redis_client
+        self._scripts = {}
 
     def switch_to_memory(self):
         self.logger.warning("Switching to in-memory storage for rate limiting")
         self.redis_client = None
+        self._scripts = {}
 
     def clear_limits(self):
         self.logger.info("Clearing all rate limits")
@@ -1,10 +1,16 @@
 from utils.rate_limiter import RateLimiter
+from utils.rate_limit_strategies import get_strategy
 from flask_redis import FlaskRedis
+from utils.redis_pool import PooledRedis
 
-redis_client = FlaskRedis()
+redis_client = FlaskRedis.from_custom_provider(PooledRedis)
 rate_limiter = RateLimiter(redis_client)
 
 def init_rate_limiter(app):
     global redis_client, rate_limiter
     redis_client.init_app(app)
+    # Fails at startup on an unknown name rather than on every rate limited request
+    rate_limiter.default_strategy = get_strategy(app.config.get('RATE_LIMITER_STRATEGY', rate_limiter.default_strategy)).name
+    rate_limiter.set_scale(app.config.get('RATE_LIMIT_SCALE', rate_limiter.scale))
+    rate_limiter.in_memory_storage.max_keys = app.config.get('RATE_LIMITER_MEMORY_MAX_KEYS', rate_limiter.in_memory_storage.max_keys)
     app.rate_limiter = rate_limiter
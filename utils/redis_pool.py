@@ -0,0 +1,93 @@
+import threading
+import time
+from redis import BlockingConnectionPool
+from redis.exceptions import ConnectionError
+from config import Config
+from utils.metrics import InstrumentedRedis
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """
+    Blocking pool that records how long callers wait for a connection.
+
+    Blocks for up to `timeout` seconds when every connection is checked out
+    instead of opening more, so max_connections is a hard cap per process.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._stats_lock = threading.Lock()
+        self._in_use = 0
+        self.counters = {'checkouts': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0, 'timeouts': 0}
+        super().__init__(*args, **kwargs)
+
+    def reset(self):
+        super().reset()
+        self._in_use = 0  # Connections of the parent process are not ours after a fork
+
+    def get_connection(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            connection = super().get_connection(*args, **kwargs)
+        except ConnectionError:
+            with self._stats_lock:
+                self.counters['timeouts'] += 1
+            raise
+        wait = time.perf_counter() - start
+        with self._stats_lock:
+            self._in_use += 1
+            self.counters['checkouts'] += 1
+            self.counters['wait_seconds'] += wait
+            self.counters['max_wait_seconds'] = max(self.counters['max_wait_seconds'], wait)
+        return connection
+
+    def release(self, connection):
+        super().release(connection)
+        with self._stats_lock:
+            self._in_use = max(self._in_use - 1, 0)
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self.counters, in_use=self._in_use, open=len(self._connections), max_connections=self.max_connections)
+
+
+def get_connection_pool(url, **kwargs):
+    """
+    The process-wide pool for a Redis URL, shared by every client in the process.
+
+    kwargs are connection options (decode_responses, socket_timeout...) as
+    accepted by redis.Redis.from_url; clients passing different options get
+    a pool of their own, since the options belong to its connections.
+    """
+    key = (url, tuple(sorted((name, repr(value)) for name, value in kwargs.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = {'max_connections': Config.REDIS_POOL_MAX_CONNECTIONS, 'timeout': Config.REDIS_POOL_TIMEOUT, **kwargs}
+            pool = _pools[key] = InstrumentedConnectionPool.from_url(url, **options)
+        return pool
+
+
+def connection_pools():
+    """
+    Every pool of the process, labelled by URL and by the options it was created with, if any
+    """
+    with _pools_lock:
+        pools = dict(_pools)
+    labels = {}
+    for (url, options), pool in pools.items():
+        label = f"{url} ({', '.join(f'{name}={value}' for name, value in options)})" if options else url
+        labels[label] = pool
+    return labels
+
+
+class PooledRedis(InstrumentedRedis):
+    """
+    Instrumented client whose from_url() reuses the shared pool for that URL and options
+    """
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        return cls(connection_pool=get_connection_pool(url, **kwargs))
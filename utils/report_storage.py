@@ -0,0 +1,188 @@
+import io
+import itertools
+import os
+import re
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from config import Config
+
+# Handles are generated by the storage itself; anything else is rejected so they can't escape the root
+HANDLE_PATTERN = re.compile(r'^[A-Za-z0-9_-]+\.[a-z]+$')
+
+
+class LocalReportStorage:
+    """
+    Stores generated reports as files under a root directory.
+
+    Stand-in for object storage (S3): reports are written once through
+    `writer()` and read back in fixed-size chunks, so neither side ever
+    holds a whole report in memory. The root must be shared by the Celery
+    workers and the web replicas, e.g. a network volume mounted on each.
+    """
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, root):
+        self.root = root
+
+    def new_handle(self, prefix, extension='txt'):
+        return f"{prefix}-{uuid.uuid4().hex}.{extension}"
+
+    def _path(self, handle):
+        if not HANDLE_PATTERN.match(handle):
+            raise ValueError(f"Invalid report handle: {handle}")
+        return os.path.join(self.root, handle)
+
+    @contextmanager
+    def writer(self, handle):
+        """
+        Buffered text writer; the report only becomes visible under its handle once fully written
+        """
+        path = self._path(handle)
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.part')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', buffering=self.CHUNK_SIZE) as f:
+                yield f
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def exists(self, handle):
+        return os.path.exists(self._path(handle))
+
+    def size(self, handle):
+        return os.path.getsize(self._path(handle))
+
+    def iter_chunks(self, handle):
+        with open(self._path(handle), 'rb') as f:
+            while True:
+                chunk = f.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    def delete(self, handle):
+        try:
+            os.unlink(self._path(handle))
+        except FileNotFoundError:
+            pass
+
+    def delete_expired(self, max_age):
+        """
+        Deletes reports, and partial writes left behind by a crashed worker,
+        last written more than max_age seconds ago. Returns how many were deleted.
+        """
+        cutoff = time.time() - max_age
+        deleted = 0
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            if HANDLE_PATTERN.match(entry.name) and entry.is_file() and entry.stat().st_mtime < cutoff:
+                self.delete(entry.name)
+                deleted += 1
+        return deleted
+
+
+
+class _RedisListWriter(io.RawIOBase):
+    # Appends every buffer flushed by the BufferedWriter in front of it as one list element
+    def __init__(self, redis_client, key, ttl):
+        self.redis_client = redis_client
+        self.key = key
+        self.ttl = ttl
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.rpush(self.key, bytes(data))
+        pipe.expire(self.key, self.ttl)
+        pipe.execute()
+        self.size += len(data)
+        return len(data)
+
+
+class RedisReportStorage:
+    """
+    Stores generated reports in Redis as a list of chunks of about CHUNK_SIZE
+    bytes, so the worker that writes a report and the replica that serves it
+    only have to share Redis. Reports expire after `ttl` seconds.
+    """
+    CHUNK_SIZE = LocalReportStorage.CHUNK_SIZE
+
+    def __init__(self, redis_client, ttl):
+        self.redis_client = redis_client
+        self.ttl = ttl
+
+    def new_handle(self, prefix, extension='txt'):
+        return f"{prefix}-{uuid.uuid4().hex}.{extension}"
+
+    def _key(self, handle):
+        if not HANDLE_PATTERN.match(handle):
+            raise ValueError(f"Invalid report handle: {handle}")
+        return f"report:{handle}"
+
+    @contextmanager
+    def writer(self, handle):
+        """
+        Buffered text writer; the report only becomes visible under its handle once fully written
+        """
+        key = self._key(handle)
+        chunks = _RedisListWriter(self.redis_client, f"{key}:{uuid.uuid4().hex}.part", self.ttl)
+        try:
+            with io.TextIOWrapper(io.BufferedWriter(chunks, self.CHUNK_SIZE), encoding='utf-8') as f:
+                yield f
+            if not chunks.size:
+                chunks.write(b'')  # RENAME needs the list to exist
+            pipe = self.redis_client.pipeline()
+            pipe.rename(chunks.key, key)
+            pipe.set(f"{key}:size", chunks.size, ex=self.ttl)
+            pipe.expire(key, self.ttl)
+            pipe.execute()
+        except BaseException:
+            self.redis_client.delete(chunks.key)
+            raise
+
+    def exists(self, handle):
+        return self.redis_client.exists(self._key(handle)) > 0
+
+    def size(self, handle):
+        return int(self.redis_client.get(f"{self._key(handle)}:size") or 0)
+
+    def iter_chunks(self, handle):
+        key = self._key(handle)
+        for index in itertools.count():
+            chunk = self.redis_client.lindex(key, index)
+            if chunk is None:
+                break
+            if chunk:
+                yield chunk
+
+    def delete(self, handle):
+        key = self._key(handle)
+        self.redis_client.delete(key, f"{key}:size")
+
+    def delete_expired(self, max_age):
+        # Redis expires reports itself
+        return 0
+
+
+def create_report_storage(config):
+    if config.REPORT_STORAGE == 'redis':
+        from utils.rate_limiter_init import redis_client
+        return RedisReportStorage(redis_client, config.REPORT_TTL_SECONDS)
+    if config.REPORT_STORAGE == 'local':
+        if not config.REPORT_STORAGE_DIR:
+            raise ValueError("REPORT_STORAGE=local needs REPORT_STORAGE_DIR, a directory shared by the web and worker hosts")
+        return LocalReportStorage(config.REPORT_STORAGE_DIR)
+    raise ValueError(f"Unknown REPORT_STORAGE: {config.REPORT_STORAGE}")
+
+
+report_storage = create_report_storage(Config)
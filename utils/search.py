@@ -0,0 +1,205 @@
+"""
+Full-text and prefix search over courses and skills.
+
+On Postgres, each table has a generated `search_vector` tsvector column with
+a GIN index, plus a pg_trgm GIN index on lower(title)/lower(name) for prefix
+(autocomplete) matching; see the add_search_indexes migration. Neither is
+mapped in models.py, so other databases can create the schema from the models.
+
+Elsewhere (SQLite in development and tests) the same queries are answered
+from a per-process inverted index, rebuilt when the table changes.
+
+Both rank at most `max_candidates` matches per table: a common term matching
+millions of rows costs a top-N sort on a plain column instead of computing a
+rank for every row. Full-text candidates are the most recently updated
+matches, prefix candidates the shortest (closest to what was typed). Each
+backend method returns (hits, truncated), truncated being True when more
+rows matched than were ranked.
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from sqlalchemy import func, literal_column, select
+from extensions import db
+
+TOKEN = re.compile(r'\w+')
+
+
+class SearchTarget:
+    """
+    A searchable table. `fields` are (column, tsvector weight) pairs matching
+    its search_vector expression; autocomplete matches the first column.
+    """
+
+    def __init__(self, kind, model, fields, ts_config):
+        self.kind = kind
+        self.model = model
+        self.fields = fields
+        self.prefix_column = fields[0][0]
+        self.ts_config = ts_config
+
+    @property
+    def search_vector(self):
+        return literal_column(f'{self.model.__tablename__}.search_vector')
+
+
+# Relative weight of each tsvector weight class, as ts_rank's defaults {D, C, B, A}
+WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2, 'D': 0.1}
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower()) if text else []
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class PostgresSearch:
+    def __init__(self, max_candidates):
+        self.max_candidates = max_candidates
+
+    def _rank(self, candidates, score, limit):
+        # Candidates run one past max_candidates, so their count tells whether the set was cut off
+        query = select(candidates.c.id, score, func.count().over()).order_by(score.desc(), candidates.c.id).limit(limit)
+        rows = db.session.execute(query).all()
+        return [(row[0], float(row[1])) for row in rows], bool(rows) and rows[0][2] > self.max_candidates
+
+    def search(self, target, q, limit):
+        tsquery = func.websearch_to_tsquery(target.ts_config, q)
+        candidates = (
+            select(target.model.id.label('id'), target.search_vector.label('vector'))
+            .where(target.search_vector.op('@@')(tsquery))
+            .order_by(target.model.updated_at.desc(), target.model.id.desc())
+            .limit(self.max_candidates + 1)
+            .subquery()
+        )
+        return self._rank(candidates, func.ts_rank_cd(candidates.c.vector, tsquery), limit)
+
+    def prefix(self, target, q, limit):
+        # LIKE 'q%' on lower(column) is answered from the trigram index
+        column = func.lower(target.prefix_column)
+        candidates = (
+            select(target.model.id.label('id'), column.label('value'))
+            .where(column.like(_escape_like(q.lower()) + '%', escape='\\'))
+            .order_by(func.length(column), column, target.model.id)
+            .limit(self.max_candidates + 1)
+            .subquery()
+        )
+        return self._rank(candidates, func.similarity(candidates.c.value, q.lower()), limit)
+
+
+class InvertedIndex:
+    """
+    In-memory index of one table: term -> {id: weighted term frequency}, plus
+    the sorted lowercased prefix column for autocomplete. Rows are
+    (id, updated_at, *field values).
+    """
+
+    def __init__(self, target, rows):
+        self.postings = defaultdict(dict)
+        self.lengths = {}
+        self.updated = {}
+        names = []
+        for row in rows:
+            row_id, values = row[0], row[2:]
+            self.updated[row_id] = row[1] or datetime.min
+            length = 0
+            for (_, weight), value in zip(target.fields, values):
+                tokens = tokenize(value)
+                length += len(tokens)
+                for term, count in Counter(tokens).items():
+                    self.postings[term][row_id] = self.postings[term].get(row_id, 0.0) + count * WEIGHTS[weight]
+            self.lengths[row_id] = length
+            names.append(((values[0] or '').lower(), row_id))
+        names.sort()
+        self.names = names
+
+    def search(self, q, limit, max_candidates):
+        terms = set(tokenize(q))
+        if not terms:
+            return [], False
+        # Every term must match, as websearch_to_tsquery ANDs plain words
+        matches = None
+        for term in terms:
+            ids = self.postings.get(term, {}).keys()
+            matches = set(ids) if matches is None else matches & ids
+            if not matches:
+                return [], False
+        # The most recently updated candidates, as PostgresSearch
+        truncated = len(matches) > max_candidates
+        if truncated:
+            matches = heapq.nlargest(max_candidates, matches, key=lambda row_id: (self.updated[row_id], row_id))
+        documents = len(self.lengths)
+        scores = []
+        for row_id in matches:
+            score = 0.0
+            for term in terms:
+                postings = self.postings[term]
+                score += postings[row_id] * math.log(1 + documents / len(postings))
+            scores.append((row_id, score / (1 + math.log(1 + self.lengths[row_id]))))
+        scores.sort(key=lambda hit: (-hit[1], hit[0]))
+        return scores[:limit], truncated
+
+    def prefix(self, q, limit, max_candidates):
+        q = q.lower()
+        if not q:
+            return [], False
+        # Names starting with q form one contiguous run of the sorted list
+        start = bisect.bisect_left(self.names, (q,))
+        end = bisect.bisect_left(self.names, (q + '\U0010ffff',), start)
+        truncated = end - start > max_candidates
+        # The shortest candidates, as PostgresSearch
+        candidates = heapq.nsmallest(max_candidates, self.names[start:end], key=lambda entry: (len(entry[0]), entry))
+        hits = [(row_id, len(q) / len(name)) for name, row_id in candidates]
+        hits.sort(key=lambda hit: (-hit[1], hit[0]))
+        return hits[:limit], truncated
+
+
+class InvertedIndexSearch:
+    """
+    Search backend for databases without tsvector/pg_trgm. Each table's index is
+    rebuilt when its row count or latest updated_at changes.
+    """
+
+    def __init__(self, max_candidates):
+        self.max_candidates = max_candidates
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def _index(self, target):
+        model = target.model
+        signature = tuple(db.session.execute(select(func.count(model.id), func.max(model.updated_at))).one())
+        with self._lock:
+            cached = self._indexes.get(target.kind)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+        rows = db.session.execute(
+            select(model.id, model.updated_at, *(column for column, _ in target.fields)).execution_options(yield_per=1000)
+        )
+        index = InvertedIndex(target, rows)
+        with self._lock:
+            self._indexes[target.kind] = (signature, index)
+        return index
+
+    def search(self, target, q, limit):
+        return self._index(target).search(q, limit, self.max_candidates)
+
+    def prefix(self, target, q, limit):
+        return self._index(target).prefix(q, limit, self.max_candidates)
+
+
+_backends = {}
+
+
+def get_search_backend(max_candidates):
+    dialect = db.engine.dialect.name
+    backend = _backends.get((dialect, max_candidates))
+    if backend is None:
+        backend_cls = PostgresSearch if dialect == 'postgresql' else InvertedIndexSearch
+        backend = _backends[(dialect, max_candidates)] = backend_cls(max_candidates)
+    return backend
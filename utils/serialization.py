@@ -0,0 +1,57 @@
+import json
+from dataclasses import dataclass, fields
+
+try:
+    import orjson
+except ImportError:  # Optional speedup, the stdlib encoder produces the same payload
+    orjson = None
+
+DTO_REGISTRY = {}
+_DTO_FIELDS = {}
+
+
+def dto(cls):
+    """
+    Declare an immutable, slotted DTO that the cache codec can round-trip.
+
+    Instances are encoded as {"$": ClassName, "v": [field values...]} so
+    field names are not repeated in every cached row.
+    """
+    cls = dataclass(frozen=True, slots=True)(cls)
+    DTO_REGISTRY[cls.__name__] = cls
+    _DTO_FIELDS[cls] = tuple(field.name for field in fields(cls))
+    return cls
+
+
+def _to_plain(value):
+    names = _DTO_FIELDS.get(type(value))
+    if names is not None:
+        return {'$': type(value).__name__, 'v': [_to_plain(getattr(value, name)) for name in names]}
+    if isinstance(value, (list, tuple)):
+        return [_to_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_plain(item) for key, item in value.items()}
+    return value
+
+
+def _from_plain(value):
+    if isinstance(value, list):
+        # Sequences come back as tuples so decoded values are safe to share between requests
+        return tuple(_from_plain(item) for item in value)
+    if isinstance(value, dict):
+        cls = DTO_REGISTRY.get(value.get('$'))
+        if cls is not None:
+            return cls(*(_from_plain(item) for item in value['v']))
+        return {key: _from_plain(item) for key, item in value.items()}
+    return value
+
+
+def dumps(value):
+    plain = _to_plain(value)
+    if orjson is not None:
+        return orjson.dumps(plain)
+    return json.dumps(plain, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    return _from_plain(orjson.loads(data) if orjson is not None else json.loads(data))
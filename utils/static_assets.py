@@ -0,0 +1,150 @@
+"""
+Static asset serving for the frontend build.
+
+The build directory is scanned once at startup into an in-memory manifest,
+so requests never touch the filesystem to find a file. Compressible assets
+are served as Brotli or gzip according to Accept-Encoding, from `.br`/`.gz`
+files next to the original when the build produced them, otherwise from
+variants compressed once at startup.
+
+Precompress a build ahead of deployment with:
+
+    python -m utils.static_assets frontend/build
+"""
+import gzip
+import hashlib
+import io
+import mimetypes
+import os
+import re
+import sys
+from flask import request, send_file
+
+try:
+    import brotli
+except ImportError:  # Optional, gzip is always available
+    brotli = None
+
+# Content-hashed names (main.bfac422b.js) never change content, so clients may cache them forever
+HASHED_NAME = re.compile(r'\.[0-9a-f]{8,}\.')
+COMPRESSIBLE_TYPES = re.compile(r'^(text/|application/(javascript|json|xml|manifest\+json)|image/svg\+xml)')
+MIN_COMPRESS_SIZE = 500  # Bytes, as Flask-Compress; smaller files gain nothing from compression
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+DEFAULT_CACHE_CONTROL = 'public, max-age=3600'
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class Asset:
+    __slots__ = ('path', 'mimetype', 'etag', 'cache_control', 'variants')
+
+    def __init__(self, path, mimetype, etag, cache_control):
+        self.path = path
+        self.mimetype = mimetype
+        self.etag = etag
+        self.cache_control = cache_control
+        self.variants = {}  # Content-Encoding -> file path or compressed bytes
+
+
+def _compress(encoding, data):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11) if brotli is not None else None
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class StaticManifest:
+    """
+    Maps URL paths under the build directory to their assets
+    """
+
+    def __init__(self, root, index='index.html'):
+        self.root = root
+        self.index = index
+        self.assets = {}
+
+    def build(self):
+        assets = {}
+        if os.path.isdir(self.root):
+            for directory, _, filenames in os.walk(self.root):
+                for filename in filenames:
+                    if filename.endswith(('.br', '.gz')):
+                        continue
+                    path = os.path.join(directory, filename)
+                    url_path = os.path.relpath(path, self.root).replace(os.sep, '/')
+                    assets[url_path] = self._load(url_path, path)
+        self.assets = assets
+        return self
+
+    def _load(self, url_path, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if url_path == self.index:
+            cache_control = REVALIDATE_CACHE_CONTROL
+        elif HASHED_NAME.search(os.path.basename(path)):
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            cache_control = DEFAULT_CACHE_CONTROL
+        asset = Asset(path, mimetype, hashlib.blake2b(data, digest_size=16).hexdigest(), cache_control)
+        if len(data) >= MIN_COMPRESS_SIZE and COMPRESSIBLE_TYPES.match(mimetype):
+            for encoding, suffix in ENCODINGS:
+                if os.path.exists(path + suffix):
+                    asset.variants[encoding] = path + suffix
+                else:
+                    compressed = _compress(encoding, data)
+                    if compressed is not None and len(compressed) < len(data):
+                        asset.variants[encoding] = compressed
+        return asset
+
+    def lookup(self, path):
+        """
+        The asset for a URL path; unknown paths get index.html so the frontend router can handle them
+        """
+        return self.assets.get(path) or self.assets.get(self.index)
+
+    def _accepted_encoding(self, asset):
+        accepted = request.accept_encodings
+        for encoding, _ in ENCODINGS:
+            if encoding in asset.variants and accepted[encoding]:
+                return encoding
+        return None
+
+    def serve(self, path):
+        asset = self.lookup(path)
+        if asset is None:
+            return {'message': 'Not found'}, 404
+        encoding = self._accepted_encoding(asset)
+        if encoding is None:
+            response = send_file(asset.path, mimetype=asset.mimetype, etag=asset.etag, conditional=True)
+        else:
+            variant = asset.variants[encoding]
+            body = variant if isinstance(variant, str) else io.BytesIO(variant)
+            # Each representation gets its own validator
+            response = send_file(body, mimetype=asset.mimetype, etag=f"{asset.etag}-{encoding}", conditional=True)
+            response.headers['Content-Encoding'] = encoding
+        if asset.variants:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = asset.cache_control
+        return response
+
+
+def precompress(root):
+    """
+    Write .br/.gz files next to every compressible asset of a build
+    """
+    written = 0
+    for asset in StaticManifest(root).build().assets.values():
+        for encoding, suffix in ENCODINGS:
+            variant = asset.variants.get(encoding)
+            if isinstance(variant, bytes):
+                with open(asset.path + suffix, 'wb') as f:
+                    f.write(variant)
+                written += 1
+    return written
+
+
+if __name__ == '__main__':
+    root = sys.argv[1] if len(sys.argv) > 1 else os.path.join('frontend', 'build')
+    print(f"Wrote {precompress(root)} precompressed files under {root}")
@@ -0,0 +1,62 @@
+"""
+Streamed exports: encode rows as NDJSON or CSV and hand them to the client
+in fixed-size chunks, gzipped on the fly when accepted, so an export of any
+size holds one chunk (plus the database driver's batch) in memory.
+"""
+import csv
+import io
+import itertools
+import zlib
+from utils.json_output import dumps
+
+CHUNK_SIZE = 64 * 1024
+
+
+def ndjson_lines(fields, rows):
+    for row in rows:
+        yield dumps(dict(zip(fields, row))) + b'\n'
+
+
+def csv_lines(fields, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # The header goes out on its own, so an export with no matching rows is still a valid CSV
+    for row in itertools.chain([fields], rows):
+        writer.writerow(row)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+
+# format -> (mimetype, file extension, line encoder)
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson', ndjson_lines),
+    'csv': ('text/csv', 'csv', csv_lines),
+}
+
+
+def chunked(lines, chunk_size=CHUNK_SIZE):
+    """
+    Joins lines into chunks of about chunk_size bytes, so the server writes a few large blocks instead of one per row
+    """
+    pending, size = [], 0
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield b''.join(pending)
+            pending, size = [], 0
+    if pending:
+        yield b''.join(pending)
+
+
+def gzipped(chunks, level=6):
+    """
+    Gzip a chunk stream incrementally; the output is one gzip member
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()